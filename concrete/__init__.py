@@ -8,31 +8,93 @@ specification defined using `Thrift <http://thrift.apache.org>`_.
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
-
-from .access.ttypes import *  # noqa
-from .annotate.ttypes import *  # noqa
-from .audio.ttypes import *  # noqa
-from .clustering.ttypes import *  # noqa
-from .communication.ttypes import *  # noqa
-from .context.ttypes import *  # noqa
-from .convert.ttypes import *  # noqa
-from .email.ttypes import *  # noqa
-from .entities.ttypes import *  # noqa
-from .exceptions.ttypes import *  # noqa
-from .language.ttypes import *  # noqa
-from .learn.ttypes import *  # noqa
-from .linking.ttypes import *  # noqa
-from .metadata.ttypes import *  # noqa
-from .nitf.ttypes import *  # noqa
-from .property.ttypes import *  # noqa
-from .search.ttypes import *  # noqa
-from .services.ttypes import *  # noqa
-from .services.results.ttypes import *  # noqa
-from .situations.ttypes import *  # noqa
-from .spans.ttypes import *  # noqa
-from .structure.ttypes import *  # noqa
-from .summarization.ttypes import *  # noqa
-from .twitter.ttypes import *  # noqa
-from .uuid.ttypes import *  # noqa
+import importlib
+import sys
+import types
 
 from .version import __version__  # noqa
+
+
+# Generated ttypes modules whose contents are attributes of this
+# package, in the order they used to be star-imported.  They are
+# imported on first access (PEP 562) rather than when this package is
+# imported, as together they take a noticeable time to load.
+_TTYPES_MODULES = (
+    'access',
+    'annotate',
+    'audio',
+    'clustering',
+    'communication',
+    'context',
+    'convert',
+    'email',
+    'entities',
+    'exceptions',
+    'language',
+    'learn',
+    'linking',
+    'metadata',
+    'nitf',
+    'property',
+    'search',
+    'services',
+    'services.results',
+    'situations',
+    'spans',
+    'structure',
+    'summarization',
+    'twitter',
+    'uuid',
+)
+
+
+def _import_ttypes(package_name):
+    return importlib.import_module('%s.%s.ttypes' % (__name__, package_name))
+
+
+def _public_names(module):
+    return [name for name in vars(module) if not name.startswith('_')]
+
+
+def __getattr__(name):
+    if name == '__all__':
+        # from concrete import *
+        names = []
+        for package_name in _TTYPES_MODULES:
+            names.extend(_public_names(_import_ttypes(package_name)))
+        # ... and the submodules, which are now attributes too
+        names.extend(
+            name for (name, value) in globals().items()
+            if isinstance(value, types.ModuleType) and
+            value.__name__.startswith(__name__ + '.'))
+        return list(dict.fromkeys(names))
+
+    if name in _TTYPES_MODULES:
+        # subpackage (e.g. concrete.structure.ttypes); the ttypes
+        # modules of nested subpackages used to be imported as well
+        for package_name in _TTYPES_MODULES:
+            if package_name.split('.')[0] == name:
+                _import_ttypes(package_name)
+        return importlib.import_module('%s.%s' % (__name__, name))
+
+    # Look in the modules that are already loaded first, then import
+    # the others; later modules take precedence, as with star imports
+    loaded = []
+    unloaded = []
+    for package_name in reversed(_TTYPES_MODULES):
+        if '%s.%s.ttypes' % (__name__, package_name) in sys.modules:
+            loaded.append(package_name)
+        else:
+            unloaded.append(package_name)
+    for package_name in loaded + unloaded:
+        module = _import_ttypes(package_name)
+        if name in vars(module) and not name.startswith('_'):
+            value = vars(module)[name]
+            globals()[name] = value
+            return value
+
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__getattr__('__all__')))
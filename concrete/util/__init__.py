@@ -3,26 +3,232 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
-from .access import *  # noqa
-from .access_wrapper import *  # noqa
-from .annotate_wrapper import *  # noqa
-from .comm_container import *  # noqa
-from .concrete_uuid import *  # noqa
-from .file_io import *  # noqa
-from .json_fu import *  # noqa
-from .learn_wrapper import *  # noqa
-from .locale import *  # noqa
-from .mem_io import *  # noqa
-from .metadata import *  # noqa
-from .net import *  # noqa
-from .redis_io import *  # noqa
-from .references import *  # noqa
-from .results_wrapper import *  # noqa
-from .search_wrapper import *  # noqa
-from .service_wrapper import *  # noqa
-from .simple_comm import *  # noqa
-from .summarization_wrapper import * # noqa
-from .thrift_factory import *  # noqa
-from .tokenization import *  # noqa
-from .twitter import *  # noqa
-from .unnone import *  # noqa
+import importlib
+import sys
+import types
+
+
+# Names defined by each submodule, which are attributes of this
+# package.  Submodules are imported on first access (PEP 562) rather
+# than when this package is imported, as some of them import slow or
+# optional dependencies (redis, pycountry, humanfriendly, ...).  Other
+# names that used to be star-imported from the submodules (such as
+# the Concrete types they import) are looked up in the submodules.
+_SUBMODULE_ATTRIBUTES = {
+    'access': (
+        'DEFAULT_S3_KEY_PREFIX_LEN', 'CommunicationContainerFetchHandler',
+        'DirectoryBackedStoreHandler', 'RelayFetchHandler', 'prefix_s3_key',
+        'unprefix_s3_key', 'S3BackedStoreHandler',
+        'RedisHashBackedStoreHandler',
+    ),
+    'access_wrapper': (
+        'FetchCommunicationClientWrapper', 'FetchCommunicationServiceWrapper',
+        'SubprocessFetchCommunicationServiceWrapper',
+        'HTTPFetchCommunicationClientWrapper',
+        'HTTPStoreCommunicationClientWrapper',
+        'StoreCommunicationClientWrapper', 'StoreCommunicationServiceWrapper',
+        'SubprocessStoreCommunicationServiceWrapper',
+    ),
+    'annotate_wrapper': (
+        'AnnotateCommunicationClientWrapper',
+        'AnnotateCommunicationServiceWrapper',
+        'HTTPAnnotateCommunicationClientWrapper',
+        'SubprocessAnnotateCommunicationServiceWrapper',
+        'AnnotateWithContextClientWrapper',
+        'AnnotateWithContextServiceWrapper',
+        'HTTPAnnotateWithContextClientWrapper',
+        'SubprocessAnnotateWithContextServiceWrapper',
+        'AnnotateCommunicationBatchClientWrapper',
+        'AnnotateCommunicationBatchServiceWrapper',
+        'HTTPAnnotateCommunicationBatchClientWrapper',
+        'SubprocessAnnotateCommunicationBatchServiceWrapper',
+    ),
+    'comm_container': (
+        'DirectoryBackedCommunicationContainer',
+        'FetchBackedCommunicationContainer',
+        'MemoryBackedCommunicationContainer',
+        'ZipFileBackedCommunicationContainer',
+        'StreamBackedCommunicationContainer',
+        'BlockGzipCommunicationContainer',
+        'RedisHashBackedCommunicationContainer',
+        'S3BackedCommunicationContainer',
+    ),
+    'compact_decoder': (
+        'SpecializedCompactProtocol', 'SpecializedCompactProtocolFactory',
+        'reader_source', 'specialized_decode',
+    ),
+    'concrete_uuid': (
+        'generate_UUID', 'hex_to_bin', 'bin_to_hex', 'split_uuid', 'join_uuid',
+        'generate_hex_unif', 'generate_uuid_unif',
+        'AnalyticUUIDGeneratorFactory', 'UUIDClustering', 'UUIDCompressor',
+        'compress_uuids', 'intern_uuids',
+    ),
+    'file_io': (
+        'read_thrift_from_file', 'read_communication_from_file',
+        'read_tokenlattice_from_file', 'write_communication_to_file',
+        'write_thrift_to_file', 'FileType', 'PARALLEL_GZIP_CHUNK_SIZE',
+        'PARALLEL_GZIP_PENDING_CHUNKS_PER_THREAD', 'PARALLEL_BATCH_SIZE',
+        'PARALLEL_BATCH_BYTES', 'PARALLEL_PENDING_BATCHES_PER_WORKER',
+        'DIR_PENDING_FILES_PER_THREAD', 'ThriftReader', 'CommunicationReader',
+        'STREAM_INDEX_SUFFIX', 'read_communication_id', 'build_stream_index',
+        'read_stream_index', 'CommunicationWriter', 'CommunicationWriterTar',
+        'CommunicationWriterTGZ', 'CommunicationWriterZip',
+        'BLOCK_GZIP_INDEX_SUFFIX', 'BLOCK_GZIP_BLOCK_SIZE',
+        'BLOCK_GZIP_PENDING_BLOCKS_PER_THREAD', 'BlockGzipCommunicationWriter',
+        'read_block_gzip_index', 'BlockGzipCommunicationReader',
+        'ShardedCommunicationWriter', 'shard_for_communication_id',
+    ),
+    'json_fu': (
+        'communication_file_to_json', 'tokenlattice_file_to_json',
+        'get_json_object_without_timestamps', 'get_json_object_without_uuids',
+        'thrift_to_json',
+    ),
+    'learn_wrapper': (
+        'ActiveLearnerClientClientWrapper',
+        'ActiveLearnerClientServiceWrapper',
+        'HTTPActiveLearnerClientClientWrapper',
+        'SubprocessActiveLearnerClientServiceWrapper',
+        'ActiveLearnerServerClientWrapper',
+        'ActiveLearnerServerServiceWrapper',
+        'HTTPActiveLearnerServerClientWrapper',
+        'SubprocessActiveLearnerServerServiceWrapper',
+    ),
+    'locale': (
+        'set_stdout_encoding',
+    ),
+    'mem_io': (
+        'projected_thrift_spec', 'read_thrift_from_protocol',
+        'ThriftSerializer', 'serialize_many', 'deserialize_many',
+        'write_thrift_to_buffer', 'read_thrift_from_buffer',
+        'read_communication_from_buffer', 'write_communication_to_buffer',
+        'thrift_deep_copy', 'communication_deep_copy',
+    ),
+    'metadata': (
+        'EPOCH', 'ZeroAnnotationsError', 'MultipleAnnotationsError',
+        'datetime_to_timestamp', 'timestamp_to_datetime', 'now_timestamp',
+        'get_index_of_tool', 'get_annotation_field', 'filter_annotations',
+        'filter_annotations_json', 'filter_unnone', 'tool_to_filter',
+    ),
+    'net': (
+        'find_port',
+    ),
+    'redis_io': (
+        'read_communication_from_redis_key', 'RedisReader',
+        'RedisCommunicationReader', 'write_communication_to_redis_key',
+        'RedisWriter', 'RedisCommunicationWriter',
+    ),
+    'references': (
+        'REFERENCE_ATTRIBUTES', 'ReferenceIndex',
+        'add_references_to_communication',
+    ),
+    'results_wrapper': (
+        'HTTPResultsServerClientWrapper', 'ResultsServerClientWrapper',
+        'ResultsServerServiceWrapper', 'SubprocessResultsServerServiceWrapper',
+    ),
+    'search_wrapper': (
+        'HTTPSearchClientWrapper', 'SearchClientWrapper',
+        'SearchServiceWrapper', 'SubprocessSearchServiceWrapper',
+        'SearchProxyClientWrapper', 'SearchProxyServiceWrapper',
+        'SubprocessSearchProxyServiceWrapper', 'FeedbackClientWrapper',
+        'FeedbackServiceWrapper', 'SubprocessFeedbackServiceWrapper',
+    ),
+    'service_wrapper': (
+        'ConcreteServiceClientWrapper', 'ConcreteServiceWrapper',
+        'HTTPConcreteServiceClientWrapper', 'SubprocessConcreteServiceWrapper',
+    ),
+    'simple_comm': (
+        'AL_NONE', 'AL_SECTION', 'AL_SENTENCE', 'AL_TOKEN',
+        'add_annotation_level_argparse_argument', 'create_sentence',
+        'create_section', 'create_comm', 'create_simple_comm',
+        'SimpleCommTempFile',
+    ),
+    'summarization_wrapper': (
+        'SummarizationClientWrapper', 'HTTPSummarizationClientWrapper',
+        'SummarizationServiceWrapper', 'SubprocessSummarizationServiceWrapper',
+    ),
+    'thrift_factory': (
+        'ThriftFactory', 'factory', 'is_accelerated',
+    ),
+    'tokenization': (
+        'NoSuchTokenTagging', 'get_tokens', 'get_token_taggings',
+        'get_tagged_tokens', 'get_lemmas', 'get_pos', 'get_ner', 'plus',
+        'flatten', 'get_comm_tokens', 'get_comm_tokenizations',
+        'compute_lattice_expected_counts',
+        'batch_compute_lattice_expected_counts', 'get_tokenizations', 'NO_ID',
+        'Vocabulary', 'TokenArrays', 'get_corpus_token_arrays',
+        'get_comm_token_arrays',
+    ),
+    'twitter': (
+        'TOOL_NAME', 'TWEET_TYPE', 'ISO_LANGS', 'CREATED_AT_FORMAT',
+        'json_tweet_object_to_Communication', 'snake_case_to_camelcase',
+        'json_tweet_object_to_TweetInfo', 'json_tweet_string_to_Communication',
+        'json_tweet_string_to_TweetInfo', 'capture_tweet_lid',
+        'twitter_lid_to_iso639_3',
+    ),
+    'unnone': (
+        'lun', 'dun', 'sun',
+    ),
+}
+
+# Submodules, in the order they used to be star-imported
+_SUBMODULES = tuple(sorted(_SUBMODULE_ATTRIBUTES))
+
+_SUBMODULE_FOR_ATTRIBUTE = dict(
+    (attr_name, submodule_name)
+    for (submodule_name, attr_names) in _SUBMODULE_ATTRIBUTES.items()
+    for attr_name in attr_names
+)
+
+
+def _import_submodule(submodule_name):
+    return importlib.import_module('%s.%s' % (__name__, submodule_name))
+
+
+def _public_names(module):
+    return [name for name in vars(module) if not name.startswith('_')]
+
+
+def __getattr__(name):
+    if name == '__all__':
+        # from concrete.util import *
+        names = []
+        for submodule_name in _SUBMODULES:
+            names.extend(_public_names(_import_submodule(submodule_name)))
+        # ... and the submodules, which are now attributes too
+        names.extend(
+            name for (name, value) in globals().items()
+            if isinstance(value, types.ModuleType) and
+            value.__name__.startswith(__name__ + '.'))
+        return list(dict.fromkeys(names))
+
+    if name in _SUBMODULE_ATTRIBUTES:
+        return _import_submodule(name)
+
+    if name in _SUBMODULE_FOR_ATTRIBUTE:
+        value = getattr(_import_submodule(_SUBMODULE_FOR_ATTRIBUTE[name]), name)
+        globals()[name] = value
+        return value
+
+    if not name.startswith('_'):
+        # Look in the submodules that are already loaded first, then
+        # import the others; later submodules take precedence, as
+        # with star imports
+        loaded = []
+        unloaded = []
+        for submodule_name in reversed(_SUBMODULES):
+            if '%s.%s' % (__name__, submodule_name) in sys.modules:
+                loaded.append(submodule_name)
+            else:
+                unloaded.append(submodule_name)
+        for submodule_name in loaded + unloaded:
+            module = _import_submodule(submodule_name)
+            if name in vars(module):
+                value = vars(module)[name]
+                globals()[name] = value
+                return value
+
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__getattr__('__all__')))
@@ -28,6 +28,8 @@ class CommunicationContainerFetchHandler(object):
     - :class:`.FetchBackedCommunicationContainer`
     - :class:`.MemoryBackedCommunicationContainer`
     - :class:`.RedisHashBackedCommunicationContainer`
+    - :class:`.StreamBackedCommunicationContainer`
+    - :class:`.BlockGzipCommunicationContainer`
     - :class:`.ZipFileBackedCommunicationContainer`
     - :class:`.S3BackedCommunicationContainer`
 
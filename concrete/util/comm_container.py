@@ -14,6 +14,7 @@ import collections
 import gzip
 import logging
 import os
+import threading
 import zipfile
 
 import humanfriendly
@@ -24,8 +25,12 @@ from .access import (
 )
 from .access_wrapper import FetchCommunicationClientWrapper
 from .file_io import (
+    BlockGzipCommunicationReader,
     CommunicationReader,
-    read_communication_from_file)
+    STREAM_INDEX_SUFFIX,
+    build_stream_index,
+    read_communication_from_file,
+    read_stream_index)
 from .mem_io import read_communication_from_buffer
 
 
@@ -64,6 +69,8 @@ class DirectoryBackedCommunicationContainer(collections.abc.Mapping):
              add_references (bool): If True, calls
                :func:`concrete.util.references.add_references_to_communication`
                on any retrieved :class:`.Communication`
+               (if `'lazy'`, adds the references on first use; if `'weak'`,
+                makes backpointers weak references)
         """
         self._add_references = add_references
 
@@ -166,7 +173,7 @@ class MemoryBackedCommunicationContainer(collections.abc.Mapping):
     """
 
     def __init__(self, communications_file, max_file_size=1073741824,
-                 add_references=True):
+                 add_references=True, slots=False):
         """
         Args:
             communications_file (str): String specifying name of Communications file
@@ -174,6 +181,11 @@ class MemoryBackedCommunicationContainer(collections.abc.Mapping):
             add_references (bool): If True, calls
                :func:`concrete.util.references.add_references_to_communication`
                on any retrieved :class:`.Communication`
+               (if `'lazy'`, adds the references on first use; if `'weak'`,
+                makes backpointers weak references)
+            slots (bool): If True, hold compact `__slots__`-based
+               Communications (see :mod:`concrete.util.slots`), which
+               use less memory
         """
         self._add_references = add_references
         self.comm_id_to_comm = {}
@@ -194,7 +206,8 @@ class MemoryBackedCommunicationContainer(collections.abc.Mapping):
                      communications_file)
         logging.debug("Communication IDs:")
         for (comm, _) in CommunicationReader(communications_file,
-                                             add_references=self._add_references):
+                                             add_references=self._add_references,
+                                             slots=slots):
             self.comm_id_to_comm[comm.id] = comm
             logging.debug("  %s" % comm.id)
         logging.info("Finished reading communications.\n")
@@ -227,6 +240,8 @@ class ZipFileBackedCommunicationContainer(collections.abc.Mapping):
             add_references (bool): If True, calls
                :func:`concrete.util.references.add_references_to_communication`
                on any retrieved :class:`.Communication`
+               (if `'lazy'`, adds the references on first use; if `'weak'`,
+                makes backpointers weak references)
         """
         self._add_references = add_references
 
@@ -254,6 +269,116 @@ class ZipFileBackedCommunicationContainer(collections.abc.Mapping):
         return len(self.comm_id_to_filename)
 
 
+class StreamBackedCommunicationContainer(collections.abc.Mapping):
+    """Maps Comm IDs to Comms, retrieving Comms from a concatenated
+    (uncompressed) stream file using a sidecar offset index
+
+    `StreamBackedCommunicationContainer` instances behave as dict-like
+    data structures that map Communication IDs to Communications.
+    Communications are lazily retrieved from the stream by seeking to
+    the offset recorded in the index (see
+    :func:`concrete.util.file_io.build_stream_index`) and decoding
+    only the requested Communication.
+    """
+
+    def __init__(self, stream_path, index_path=None, add_references=True):
+        """
+        Args:
+            stream_path (str): Path to uncompressed file of concatenated
+                Communications
+            index_path (str): Path to index file; defaults to
+                `stream_path` with `STREAM_INDEX_SUFFIX` appended.  The
+                index is built if it does not exist.
+            add_references (bool): If True, calls
+               :func:`concrete.util.references.add_references_to_communication`
+               on any retrieved :class:`.Communication`
+               (if `'lazy'`, adds the references on first use; if `'weak'`,
+                makes backpointers weak references)
+        """
+        self._add_references = add_references
+
+        if index_path is None:
+            index_path = stream_path + STREAM_INDEX_SUFFIX
+        if not os.path.exists(index_path):
+            logging.info("Building index '%s' of stream '%s'" %
+                         (index_path, stream_path))
+            build_stream_index(stream_path, index_path)
+
+        self.comm_id_to_extent = dict(
+            (comm_id, (offset, length))
+            for (comm_id, offset, length) in read_stream_index(index_path))
+        self.stream_file = open(stream_path, 'rb')
+        # lookups may come from several threads (e.g. a threaded fetch
+        # server), and share the position of stream_file
+        self._stream_lock = threading.Lock()
+
+    def close(self):
+        '''
+        Close stream file.
+        '''
+        self.stream_file.close()
+
+    def __getitem__(self, communication_id):
+        (offset, length) = self.comm_id_to_extent[communication_id]
+        with self._stream_lock:
+            self.stream_file.seek(offset)
+            buf = self.stream_file.read(length)
+        comm = read_communication_from_buffer(buf,
+                                              add_references=self._add_references)
+        return comm
+
+    def __iter__(self):
+        return self.comm_id_to_extent.__iter__()
+
+    def __len__(self):
+        return len(self.comm_id_to_extent)
+
+
+class BlockGzipCommunicationContainer(collections.abc.Mapping):
+    """Maps Comm IDs to Comms, retrieving Comms from a block-compressed
+    gzip stream using its block index
+
+    `BlockGzipCommunicationContainer` instances behave as dict-like
+    data structures that map Communication IDs to Communications.
+    Communications are lazily retrieved from the stream (see
+    :class:`concrete.util.file_io.BlockGzipCommunicationWriter`) by
+    seeking to and decompressing only the block that contains the
+    requested Communication.
+    """
+
+    def __init__(self, stream_path, index_path=None, add_references=True):
+        """
+        Args:
+            stream_path (str): Path to block-compressed gzip file of
+                Communications
+            index_path (str): Path to block index; defaults to
+                `stream_path` with `BLOCK_GZIP_INDEX_SUFFIX` appended
+            add_references (bool): If True, calls
+               :func:`concrete.util.references.add_references_to_communication`
+               on any retrieved :class:`.Communication`
+               (if `'lazy'`, adds the references on first use; if `'weak'`,
+                makes backpointers weak references)
+        """
+        self.reader = BlockGzipCommunicationReader(
+            stream_path, index_filename=index_path,
+            add_references=add_references)
+
+    def close(self):
+        '''
+        Close stream file.
+        '''
+        self.reader.close()
+
+    def __getitem__(self, communication_id):
+        return self.reader.read(communication_id)
+
+    def __iter__(self):
+        return self.reader.comm_id_to_entry.__iter__()
+
+    def __len__(self):
+        return len(self.reader.comm_id_to_entry)
+
+
 class RedisHashBackedCommunicationContainer(collections.abc.Mapping):
     """
     Provides access to Communications stored in a Redis hash,
@@ -272,6 +397,8 @@ class RedisHashBackedCommunicationContainer(collections.abc.Mapping):
             add_references (bool): If True, calls
                :func:`concrete.util.references.add_references_to_communication`
                on any retrieved :class:`.Communication`
+               (if `'lazy'`, adds the references on first use; if `'weak'`,
+                makes backpointers weak references)
         """
         self._add_references = add_references
 
@@ -329,6 +456,8 @@ class S3BackedCommunicationContainer(collections.abc.Mapping):
             add_references (bool): If True, calls
                :func:`concrete.util.references.add_references_to_communication`
                on any retrieved :class:`.Communication`
+               (if `'lazy'`, adds the references on first use; if `'weak'`,
+                makes backpointers weak references)
         """
         self._add_references = add_references
         self.bucket = bucket
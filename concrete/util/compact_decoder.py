@@ -0,0 +1,491 @@
+"""Pure-Python compact protocol decoder specialized to Thrift types
+
+When the Thrift C extension is not available, the compact protocol
+falls back to a generic pure-Python implementation that looks up the
+`thrift_spec` of every field it reads and makes several method calls
+per value, which is many times slower than the extension.
+
+This module generates, from the `thrift_spec` of each Thrift type, a
+Python function that reads that type straight-line from the bytes of
+a transport's buffer: type checks, varint decoding and string
+decoding are inlined for each field.  :class:`SpecializedCompactProtocol`
+plugs these functions in where the C extension's decoder would go, so
+generated `read` methods (and the helpers in :mod:`concrete.util.mem_io`
+and :mod:`concrete.util.file_io`) use them with no further changes.
+Encoding is done by the generic pure-Python protocol.
+"""
+from __future__ import unicode_literals
+
+import struct
+import sys
+import threading
+
+from thrift.protocol.TCompactProtocol import (
+    TCompactProtocol, TCompactProtocolFactory,
+)
+from thrift.protocol.TProtocol import TProtocolException
+from thrift.Thrift import TType
+from thrift.transport.TTransport import (
+    CReadableTransport, TTransportException,
+)
+
+
+# Compact protocol type codes
+_CT_STOP = 0
+_CT_BOOLEAN_TRUE = 1
+_CT_BOOLEAN_FALSE = 2
+_CT_BYTE = 3
+_CT_I16 = 4
+_CT_I32 = 5
+_CT_I64 = 6
+_CT_DOUBLE = 7
+_CT_BINARY = 8
+_CT_LIST = 9
+_CT_SET = 10
+_CT_MAP = 11
+_CT_STRUCT = 12
+
+_COMPACT_TYPES = {
+    TType.BOOL: _CT_BOOLEAN_TRUE,
+    TType.BYTE: _CT_BYTE,
+    TType.I16: _CT_I16,
+    TType.I32: _CT_I32,
+    TType.I64: _CT_I64,
+    TType.DOUBLE: _CT_DOUBLE,
+    TType.STRING: _CT_BINARY,
+    TType.LIST: _CT_LIST,
+    TType.SET: _CT_SET,
+    TType.MAP: _CT_MAP,
+    TType.STRUCT: _CT_STRUCT,
+}
+
+_DOUBLE = struct.Struct('<d')
+
+
+class _Underrun(IndexError):
+    '''
+    Raised when a value extends past the end of the data being
+    decoded; `end` is the position the data must extend to.
+    '''
+
+    def __init__(self, end):
+        IndexError.__init__(self, end)
+        self.end = end
+
+
+def _size_limit_exceeded(limit):
+    # same exception as TProtocolBase._check_length
+    raise TTransportException(TTransportException.SIZE_LIMIT,
+                              'Length exceeded max allowed: %d' % limit)
+
+
+def _read_varint(data, pos, value):
+    '''
+    Finish reading varint whose first byte, `value`, had its
+    continuation bit set; return `(value, pos)`.
+    '''
+    value &= 0x7f
+    shift = 7
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return (value, pos)
+        shift += 7
+
+
+def _read_size(data, pos):
+    size = data[pos]
+    pos += 1
+    if size > 0x7f:
+        (size, pos) = _read_varint(data, pos, size)
+    return (size, pos)
+
+
+def _skip(data, pos, compact_type):
+    '''
+    Skip over value of given compact type; return position after it.
+    '''
+    if compact_type in (_CT_BOOLEAN_TRUE, _CT_BOOLEAN_FALSE):
+        return pos
+    elif compact_type == _CT_BYTE:
+        data[pos]
+        return pos + 1
+    elif compact_type in (_CT_I16, _CT_I32, _CT_I64):
+        return _read_size(data, pos)[1]
+    elif compact_type == _CT_DOUBLE:
+        pos += 8
+    elif compact_type == _CT_BINARY:
+        (size, pos) = _read_size(data, pos)
+        pos += size
+    elif compact_type in (_CT_LIST, _CT_SET):
+        header = data[pos]
+        pos += 1
+        size = header >> 4
+        if size == 15:
+            (size, pos) = _read_size(data, pos)
+        elem_type = header & 0x0f
+        for _ in range(size):
+            pos = _skip_element(data, pos, elem_type)
+    elif compact_type == _CT_MAP:
+        (size, pos) = _read_size(data, pos)
+        if size:
+            types = data[pos]
+            pos += 1
+            for _ in range(size):
+                pos = _skip_element(data, pos, types >> 4)
+                pos = _skip_element(data, pos, types & 0x0f)
+    elif compact_type == _CT_STRUCT:
+        while True:
+            header = data[pos]
+            pos += 1
+            if header == _CT_STOP:
+                break
+            if not header >> 4:
+                pos = _read_size(data, pos)[1]
+            pos = _skip(data, pos, header & 0x0f)
+    else:
+        raise TProtocolException(TProtocolException.INVALID_DATA,
+                                 'unknown compact type %d' % compact_type)
+    if pos > len(data):
+        raise _Underrun(pos)
+    return pos
+
+
+def _skip_element(data, pos, compact_type):
+    if compact_type in (_CT_BOOLEAN_TRUE, _CT_BOOLEAN_FALSE):
+        # booleans in containers take one byte
+        data[pos]
+        return pos + 1
+    return _skip(data, pos, compact_type)
+
+
+class _Generator(object):
+    '''
+    Source code generator for the reader of a single struct type.
+    '''
+
+    def __init__(self):
+        self.lines = []
+        self.num_vars = 0
+
+    def var(self, prefix):
+        self.num_vars += 1
+        return '%s%d' % (prefix, self.num_vars)
+
+    def emit(self, indent, line):
+        self.lines.append('    ' * indent + line)
+
+    def emit_varint(self, indent, target):
+        self.emit(indent, '%s = d[p]' % target)
+        self.emit(indent, 'p += 1')
+        self.emit(indent, 'if %s > 127:' % target)
+        self.emit(indent + 1, '(%s, p) = _read_varint(d, p, %s)' %
+                  (target, target))
+
+    def emit_value(self, indent, ttype, type_args, target):
+        '''
+        Emit code reading value of type `ttype` (with `type_args`, as
+        in a `thrift_spec`) at position `p` of `d` into `target`.
+        '''
+        if ttype == TType.BYTE:
+            self.emit(indent, '%s = d[p]' % target)
+            self.emit(indent, 'p += 1')
+            self.emit(indent, 'if %s > 127:' % target)
+            self.emit(indent + 1, '%s -= 256' % target)
+        elif ttype in (TType.I16, TType.I32, TType.I64):
+            self.emit_varint(indent, target)
+            self.emit(indent, '%s = (%s >> 1) ^ -(%s & 1)' %
+                      (target, target, target))
+        elif ttype == TType.DOUBLE:
+            self.emit(indent, 'if p + 8 > size:')
+            self.emit(indent + 1, 'raise _Underrun(p + 8)')
+            self.emit(indent, '(%s,) = _unpack_double(d, p)' % target)
+            self.emit(indent, 'p += 8')
+        elif ttype == TType.STRING:
+            end = self.var('q')
+            self.emit_varint(indent, end)
+            self.emit(indent, 'if %s > sl:' % end)
+            self.emit(indent + 1, '_size_limit_exceeded(sl)')
+            self.emit(indent, '%s += p' % end)
+            self.emit(indent, 'if %s > size:' % end)
+            self.emit(indent + 1, 'raise _Underrun(%s)' % end)
+            if type_args == 'BINARY':
+                self.emit(indent, '%s = bytes(d[p:%s])' % (target, end))
+            else:
+                self.emit(indent, "%s = str(d[p:%s], 'utf-8')" %
+                          (target, end))
+            self.emit(indent, 'p = %s' % end)
+        elif ttype == TType.STRUCT:
+            (thrift_type, thrift_spec) = type_args[:2]
+            if thrift_spec is None:
+                thrift_spec = thrift_type.thrift_spec
+            (reader_name, type_name) = _reader_names(thrift_type, thrift_spec)
+            kwargs = self.var('k')
+            self.emit(indent, '(%s, p) = %s(d, p, sl, cl)' %
+                      (kwargs, reader_name))
+            self.emit(indent, '%s = %s(**%s)' % (target, type_name, kwargs))
+        elif ttype in (TType.LIST, TType.SET):
+            (elem_ttype, elem_args) = type_args[:2]
+            (size, header, elem) = (
+                self.var('n'), self.var('h'), self.var('e'))
+            self.emit(indent, '%s = d[p]' % header)
+            self.emit(indent, 'p += 1')
+            self.emit(indent, '%s = %s >> 4' % (size, header))
+            self.emit(indent, 'if %s == 15:' % size)
+            self.emit_varint(indent + 1, size)
+            self.emit(indent, 'if %s > cl:' % size)
+            self.emit(indent + 1, '_size_limit_exceeded(cl)')
+            self.emit(indent, 'if (%s & 15) in %r:' %
+                      (header, _element_types(elem_ttype)))
+            self.emit(indent + 1, '%s = %s' %
+                      (target, '[]' if ttype == TType.LIST else 'set()'))
+            self.emit(indent + 1, 'for _ in range(%s):' % size)
+            self.emit_element(indent + 2, elem_ttype, elem_args, elem)
+            self.emit(indent + 2, '%s.%s(%s)' % (
+                target, 'append' if ttype == TType.LIST else 'add', elem))
+            self.emit(indent, 'else:')
+            self.emit(indent + 1, 'for _ in range(%s):' % size)
+            self.emit(indent + 2, 'p = _skip_element(d, p, %s & 15)' % header)
+            self.emit(indent + 1, '%s = None' % target)
+        elif ttype == TType.MAP:
+            (key_ttype, key_args, val_ttype, val_args) = type_args[:4]
+            (size, types, key, val) = (
+                self.var('n'), self.var('t'), self.var('e'), self.var('e'))
+            self.emit_varint(indent, size)
+            self.emit(indent, 'if %s > cl:' % size)
+            self.emit(indent + 1, '_size_limit_exceeded(cl)')
+            self.emit(indent, '%s = {}' % target)
+            self.emit(indent, 'if %s:' % size)
+            self.emit(indent + 1, '%s = d[p]' % types)
+            self.emit(indent + 1, 'p += 1')
+            self.emit(indent + 1, 'if (%s >> 4) in %r and (%s & 15) in %r:' %
+                      (types, _element_types(key_ttype),
+                       types, _element_types(val_ttype)))
+            self.emit(indent + 2, 'for _ in range(%s):' % size)
+            self.emit_element(indent + 3, key_ttype, key_args, key)
+            self.emit_element(indent + 3, val_ttype, val_args, val)
+            self.emit(indent + 3, '%s[%s] = %s' % (target, key, val))
+            self.emit(indent + 1, 'else:')
+            self.emit(indent + 2, 'for _ in range(%s):' % size)
+            self.emit(indent + 3, 'p = _skip_element(d, p, %s >> 4)' % types)
+            self.emit(indent + 3, 'p = _skip_element(d, p, %s & 15)' % types)
+            self.emit(indent + 2, '%s = None' % target)
+        else:
+            raise TProtocolException(TProtocolException.INVALID_DATA,
+                                     'unsupported Thrift type %d' % ttype)
+
+    def emit_element(self, indent, ttype, type_args, target):
+        if ttype == TType.BOOL:
+            # booleans in containers take one byte
+            self.emit(indent, '%s = d[p] == 1' % target)
+            self.emit(indent, 'p += 1')
+        else:
+            self.emit_value(indent, ttype, type_args, target)
+
+    def generate(self, reader_name, thrift_spec):
+        '''
+        Return source code of function named `reader_name` reading a
+        struct with the given spec and returning `(kwargs, pos)`.
+        The function also takes the string and container length
+        limits (checked for the values it decodes, not those it skips).
+        '''
+        self.emit(0, 'def %s(d, p, sl, cl):' % reader_name)
+        self.emit(1, 'size = len(d)')
+        self.emit(1, 'kw = {}')
+        self.emit(1, 'fid = 0')
+        self.emit(1, 'while True:')
+        self.emit(2, 'b = d[p]')
+        self.emit(2, 'p += 1')
+        self.emit(2, 'if b == 0:')
+        self.emit(3, 'return (kw, p)')
+        self.emit(2, 'if b >> 4:')
+        self.emit(3, 'fid += b >> 4')
+        self.emit(2, 'else:')
+        self.emit_varint(3, 'fid')
+        self.emit(3, 'fid = (fid >> 1) ^ -(fid & 1)')
+        self.emit(2, 'ct = b & 15')
+        keyword = 'if'
+        for s in thrift_spec:
+            if s is None:
+                continue
+            (fid, ttype, name, type_args) = s[:4]
+            self.emit(2, '%s fid == %d:' % (keyword, fid))
+            keyword = 'elif'
+            if ttype == TType.BOOL:
+                self.emit(3, 'if ct == 1 or ct == 2:')
+                self.emit(4, 'kw[%r] = ct == 1' % name)
+                self.emit(4, 'continue')
+            else:
+                self.emit(3, 'if ct == %d:' % _COMPACT_TYPES[ttype])
+                value = self.var('v')
+                self.emit_value(4, ttype, type_args, value)
+                self.emit(4, 'kw[%r] = %s' % (name, value))
+                self.emit(4, 'continue')
+        self.emit(2, 'p = _skip(d, p, ct)')
+        return '\n'.join(self.lines) + '\n'
+
+
+def _element_types(ttype):
+    '''
+    Return tuple of compact types of container elements of `ttype`.
+    '''
+    if ttype == TType.BOOL:
+        return (_CT_BOOLEAN_TRUE, _CT_BOOLEAN_FALSE)
+    return (_COMPACT_TYPES[ttype],)
+
+
+# Namespace in which readers are generated; also maps reader keys
+# (see _reader_names) to `(reader name, type name)` tuples
+_NAMESPACE = dict(
+    _Underrun=_Underrun,
+    _size_limit_exceeded=_size_limit_exceeded,
+    _read_varint=_read_varint,
+    _skip=_skip,
+    _skip_element=_skip_element,
+    _unpack_double=_DOUBLE.unpack_from,
+)
+_READER_NAMES = {}
+_READERS_LOCK = threading.RLock()
+
+
+def _reader_key(thrift_type, thrift_spec):
+    # Projected specs (see concrete.util.mem_io.projected_thrift_spec)
+    # are new tuples, but share their field specs with the type's
+    # spec, so they are identified by the type_args objects they use
+    return (thrift_type, tuple(
+        None if s is None else (s[0], s[1], s[2], id(s[3]))
+        for s in thrift_spec
+    ))
+
+
+def _reader_names(thrift_type, thrift_spec):
+    '''
+    Return names of reader function and Thrift type in the generated
+    code namespace for `thrift_type` with `thrift_spec`, generating
+    the reader (and those of the types it contains) if needed.
+    '''
+    key = _reader_key(thrift_type, thrift_spec)
+    names = _READER_NAMES.get(key)
+    if names is None:
+        with _READERS_LOCK:
+            names = _READER_NAMES.get(key)
+            if names is None:
+                number = len(_READER_NAMES)
+                names = ('_read_%s_%d' % (thrift_type.__name__, number),
+                         '_%s_%d' % (thrift_type.__name__, number))
+                # register names first, as types may be recursive
+                _READER_NAMES[key] = names
+                _NAMESPACE[names[1]] = thrift_type
+                # keep spec alive, as its type_args ids are in the key
+                _NAMESPACE[names[1] + '_spec'] = thrift_spec
+                source = _Generator().generate(
+                    names[0], thrift_spec)
+                exec(compile(source, '<%s>' % names[0], 'exec'),
+                     _NAMESPACE)
+    return names
+
+
+def reader_source(thrift_type, thrift_spec=None):
+    '''
+    Return the generated source code of the reader function for
+    `thrift_type` (for debugging).
+
+    Args:
+        thrift_type: Thrift struct type
+        thrift_spec (tuple): spec to read with; defaults to
+            `thrift_type.thrift_spec`
+
+    Returns:
+        str: Python source code of reader function
+    '''
+    if thrift_spec is None:
+        thrift_spec = thrift_type.thrift_spec
+    (reader_name, _) = _reader_names(thrift_type, thrift_spec)
+    return _Generator().generate(reader_name, thrift_spec)
+
+
+def specialized_decode(thrift_obj, protocol, type_args):
+    '''
+    Decode struct from the buffer of `protocol`'s transport (which
+    must be a `CReadableTransport`) using the reader generated for
+    its type.  Drop-in replacement for the `_fast_decode` method of
+    the accelerated protocols.
+
+    Args:
+        thrift_obj: Thrift object to set fields of, or None to create
+            and return a new object
+        protocol: Thrift protocol
+        type_args: `[thrift_type, thrift_spec]` list
+
+    Returns:
+        `thrift_obj` (or new object if it was None)
+
+    Raises:
+        EOFError: if the transport ends in the middle of the struct
+        TTransportException: if a string or container that is decoded
+            is longer than the `string_length_limit` or
+            `container_length_limit` of `protocol` (values of unknown
+            fields are skipped without being checked)
+    '''
+    (thrift_type, thrift_spec) = type_args
+    (reader_name, _) = _reader_names(thrift_type, thrift_spec)
+    reader = _NAMESPACE[reader_name]
+    string_limit = getattr(protocol, 'string_length_limit', None)
+    if string_limit is None:
+        string_limit = sys.maxsize
+    container_limit = getattr(protocol, 'container_length_limit', None)
+    if container_limit is None:
+        container_limit = sys.maxsize
+    trans = protocol.trans
+    buf = trans.cstringio_buf
+    while True:
+        start = buf.tell()
+        with buf.getbuffer() as data:
+            try:
+                (kwargs, end) = reader(data, start, string_limit,
+                                       container_limit)
+                break
+            except _Underrun as ex:
+                needed = ex.end - start
+            except IndexError:
+                needed = len(data) + 1 - start
+            partial = bytes(data[start:])
+        # Ask for (at least) as many bytes as are known to be needed,
+        # raising EOFError at the end of the transport, and start
+        # over.  (Asking for more could fail at the end of the
+        # transport even though the struct is complete.)
+        buf.seek(0, 2)
+        buf = trans.cstringio_refill(partial, needed)
+    buf.seek(end)
+    if thrift_obj is None:
+        return thrift_type(**kwargs)
+    for (name, value) in kwargs.items():
+        setattr(thrift_obj, name, value)
+    return thrift_obj
+
+
+class SpecializedCompactProtocol(TCompactProtocol):
+    '''
+    Pure-Python compact protocol that decodes structs read from
+    `CReadableTransport` transports (memory buffers, framed and
+    buffered transports, and the stream transports of
+    :mod:`concrete.util.file_io`) with readers generated for their
+    types (see module documentation).
+    '''
+
+    def __init__(self, trans, *args, **kwargs):
+        TCompactProtocol.__init__(self, trans, *args, **kwargs)
+        if isinstance(trans, CReadableTransport):
+            self._fast_decode = specialized_decode
+
+
+class SpecializedCompactProtocolFactory(TCompactProtocolFactory):
+    '''
+    Factory of :class:`SpecializedCompactProtocol` objects.
+    '''
+
+    def getProtocol(self, trans):
+        return SpecializedCompactProtocol(
+            trans, self.string_length_limit, self.container_length_limit)
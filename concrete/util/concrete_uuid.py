@@ -13,16 +13,11 @@ from thrift.Thrift import TType
 from ..uuid.ttypes import UUID
 from ..metadata.ttypes import AnnotationMetadata
 from .mem_io import communication_deep_copy
+from .references import REFERENCE_ATTRIBUTES
 
-from inspect import isroutine
 import random
 import logging
 
-try:
-    unicode
-except NameError:
-    unicode = str
-
 
 def generate_UUID():
     """Return a Concrete UUID object with a random UUID4 value.
@@ -180,6 +175,13 @@ def generate_uuid_unif():
                      generate_hex_unif(12))
 
 
+def _uuid(uuid_string):
+    # Faster equivalent of UUID(uuidString=uuid_string)
+    u = UUID.__new__(UUID)
+    u.uuidString = uuid_string
+    return u
+
+
 class _AnalyticUUIDGenerator(object):
     """
     Compressible UUID generator for a given analytic in a given
@@ -190,6 +192,10 @@ class _AnalyticUUIDGenerator(object):
     characters of the UUID and wraps around (those twelve characters
     only) when the end is reached.  The first four segments of the
     generated UUID are constant.
+
+    UUIDs can be generated one at a time (by iterating over the
+    generator) or in bulk (see :meth:`take` and :meth:`fill`), which
+    is several times faster per UUID.
     """
 
     def __init__(self, u):
@@ -203,6 +209,11 @@ class _AnalyticUUIDGenerator(object):
         self._z = hex_to_bin(generate_hex_unif(len(zs)))
         self._z_len = len(zs)
         self._z_bound = 2**(4 * len(zs))
+        # format string of UUID strings, taking the integer value of
+        # the last segment
+        self._uuid_format = '%s-%%0%dx' % (
+            join_uuid(self._xs, self._ys, zs).rsplit('-', 1)[0],
+            self._z_len)
         self.n = 0
 
     def __iter__(self):
@@ -218,9 +229,7 @@ class _AnalyticUUIDGenerator(object):
         """
         self._z = (self._z + 1) % self._z_bound
         self.n += 1
-        return UUID(uuidString=join_uuid(
-            self._xs, self._ys, bin_to_hex(self._z, self._z_len)
-        ))
+        return _uuid(self._uuid_format % self._z)
 
     def next(self):
         """
@@ -232,6 +241,51 @@ class _AnalyticUUIDGenerator(object):
         """
         return self.__next__()
 
+    def _uuid_strings(self, n):
+        if n < 0:
+            raise ValueError('cannot generate %d UUIDs' % n)
+        start = self._z + 1
+        stop = start + n
+        self._z = (stop - 1) % self._z_bound
+        self.n += n
+        uuid_format = self._uuid_format
+        if stop <= self._z_bound:
+            return [uuid_format % z for z in range(start, stop)]
+        else:
+            z_bound = self._z_bound
+            return [uuid_format % (z % z_bound) for z in range(start, stop)]
+
+    def take(self, n):
+        """
+        Generate and return the next `n` concrete :class:`.UUID`
+        objects in the sequence, as `n` calls of `next` would.
+
+        Args:
+            n (int): number of UUIDs to generate
+
+        Returns:
+            list of `n` concrete :class:`.UUID` objects
+
+        Raises:
+            ValueError: if `n` is negative
+        """
+        return [_uuid(u) for u in self._uuid_strings(n)]
+
+    def fill(self, objs):
+        """
+        Set the `uuid` field of each of a sequence of objects (e.g.
+        the :class:`.EntityMention` objects of an
+        :class:`.EntityMentionSet`) to the next concrete :class:`.UUID`
+        in the sequence, in order.
+
+        Args:
+            objs: sequence of Concrete objects with a `uuid` field
+        """
+        if not isinstance(objs, (list, tuple)):
+            objs = list(objs)
+        for (obj, u) in zip(objs, self._uuid_strings(len(objs))):
+            obj.uuid = _uuid(u)
+
 
 class AnalyticUUIDGeneratorFactory(object):
     """
@@ -303,29 +357,14 @@ class AnalyticUUIDGeneratorFactory(object):
         return _AnalyticUUIDGenerator(self.comm_uuid)
 
 
-def _filtered_getmembers(obj):
-    """
-    Generate key-value pairs of object members that may contain UUIDs.
-    Over-generate, but filter the output enough that concrete objects
-    can be traversed recursively using this function without leading to
-    stack overflows or infinite loops.
-    """
-
-    for k in dir(obj):
-        if not (k[0] == '_' or k == 'thrift_spec' or k == 'read' or
-                k == 'write' or k == 'validate'):
-            v = getattr(obj, k)
-            if not (isroutine(v) or
-                    isinstance(v, int) or isinstance(v, float) or
-                    isinstance(v, str) or isinstance(v, unicode)):
-                yield (k, v)
-
-
 _FILTERED_TTYPES = set((TType.STRUCT, TType.LIST, TType.MAP, TType.SET))
 
 
 def _fast_filtered_getmembers(obj):
-    """Fast thrift-specific implementation of filtered_getmembers."""
+    """
+    Generate key-value pairs of the members of a Thrift object that
+    may contain UUIDs (struct and container fields).
+    """
 
     if hasattr(obj, 'thrift_spec'):
         for s in obj.thrift_spec:
@@ -383,7 +422,7 @@ class UUIDClustering(object):
             for (k, v) in obj.items():
                 self._search(v, prefix + (('dict', k),))
         else:
-            for (k, v) in _filtered_getmembers(obj):
+            for (k, v) in _fast_filtered_getmembers(obj):
                 self._search(v, prefix + (k,))
 
     def _add_uuid_field(self, u, f):
@@ -398,6 +437,40 @@ class UUIDClustering(object):
             self._clusters[u] = set([f])
 
 
+def _is_uuid_type(thrift_type):
+    # True for UUID and for variants of it (see concrete.util.slots)
+    return (thrift_type is UUID or
+            getattr(thrift_type, 'thrift_spec', None) == UUID.thrift_spec)
+
+
+def _contains_structs(ttype, type_args):
+    if ttype == TType.STRUCT:
+        return True
+    elif ttype in (TType.LIST, TType.SET):
+        return _contains_structs(type_args[0], type_args[1])
+    elif ttype == TType.MAP:
+        return _contains_structs(type_args[2], type_args[3])
+    else:
+        return False
+
+
+# Map from Thrift struct types to their UUID compression plans:
+# (True if the type has a metadata field,
+#  names of fields that may hold UUIDs, in thrift_spec order)
+_COMPRESSION_PLANS = {}
+
+
+def _compression_plan(thrift_type):
+    plan = (
+        any(s[2] == 'metadata' for s in thrift_type.thrift_spec
+            if s is not None),
+        tuple(s[2] for s in thrift_type.thrift_spec
+              if s is not None and _contains_structs(s[1], s[3])),
+    )
+    _COMPRESSION_PLANS[thrift_type] = plan
+    return plan
+
+
 class UUIDCompressor(object):
     '''
     Interface to replacing a Communication's UUIDs with compressible
@@ -413,7 +486,7 @@ class UUIDCompressor(object):
         '''
         self.single_analytic = single_analytic
 
-    def compress(self, comm):
+    def compress(self, comm, in_place=False):
         """
         Return a copy of a communication whose UUIDs have been
         replaced by compressible UUIDs using
@@ -422,66 +495,63 @@ class UUIDCompressor(object):
         `uuid_map` will contain a dictionary mapping the original
         UUIDs to the new UUIDs.
 
+        The communication is walked once, following its `thrift_spec`
+        (and that of the objects in it): each UUID in a `uuid` field
+        is replaced as it is found, and all other UUIDs (references)
+        are replaced once the walk is complete.  UUID objects are
+        replaced by new ones rather than changed, so UUID objects
+        shared with other Communications (see :func:`intern_uuids`)
+        are left alone.
+
         Args:
             comm (Communication): communication to be copied
                 (the UUIDs of the copy will be made compressible)
+            in_place (bool): True to replace the UUIDs of `comm`
+                itself rather than those of a copy (the `*ForUUID`
+                maps of `comm` are updated if references have been
+                added to it)
 
         Returns:
-            Communication: Deep copy of `comm` with compressed UUIDs
+            Communication: Deep copy of `comm` (or `comm` itself, if
+            `in_place` is True) with compressed UUIDs
         """
 
-        cc = communication_deep_copy(comm)
+        cc = comm if in_place else communication_deep_copy(comm)
         self.augf = AnalyticUUIDGeneratorFactory(cc)
         self.augs = dict()
         self.uuid_map = dict()
-
-        self._compress_uuids(cc)
-        self._compress_uuid_refs(cc)
-
-        return cc
-
-    def _compress_uuids(self, obj, name_is_uuid=False, tool=None):
-        """Generate new UUIDs in "uuid" fields and save mapping"""
-
-        tool = self._get_tool(obj, tool)
-
-        if name_is_uuid:
-            if isinstance(obj, UUID):
-                obj.uuidString = self._gen_uuid(obj, tool)
+        # UUID objects may be shared, within `comm` and beyond it (see
+        # intern_uuids), so they are replaced rather than changed: map
+        # from id of each original UUID object to (that object, its
+        # replacement), so shared objects stay shared
+        self._new_uuids = dict()
+
+        uuid_refs = []
+        self._compress_struct(cc, None, uuid_refs)
+        for (parent, key) in uuid_refs:
+            if isinstance(parent, (list, dict)):
+                parent[key] = self._new_uuid(parent[key])
             else:
-                logging.warning('uuid not instance of UUID')
-
-        if not isinstance(obj, UUID):  # we already took care of "uuid"
-            self._apply(
-                lambda elt, elt_name_is_uuid: self._compress_uuids(
-                    elt, name_is_uuid=elt_name_is_uuid, tool=tool
-                ),
-                obj
-            )
+                setattr(parent, key, self._new_uuid(getattr(parent, key)))
+        self._new_uuids = None
 
-    def _compress_uuid_refs(self, obj, name_is_uuid=False, tool=None):
-        """Update UUID references (not in "uuid" fields) using saved mapping"""
+        if in_place:
+            self._compress_reference_maps(cc)
 
-        tool = self._get_tool(obj, tool)
+        return cc
 
-        if isinstance(obj, UUID):
-            if not name_is_uuid:
-                obj.uuidString = self.uuid_map[obj.uuidString]
-        else:
-            self._apply(
-                lambda elt, elt_name_is_uuid: self._compress_uuid_refs(
-                    elt, name_is_uuid=elt_name_is_uuid, tool=tool
-                ),
-                obj
-            )
-
-    def _get_tool(self, obj, tool=None):
+    def _compress_struct(self, obj, tool, uuid_refs):
         """
-        Return tool for this object, given the parent tool;
-        update self.augs
+        Generate new UUIDs in "uuid" fields of obj and the objects
+        in it, saving the mapping, and collect the locations of UUID
+        references (UUIDs not in "uuid" fields) into uuid_refs as
+        (struct, field name) or (container, index or key) pairs
         """
 
-        if hasattr(obj, 'metadata'):
+        (has_metadata, names) = (_COMPRESSION_PLANS.get(type(obj)) or
+                                 _compression_plan(type(obj)))
+
+        if has_metadata:
             if isinstance(obj.metadata, AnnotationMetadata):
                 tool = obj.metadata.tool
             else:
@@ -490,7 +560,75 @@ class UUIDCompressor(object):
             tool = None
         if tool not in self.augs:
             self.augs[tool] = self.augf.create()
-        return tool
+
+        for name in names:
+            value = getattr(obj, name)
+            if name == 'uuid':
+                if value is not None and _is_uuid_type(type(value)):
+                    setattr(obj, name, self._new_uuid(
+                        value, self._gen_uuid(value, tool)))
+                    continue
+                logging.warning('uuid not instance of UUID')
+            if _is_uuid_type(type(value)):
+                uuid_refs.append((obj, name))
+            else:
+                self._compress_value(value, tool, uuid_refs)
+
+    def _compress_value(self, value, tool, uuid_refs):
+        if value is None:
+            pass
+        elif isinstance(value, list):
+            for (i, elt) in enumerate(value):
+                if _is_uuid_type(type(elt)):
+                    uuid_refs.append((value, i))
+                else:
+                    self._compress_value(elt, tool, uuid_refs)
+        elif isinstance(value, dict):
+            for (key, elt) in value.items():
+                if _is_uuid_type(type(elt)):
+                    uuid_refs.append((value, key))
+                else:
+                    self._compress_value(elt, tool, uuid_refs)
+        elif isinstance(value, set):
+            for elt in value:
+                self._compress_value(elt, tool, uuid_refs)
+        elif hasattr(value, 'thrift_spec'):
+            self._compress_struct(value, tool, uuid_refs)
+
+    def _new_uuid(self, old_uuid, uuid_string=None):
+        """
+        Return the replacement of UUID object old_uuid, creating it
+        (with UUID string uuid_string, or that mapped from old_uuid's
+        by self.uuid_map) if it has not been created yet
+        """
+
+        entry = self._new_uuids.get(id(old_uuid))
+        if entry is None:
+            if uuid_string is None:
+                uuid_string = self.uuid_map[old_uuid.uuidString]
+            # keep old_uuid alive so that its id is not reused
+            entry = (old_uuid, type(old_uuid)(uuidString=uuid_string))
+            self._new_uuids[id(old_uuid)] = entry
+        return entry[1]
+
+    def _compress_reference_maps(self, comm):
+        """
+        Re-key the *ForUUID maps added to comm by
+        add_references_to_communication, if any, using saved mapping
+        """
+
+        uuid_map = self.uuid_map
+        for name in REFERENCE_ATTRIBUTES['Communication']:
+            if not name.endswith('ForUUID'):
+                continue
+            try:
+                # bypass lazy references (which are added on access)
+                obj_for_uuid = object.__getattribute__(comm, name)
+            except AttributeError:
+                continue
+            setattr(comm, name, dict(
+                (uuid_map.get(u, u), obj)
+                for (u, obj) in obj_for_uuid.items()))
 
     def _gen_uuid(self, old_uuid, tool):
         """
@@ -506,28 +644,8 @@ class UUIDCompressor(object):
         self.uuid_map[old_uuid.uuidString] = new_uuid.uuidString
         return new_uuid.uuidString
 
-    @classmethod
-    def _apply(cls, f, x):
-        """
-        Apply f to the members of x if it is a basic container type,
-        otherwise apply f to x directly.
-        """
-
-        if isinstance(x, list):
-            for elt in x:
-                f(elt, False)
-        elif isinstance(x, set):
-            for elt in x:
-                f(elt, False)
-        elif isinstance(x, dict):
-            for elt in x.values():
-                f(elt, False)
-        else:
-            for (k, v) in _fast_filtered_getmembers(x):
-                f(v, k == 'uuid')
-
 
-def compress_uuids(comm, verify=False, single_analytic=False):
+def compress_uuids(comm, verify=False, single_analytic=False, in_place=False):
     """Create a copy of :class:`.Communication` `comm` with UUIDs
     converted according to the compressible UUID scheme
 
@@ -537,10 +655,14 @@ def compress_uuids(comm, verify=False, single_analytic=False):
             UUID link structure is preserved in the new Communication
         single_analytic (bool): If True, use a single analytic prefix
             for all UUIDs in `comm`.
+        in_place (bool): If True, convert the UUIDs of `comm` itself
+            rather than those of a copy of it (see
+            :meth:`UUIDCompressor.compress`).
 
     Returns:
         A 2-tuple containing the new :class:`.Communication`
-        (converted using the compressible UUID scheme) and the
+        (converted using the compressible UUID scheme; `comm` itself
+        if `in_place` is True) and the
         :class:`UUIDCompressor` object used to perform the conversion.
 
     Raises:
@@ -551,15 +673,17 @@ def compress_uuids(comm, verify=False, single_analytic=False):
     if verify and hasattr(comm, 'tokenizationForUUID'):
         raise ValueError('cannot verify communication with references')
 
+    if verify:
+        c1 = UUIDClustering(comm).hashable_clusters()
+
     uc = UUIDCompressor(single_analytic=single_analytic)
 
-    new_comm = uc.compress(comm)
+    new_comm = uc.compress(comm, in_place=in_place)
 
     num_old_uuids = len(set(uc.uuid_map.keys()))
     num_new_uuids = len(set(uc.uuid_map.values()))
 
     if verify:
-        c1 = UUIDClustering(comm).hashable_clusters()
         c2 = UUIDClustering(new_comm).hashable_clusters()
 
         # Verification is c1 == c2;
@@ -583,3 +707,68 @@ def compress_uuids(comm, verify=False, single_analytic=False):
                             % (num_old_uuids, num_new_uuids))
 
     return (new_comm, uc)
+
+
+def intern_uuids(thrift_obj, uuids=None):
+    '''
+    Replace the :class:`.UUID` objects in a Thrift object (e.g. a
+    :class:`.Communication`) by shared instances, so that all UUIDs
+    with the same value (e.g. the `uuid` of a
+    :class:`.Tokenization` and the `tokenizationId` of each of the
+    mentions of its tokens) are a single object holding a single
+    string.
+
+    This saves memory in heavily cross-referenced Communications,
+    and, as the `*ForUUID` maps of
+    :func:`concrete.util.references.add_references_to_communication`
+    are then built and probed with the same string objects, makes
+    adding and following references faster.  Serialization is not
+    affected.  Interned UUIDs should be treated as immutable: to
+    change a UUID, set a new :class:`.UUID` object rather than
+    changing the `uuidString` of an existing one (which would change
+    it everywhere the object is shared).
+
+    Args:
+        thrift_obj: Thrift struct object whose UUIDs are interned
+            (in place)
+        uuids (dict): map from UUID strings to the shared UUID
+            objects to use for them (e.g. returned by a previous
+            call, to share UUIDs across objects); if None, a new map
+            is used
+
+    Returns:
+        dict: `uuids`, updated with the UUIDs found in `thrift_obj`
+    '''
+    if uuids is None:
+        uuids = dict()
+    _intern_struct(thrift_obj, uuids)
+    return uuids
+
+
+def _intern_struct(obj, uuids):
+    (_, names) = (_COMPRESSION_PLANS.get(type(obj)) or
+                  _compression_plan(type(obj)))
+    for name in names:
+        value = getattr(obj, name)
+        if value is not None:
+            shared_value = _intern_value(value, uuids)
+            if shared_value is not value:
+                setattr(obj, name, shared_value)
+
+
+def _intern_value(value, uuids):
+    if isinstance(value, list):
+        for (i, elt) in enumerate(value):
+            shared_elt = _intern_value(elt, uuids)
+            if shared_elt is not elt:
+                value[i] = shared_elt
+    elif isinstance(value, dict):
+        for (key, elt) in value.items():
+            shared_elt = _intern_value(elt, uuids)
+            if shared_elt is not elt:
+                value[key] = shared_elt
+    elif _is_uuid_type(type(value)):
+        return uuids.setdefault(value.uuidString, value)
+    elif hasattr(value, 'thrift_spec'):
+        _intern_struct(value, uuids)
+    return value
@@ -7,21 +7,39 @@ try:
 except ImportError:
     from io import BytesIO
 
-from gzip import open as gzip_open
+from gzip import compress as gzip_compress, open as gzip_open
 import bz2
+from hashlib import md5
+from collections import deque
+from functools import partial
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor,
+    wait as wait_futures
+)
 import mimetypes
+import mmap
+from queue import Full, Queue
 import tarfile
 import zipfile
+import zlib
 
 import os
+import struct
+import threading
 import time
 
-from thrift import TSerialization
+from thrift.Thrift import TType
 from thrift.transport import TTransport
 
 from ..communication.ttypes import Communication
 from ..structure.ttypes import TokenLattice
+from .mem_io import (
+    projected_thrift_spec, read_thrift_from_buffer, read_thrift_from_protocol,
+    write_thrift_to_buffer
+)
+from .concrete_uuid import intern_uuids as _intern_uuids
 from .references import add_references_to_communication
+from .slots import slots_type
 from .thrift_factory import factory
 
 try:
@@ -81,9 +99,7 @@ def read_thrift_from_file(thrift_obj, filename):
     """
     thrift_file = open(filename, "rb")
     thrift_bytes = thrift_file.read()
-    TSerialization.deserialize(
-        thrift_obj, thrift_bytes,
-        protocol_factory=factory.protocolFactory)
+    read_thrift_from_buffer(thrift_obj, thrift_bytes)
     thrift_file.close()
     return thrift_obj
 
@@ -96,13 +112,17 @@ def read_communication_from_file(communication_filename, add_references=True):
         add_references (bool): If True, calls
            :func:`concrete.util.references.add_references_to_communication`
            on :class:`.Communication` read from file
+           (if `'lazy'`, adds the references on first use; if `'weak'`,
+            makes backpointers weak references)
 
     Returns:
         Communication: Communication read from file
     """
     comm = read_thrift_from_file(Communication(), communication_filename)
     if add_references:
-        add_references_to_communication(comm)
+        add_references_to_communication(
+            comm, lazy=(add_references == 'lazy'),
+            weak=(add_references == 'weak'))
     return comm
 
 
@@ -136,9 +156,7 @@ def write_thrift_to_file(thrift_obj, filename):
         thrift_obj: Thrift object to write
         filename (str): path of file to write to
     """
-    thrift_bytes = TSerialization.serialize(
-        thrift_obj,
-        protocol_factory=factory.protocolFactory)
+    thrift_bytes = write_thrift_to_buffer(thrift_obj)
     thrift_file = open(filename, "wb")
     thrift_file.write(thrift_bytes)
     thrift_file.close()
@@ -232,9 +250,463 @@ FileType = _FileTypeClass(
     'zip',
     'tar', 'tar-gz', 'tar-bz2',
     'stream', 'stream-gz', 'stream-bz2',
+    # appended to keep the integer ids of the types above stable
+    'tar-zst', 'tar-lz4',
+    'stream-zst', 'stream-lz4',
 )
 
 
+# Magic numbers of compression formats that Python cannot natively
+# detect, keyed by FileType suffix
+_COMPRESSION_MAGIC = {
+    'zst': b'\x28\xb5\x2f\xfd',
+    'lz4': b'\x04\x22\x4d\x18',
+}
+
+
+# Compressions supported by _open_compressed and the writers
+_COMPRESSIONS = (None, 'gz', 'bz2', 'zst', 'lz4')
+
+
+def _check_compression(compression):
+    if compression not in _COMPRESSIONS:
+        raise ValueError('unknown compression %s' % compression)
+
+
+def _open_compressed(filename, compression, mode='rb', threads=None):
+    '''
+    Open file for binary reading or writing, decompressing or
+    compressing it with the given compression.  Zstandard and LZ4
+    require the optional `zstandard` and `lz4` packages.
+
+    Args:
+        filename (str): path of file to open
+        compression (str): one of `None` (no compression), `'gz'`,
+            `'bz2'`, `'zst'` or `'lz4'`
+        mode (str): `'rb'` or `'wb'`
+        threads (int): if not None, number of threads to compress on
+            (only supported when writing gzip or Zstandard)
+
+    Returns:
+        file object
+
+    Raises:
+        ValueError: if compression is not known
+        ImportError: if the package required for compression is not
+            installed
+    '''
+    if compression is None:
+        return open(filename, mode)
+    elif compression == 'gz':
+        if threads is not None and mode[0] == 'w':
+            return _ParallelGzipFile(filename, threads)
+        return gzip_open(filename, mode)
+    elif compression == 'bz2':
+        return bz2.BZ2File(filename, mode[0])
+    elif compression == 'zst':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('the zstandard package is required to read '
+                              'and write Zstandard-compressed files')
+        f = open(filename, mode)
+        if mode[0] == 'r':
+            return zstandard.ZstdDecompressor().stream_reader(
+                f, read_across_frames=True, closefd=True)
+        else:
+            return zstandard.ZstdCompressor(
+                threads=threads if threads is not None else 0
+            ).stream_writer(f, closefd=True)
+    elif compression == 'lz4':
+        try:
+            import lz4.frame
+        except ImportError:
+            raise ImportError('the lz4 package is required to read and '
+                              'write LZ4-compressed files')
+        return lz4.frame.open(filename, mode)
+    else:
+        raise ValueError('unknown compression %s' % compression)
+
+
+# Size of uncompressed chunks deflated independently by
+# _ParallelGzipFile, and number of chunks per thread in flight.
+PARALLEL_GZIP_CHUNK_SIZE = 1 << 20
+PARALLEL_GZIP_PENDING_CHUNKS_PER_THREAD = 4
+
+
+def _deflate_chunk(data, compresslevel, zdict):
+    '''
+    Return raw deflate stream for `data`, ending in a sync flush (so
+    that it ends on a byte boundary and can be concatenated with the
+    deflate stream of the following chunk).  `zdict` should be the
+    last 32 KiB of the preceding chunk (or empty), which the chunk may
+    refer back to.  Releases the GIL, so chunks can be compressed in
+    parallel on a thread pool.
+    '''
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED,
+                                  -zlib.MAX_WBITS, zdict=zdict)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class _ParallelGzipFile(object):
+    '''
+    Write-only file object that gzip-compresses its input on a pool
+    of threads, deflating chunks of `PARALLEL_GZIP_CHUNK_SIZE` bytes
+    independently (primed with the tail of the preceding chunk, as
+    pigz does) and writing them in order.  The output is a single
+    ordinary gzip member.
+    '''
+
+    def __init__(self, filename, threads, compresslevel=9):
+        self.file = open(filename, 'wb')
+        self.compresslevel = compresslevel
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._max_pending = threads * PARALLEL_GZIP_PENDING_CHUNKS_PER_THREAD
+        self._pending = deque()
+        self._chunk = []
+        self._chunk_size = 0
+        self._crc = 0
+        self._size = 0
+        self._zdict = b''
+        # gzip header: magic, deflate, no flags, mtime, no extra
+        # flags, unknown OS
+        self.file.write(b'\x1f\x8b\x08\x00' +
+                        struct.pack('<I', int(time.time())) + b'\x00\xff')
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunk.append(data)
+        self._chunk_size += len(data)
+        if self._chunk_size >= PARALLEL_GZIP_CHUNK_SIZE:
+            self._submit_chunk()
+        return len(data)
+
+    def _submit_chunk(self):
+        data = b''.join(self._chunk)
+        self._chunk = []
+        self._chunk_size = 0
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._pending.append(self._executor.submit(
+            _deflate_chunk, data, self.compresslevel, self._zdict))
+        self._zdict = data[-(1 << 15):]
+        while len(self._pending) > self._max_pending:
+            self.file.write(self._pending.popleft().result())
+
+    def close(self):
+        if self._chunk:
+            self._submit_chunk()
+        while self._pending:
+            self.file.write(self._pending.popleft().result())
+        self._executor.shutdown()
+        # empty final deflate block, then gzip trailer
+        self.file.write(b'\x03\x00' +
+                        struct.pack('<II', self._crc, self._size & 0xffffffff))
+        self.file.close()
+
+
+def _serialize_many(executor, comms):
+    '''
+    Return iterator over the serializations of `comms`, in order,
+    computed on `executor` (a thread pool, or None to serialize them
+    lazily on the calling thread).  All of `comms` are submitted up
+    front, so later communications are serialized while earlier ones
+    are being written.
+    '''
+    if executor is None:
+        return map(write_thrift_to_buffer, comms)
+    return executor.map(write_thrift_to_buffer, comms)
+
+
+def _sniff_compression(filename):
+    '''
+    Return FileType suffix of compression of named file if its magic
+    number is one of `_COMPRESSION_MAGIC`, else None.
+    '''
+    with open(filename, 'rb') as f:
+        magic = f.read(4)
+    for (compression, compression_magic) in _COMPRESSION_MAGIC.items():
+        if magic == compression_magic:
+            return compression
+    return None
+
+
+def _is_tar_stream(f):
+    '''
+    Return True if file object `f` starts with a valid tar header.
+    Consumes the first block of `f`.
+    '''
+    try:
+        tarfile.TarInfo.frombuf(f.read(tarfile.BLOCKSIZE),
+                                tarfile.ENCODING, 'surrogateescape')
+        return True
+    except tarfile.HeaderError:
+        return False
+
+
+# Batching of raw records handed to worker processes by ThriftReader
+# in parallel mode: each task decodes at most PARALLEL_BATCH_SIZE
+# records (or about PARALLEL_BATCH_BYTES bytes), and at most
+# PARALLEL_PENDING_BATCHES_PER_WORKER tasks per worker are in flight.
+PARALLEL_BATCH_SIZE = 64
+PARALLEL_BATCH_BYTES = 1 << 22
+PARALLEL_PENDING_BATCHES_PER_WORKER = 4
+
+# Number of files per thread read ahead by ThriftReader when reading a
+# directory on a thread pool.
+DIR_PENDING_FILES_PER_THREAD = 4
+
+
+def _scandir_files(path, followlinks=False):
+    '''
+    Generate paths of all non-directory entries under `path`,
+    recursively, listing each directory once with `os.scandir` (and
+    using the file types it returns rather than calling `stat`).
+    Symlinks to directories are only followed if `followlinks` is
+    True, as with `os.walk`.
+    '''
+    dir_paths = [path]
+    while dir_paths:
+        subdir_paths = []
+        with os.scandir(dir_paths.pop()) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    yield entry.path
+                elif followlinks or not entry.is_symlink():
+                    subdir_paths.append(entry.path)
+        # visit subdirectories in listing order
+        dir_paths.extend(reversed(subdir_paths))
+
+
+def _resume_paths(paths, path):
+    '''
+    Generate the paths in `paths` starting at `path`.
+
+    Raises:
+        ValueError: if `path` is not in `paths`
+    '''
+    found = False
+    for p in paths:
+        found = found or p == path
+        if found:
+            yield p
+    if not found:
+        raise ValueError('checkpoint file %s not found' % path)
+
+
+def _read_raw_records(thrift_type, filename, memory_map, resume_from=None):
+    '''
+    Return list of `((bytes, filename), checkpoint)` tuples for all
+    records in a file (of any type supported by :class:`ThriftReader`),
+    where checkpoint is the directory checkpoint after the record.
+    Run on a thread pool by :class:`ThriftReader` when reading a
+    directory with `threads`.
+    '''
+    reader = ThriftReader(thrift_type, filename, memory_map=memory_map,
+                          raw=True, resume_from=resume_from)
+    return [
+        (record, dict(file=filename, checkpoint=reader.checkpoint()))
+        for record in reader
+    ]
+
+
+class _StreamTransport(TTransport.TTransportBase,
+                       TTransport.CReadableTransport):
+    '''
+    Buffered, read-only Thrift transport over a file object.
+
+    Unlike :class:`TTransport.TFileObjectTransport`, this transport
+    implements the `CReadableTransport` interface, so structures read
+    through it are decoded by the accelerated protocol (when
+    available).  It also keeps track of the offset into the underlying
+    stream and can return the exact bytes of a record, as delimited by
+    calls to :meth:`mark` and :meth:`captured`.
+    '''
+
+    DEFAULT_BUFFER = 1 << 16
+
+    def __init__(self, fileobj, rbuf_size=DEFAULT_BUFFER, offset=0):
+        '''
+        Args:
+            fileobj: file object opened for binary reading
+            rbuf_size (int): minimum number of bytes to request from
+                `fileobj` on each read
+            offset (int): offset into the stream that `fileobj` is
+                positioned at
+        '''
+        self.fileobj = fileobj
+        self._rbuf_size = rbuf_size
+        self._data = b''
+        self._data_offset = offset
+        self._rbuf = BytesIO(self._data)
+        self._mark = None
+        # bytes of the record being captured that precede self._data
+        self._captured_chunks = []
+        self.eof = False
+
+    def isOpen(self):
+        return not self.fileobj.closed
+
+    def open(self):
+        pass
+
+    def close(self):
+        self.fileobj.close()
+
+    def tell(self):
+        '''
+        Return offset of the read position in the underlying stream.
+        '''
+        return self._data_offset + self._rbuf.tell()
+
+    def mark(self):
+        '''
+        Start capturing bytes at the current read position.
+        '''
+        self._mark = self.tell()
+        self._captured_chunks = []
+
+    def captured(self):
+        '''
+        Stop capturing bytes and return the bytes read since the last
+        call to :meth:`mark`.
+        '''
+        start = max(self._mark - self._data_offset, 0)
+        chunks = self._captured_chunks
+        chunks.append(self._data[start:self._rbuf.tell()])
+        self._mark = None
+        self._captured_chunks = []
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+    def read(self, sz):
+        ret = self._rbuf.read(sz)
+        if len(ret) == sz:
+            return ret
+        try:
+            self.cstringio_refill(ret, sz)
+        except EOFError:
+            return ret
+        return self._rbuf.read(sz)
+
+    @property
+    def cstringio_buf(self):
+        return self._rbuf
+
+    def cstringio_refill(self, partialread, reqlen):
+        # partialread is always the tail of the current buffer
+        pos = self.tell() - len(partialread)
+        chunk = self.fileobj.read(max(reqlen - len(partialread),
+                                      self._rbuf_size))
+        if len(partialread) + len(chunk) < reqlen:
+            self.eof = True
+            raise EOFError()
+        if self._mark is not None:
+            # set aside the captured bytes that are being dropped from
+            # the buffer (joined once, by captured)
+            start = max(self._mark - self._data_offset, 0)
+            self._captured_chunks.append(
+                self._data[start:pos - self._data_offset])
+        self._data = partialread + chunk
+        self._data_offset = pos
+        self._rbuf = BytesIO(self._data)
+        return self._rbuf
+
+
+class _MemoryMapTransport(_StreamTransport):
+    '''
+    Read-only Thrift transport over a memory-mapped file.
+
+    The accelerated protocol decodes from a `BytesIO` buffer, so this
+    transport fills that buffer with slices of the mapping (a single
+    copy out of the page cache, with no read system calls), and
+    returns captured records as single slices of the mapping.
+    '''
+
+    DEFAULT_BUFFER = 1 << 22
+
+    def __init__(self, mapping, rbuf_size=DEFAULT_BUFFER, offset=0):
+        '''
+        Args:
+            mapping (mmap.mmap): memory-mapped file
+            rbuf_size (int): minimum number of bytes to copy out of
+                the mapping on each refill
+            offset (int): offset into the mapping to start reading at
+        '''
+        super(_MemoryMapTransport, self).__init__(mapping, rbuf_size, offset)
+
+    def captured(self):
+        start = self._mark
+        self._mark = None
+        return self.fileobj[start:self.tell()]
+
+    def cstringio_refill(self, partialread, reqlen):
+        # partialread is always the tail of the current buffer
+        pos = self.tell() - len(partialread)
+        if pos + reqlen > len(self.fileobj):
+            self.eof = True
+            raise EOFError()
+        self._data = self.fileobj[pos:pos + max(reqlen, self._rbuf_size)]
+        self._data_offset = pos
+        self._rbuf = BytesIO(self._data)
+        return self._rbuf
+
+
+def _memory_map(filename):
+    '''
+    Return read-only memory map of the named file, or None if the file
+    is empty (and cannot be mapped).
+    '''
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _SkippedStruct(object):
+    '''
+    Placeholder type with an empty Thrift spec: decoding into it
+    skips over a whole structure without materializing any fields.
+    '''
+    thrift_spec = ()
+
+    def __init__(self, **kwargs):
+        pass
+
+
+def _skip_struct(protocol):
+    '''
+    Advance `protocol` past the next Thrift structure, decoding it
+    in C (without building any Python objects) when the accelerated
+    protocol is available.
+    '''
+    if (getattr(protocol, '_fast_decode', None) is not None and
+            isinstance(protocol.trans, TTransport.CReadableTransport)):
+        protocol._fast_decode(None, protocol,
+                              [_SkippedStruct, _SkippedStruct.thrift_spec])
+    else:
+        protocol.skip(TType.STRUCT)
+
+
+def _decode_records(thrift_type, thrift_spec, postprocess, records):
+    '''
+    Deserialize (restricted to `thrift_spec`, if not None) and
+    post-process a batch of `(bytes, filename)` records, returning a
+    list of `(obj, filename)` tuples.  Run in worker processes by
+    :class:`ThriftReader` in parallel mode.
+    '''
+    decoded = []
+    for (buf, filename) in records:
+        thrift_obj = read_thrift_from_buffer(thrift_type(), buf, thrift_spec)
+        if postprocess is not None:
+            postprocess(thrift_obj)
+        decoded.append((thrift_obj, filename))
+    return decoded
+
+
 class ThriftReader(object):
     """Iterator/generator class for reading one or more Thrift structures
     from a file or folder
@@ -254,16 +726,92 @@ class ThriftReader(object):
     - a folder containing one or more files of the preceding types
       (requires `recursive` to be True and `filetype` to be "auto")
 
+    Streams and .tar files may also be compressed with bzip2,
+    Zstandard (requires the zstandard package) or LZ4 (requires the
+    lz4 package).
+
     Sample usage::
 
         for (comm, filename) in ThriftReader(Communication,
                                              'multiple_comms.tar.gz'):
             do_something(comm)
+
+    If `workers` is set, raw records are split off the input on the
+    calling process and deserialized (and post-processed) in a pool of
+    `workers` processes::
+
+        for (comm, filename) in ThriftReader(Communication,
+                                             'multiple_comms.tar.gz',
+                                             workers=8):
+            do_something(comm)
+
+    In that case `thrift_type` and `postprocess` must be picklable
+    (for example, module-level classes and functions, not lambdas).
+
+    If `memory_map` is True, uncompressed streams and .tar files are
+    memory-mapped and Thrift structures are decoded directly out of
+    the mapping, rather than through buffered file reads.
+
+    If `fields` is set, only the named (top-level) fields of each
+    Thrift structure are deserialized; all other fields are skipped
+    at the protocol level and left unset::
+
+        for (comm, filename) in ThriftReader(Communication,
+                                             'multiple_comms.tar.gz',
+                                             fields={'id', 'text'}):
+            do_something(comm.text)
+
+    If `raw` is True, the iterator returns `(bytes, filename)` tuples,
+    where bytes is the exact serialization of each Thrift structure
+    in the input, and nothing is deserialized.  This allows copying,
+    filtering or re-archiving records without re-serializing them::
+
+        with CommunicationWriterTar('copy.tar') as writer:
+            for (buf, filename) in ThriftReader(Communication,
+                                                'multiple_comms.tar.gz',
+                                                raw=True):
+                writer.write_bytes(buf, filename)
+
+    If `prefetch` is set, records are read (and decompressed) from
+    the input on a background thread into a queue holding up to
+    `prefetch` records, overlapping I/O and decompression with
+    deserialization on the calling thread.
+
+    If `threads` is set when reading a directory, the files under it
+    are read concurrently on a pool of `threads` threads, which hides
+    open and read latency on network filesystems::
+
+        for (comm, filename) in ThriftReader(Communication, 'comms/',
+                                             recursive=True, threads=16):
+            do_something(comm)
+
+    Long-running jobs can save the (JSON-serializable) token returned
+    by :meth:`checkpoint` and pass it back as `resume_from` to a new
+    reader over the same input to continue after the last Thrift
+    structure that was returned, without decoding the structures
+    before it::
+
+        reader = ThriftReader(Communication, 'multiple_comms.tar.gz',
+                              resume_from=load_checkpoint())
+        for (comm, filename) in reader:
+            do_something(comm)
+            save_checkpoint(reader.checkpoint())
+
+    Worker pools and read-ahead threads are shut down when the reader
+    is exhausted; to stop reading early, call :meth:`close` or use the
+    reader as a context manager::
+
+        with ThriftReader(Communication, 'multiple_comms.tar.gz',
+                          workers=8) as reader:
+            (comm, filename) = next(reader)
     """
 
     def __init__(self, thrift_type, filename,
                  postprocess=None, filetype=FileType.AUTO,
-                 recursive=False, followlinks=False):
+                 recursive=False, followlinks=False,
+                 workers=None, ordered=True, memory_map=False,
+                 fields=None, raw=False, prefetch=None, threads=None,
+                 resume_from=None):
         """
         Args:
             thrift_type: Class for Thrift type, e.g. Communication, TokenLattice
@@ -277,15 +825,42 @@ class ThriftReader(object):
             recursive (bool): If True, reader will recurse into directories
             followlinks (bool): If True, also follow symlinks when recursing into
                 directories
+            workers (int): If not None, deserialize and post-process
+                Thrift objects in a pool of this many worker processes
+            ordered (bool): If True (and `workers` or `threads` is not
+                None), return Thrift objects in the order they appear
+                in the input; if False, return them in the order they
+                are decoded (or their files are read)
+            memory_map (bool): If True, memory-map uncompressed streams
+                and .tar files (compressed inputs are read as usual)
+            fields: If not None, collection of names of the fields of
+                `thrift_type` to deserialize
+            raw (bool): If True, return serialized Thrift structures
+                instead of deserializing them (`postprocess`,
+                `workers` and `fields` are ignored)
+            prefetch (int): If not None, read up to this many records
+                ahead of the caller on a background thread
+            threads (int): If not None (and reading a directory), read
+                files on a pool of this many threads, each file being
+                read into memory in full
+            resume_from: If not None, checkpoint token returned by
+                :meth:`checkpoint` of a reader over the same input;
+                reading starts after the last Thrift object returned
+                before the checkpoint was taken
 
         Raises:
-            ValueError: if filetype is not a known filetype name or id
+            ValueError: if filetype is not a known filetype name or id,
+                if `fields` contains a name that is not a field of
+                `thrift_type`, or if `prefetch` is less than 1
         """
+        if prefetch is not None and prefetch < 1:
+            raise ValueError('prefetch must be at least 1')
         filetype = FileType.lookup(filetype)
 
-        self._seek_supported = True
-
         self._thrift_type = thrift_type
+        self._thrift_spec = None
+        if fields is not None:
+            self._thrift_spec = projected_thrift_spec(thrift_type, fields)
         if postprocess is None:
             def _noop(obj):
                 return
@@ -294,9 +869,17 @@ class ThriftReader(object):
             self._postprocess = postprocess
         self._source_filename = filename
 
+        f = None
+        mapping = None
+
         if filetype == FileType.TAR:
             self.filetype = 'tar'
-            self.tar = tarfile.open(filename, 'r|')
+            if memory_map:
+                mapping = _memory_map(filename)
+            if mapping is not None:
+                self.tar = tarfile.open(fileobj=mapping, mode='r:')
+            else:
+                self.tar = tarfile.open(filename, 'r|')
 
         elif filetype == FileType.TAR_GZ:
             self.filetype = 'tar'
@@ -306,18 +889,26 @@ class ThriftReader(object):
             self.filetype = 'tar'
             self.tar = tarfile.open(filename, 'r|bz2')
 
+        elif filetype == FileType.TAR_ZST:
+            self.filetype = 'tar'
+            self.tar = tarfile.open(
+                fileobj=_open_compressed(filename, 'zst'), mode='r|')
+
+        elif filetype == FileType.TAR_LZ4:
+            self.filetype = 'tar'
+            self.tar = tarfile.open(
+                fileobj=_open_compressed(filename, 'lz4'), mode='r|')
+
         elif filetype == FileType.ZIP:
             self.filetype = 'zip'
             self.zip = zipfile.ZipFile(filename, 'r')
-            self.zip_info_stream = (
-                zipinfo
-                for zipinfo in self.zip.infolist()
-                if not zipinfo.is_dir()
-            )
 
         elif filetype == FileType.STREAM:
             self.filetype = 'stream'
-            f = open(filename, 'rb')
+            if memory_map:
+                mapping = _memory_map(filename)
+            if mapping is None:
+                f = open(filename, 'rb')
 
         elif filetype == FileType.STREAM_GZ:
             self.filetype = 'stream'
@@ -327,39 +918,76 @@ class ThriftReader(object):
             self.filetype = 'stream'
             f = bz2.BZ2File(filename, 'r')
 
+        elif filetype == FileType.STREAM_ZST:
+            self.filetype = 'stream'
+            f = _open_compressed(filename, 'zst')
+
+        elif filetype == FileType.STREAM_LZ4:
+            self.filetype = 'stream'
+            f = _open_compressed(filename, 'lz4')
+
         elif filetype == FileType.AUTO:
+            compression = None
+            if os.path.isfile(filename):
+                compression = _sniff_compression(filename)
+
             if os.path.isdir(filename):
-                if recursive:
-                    self.filetype = 'dir'
-                    self.item_stream = (
-                        thrift_obj
-                        for (dirpath, _, entries) in os.walk(filename, followlinks=followlinks)
-                        for entry in entries
-                        for thrift_obj in ThriftReader(
+                if not recursive:
+                    raise ValueError('path is a directory but `recursive` is False')
+                self.filetype = 'dir'
+                self._dir_position = dict(file=None, checkpoint=None)
+                paths = _scandir_files(filename, followlinks)
+                if resume_from is not None and resume_from['file'] is not None:
+                    self._dir_position = resume_from
+                    paths = _resume_paths(paths, resume_from['file'])
+                if threads is not None:
+                    self._dir_paths = paths
+                else:
+                    self.reader_stream = (
+                        ThriftReader(
                             thrift_type,
-                            os.path.join(dirpath, entry),
+                            path,
                             postprocess=postprocess,
                             filetype=filetype,
                             recursive=recursive,
-                            followlinks=followlinks
+                            followlinks=followlinks,
+                            memory_map=memory_map,
+                            fields=fields,
+                            resume_from=self._dir_resume_from(path)
                         )
+                        for path in paths
                     )
                     self.current_reader = None
+                    self._dir_last_reader = None
+
+            elif compression is not None:
+                with _open_compressed(filename, compression) as sniff_f:
+                    is_tar = _is_tar_stream(sniff_f)
+                if is_tar:
+                    self.filetype = 'tar'
+                    self.tar = tarfile.open(
+                        fileobj=_open_compressed(filename, compression),
+                        mode='r|')
                 else:
-                    raise ValueError('path is a directory but `recursive` is False')
+                    self.filetype = 'stream'
+                    f = _open_compressed(filename, compression)
 
             elif tarfile.is_tarfile(filename):
                 self.filetype = 'tar'
-                self.tar = tarfile.open(filename, 'r|*')
+                if memory_map:
+                    mapping = _memory_map(filename)
+                    try:
+                        self.tar = tarfile.open(fileobj=mapping, mode='r:')
+                    except tarfile.ReadError:
+                        # compressed tar file
+                        mapping.close()
+                        mapping = None
+                if mapping is None:
+                    self.tar = tarfile.open(filename, 'r|*')
 
             elif zipfile.is_zipfile(filename):
                 self.filetype = 'zip'
                 self.zip = zipfile.ZipFile(filename, 'r')
-                self.zip_info_stream = (
-                    zipinfo
-                    for zipinfo in self.zip.infolist()
-                    if not zipinfo.is_dir()
-                )
 
             elif mimetypes.guess_type(filename)[1] == 'gzip':
                 # this is not a true stream---is_tarfile will have
@@ -376,16 +1004,87 @@ class ThriftReader(object):
             else:
                 # this is not a true stream
                 self.filetype = 'stream'
-                f = open(filename, 'rb')
+                if memory_map:
+                    mapping = _memory_map(filename)
+                if mapping is None:
+                    f = open(filename, 'rb')
 
         else:
             raise ValueError('unknown filetype %d' % filetype)
 
+        self._mapping = mapping
+
         if self.filetype == 'stream':
-            self.transport = TTransport.TFileObjectTransport(f)
+            offset = 0
+            if resume_from is not None:
+                offset = resume_from['offset']
+            if mapping is not None:
+                self.transport = _MemoryMapTransport(mapping, offset=offset)
+            else:
+                if offset:
+                    # forward seek, which decompresses (but does not
+                    # decode) the skipped data in compressed streams
+                    f.seek(offset)
+                self.transport = _StreamTransport(f, offset=offset)
             self.protocol = factory.createProtocol(self.transport)
             self.transport.open()
 
+        elif self.filetype == 'tar':
+            self._tar_members = 0
+            if resume_from is not None and resume_from['member'] > 0:
+                # skip to the header of the next member (tarfile has
+                # already read the first one)
+                self.tar.firstmember = None
+                self.tar.offset = resume_from['offset']
+                self._tar_members = resume_from['member']
+
+        elif self.filetype == 'zip':
+            zipinfos = [
+                zipinfo
+                for zipinfo in self.zip.infolist()
+                if not zipinfo.is_dir()
+            ]
+            self._zip_member = None
+            if resume_from is not None and resume_from['member'] is not None:
+                self._zip_member = resume_from['member']
+                names = [zipinfo.filename for zipinfo in zipinfos]
+                if self._zip_member not in names:
+                    raise ValueError('checkpoint member %s not found' %
+                                     self._zip_member)
+                zipinfos = zipinfos[names.index(self._zip_member) + 1:]
+            self.zip_info_stream = iter(zipinfos)
+
+        self._raw = raw
+
+        self._dir_executor = None
+        if self.filetype == 'dir' and threads is not None:
+            self._dir_executor = ThreadPoolExecutor(max_workers=threads)
+            self._dir_max_pending = threads * DIR_PENDING_FILES_PER_THREAD
+            self._dir_ordered = ordered
+            self._dir_pending = deque() if ordered else set()
+            self._dir_records = deque()
+            self._dir_memory_map = memory_map
+
+        self._executor = None
+        if workers is not None and not raw:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            self._max_pending = workers * PARALLEL_PENDING_BATCHES_PER_WORKER
+            self._ordered = ordered
+            self._pending = deque() if ordered else set()
+            self._decoded = deque()
+            self._batch_checkpoints = {}
+            self._input_exhausted = False
+            self._decode_args = (thrift_type, self._thrift_spec, postprocess)
+
+        self._prefetch_queue = None
+        self._checkpoint = self._read_position()
+        if prefetch is not None:
+            self._prefetch_queue = Queue(maxsize=prefetch)
+            self._prefetch_stop = threading.Event()
+            self._prefetch_thread = threading.Thread(
+                target=self._prefetch_records, daemon=True)
+            self._prefetch_thread.start()
+
     def __iter__(self):
         return self
 
@@ -408,14 +1107,27 @@ class ThriftReader(object):
             an invalid Thrift object
             StopIteration: if there are no more objects to read
         """
-        if self.filetype == 'stream':
+        if self._raw and self._prefetch_queue is not None:
+            (record, self._checkpoint) = self._next_prefetched()
+            return record
+        elif self._raw:
+            return self._next_raw()
+        elif self._executor is not None:
+            return self._next_parallel()
+        elif self._prefetch_queue is not None:
+            # decoded (but not post-processed) on the read-ahead thread
+            ((thrift_obj, filename), self._checkpoint) = \
+                self._next_prefetched()
+            self._postprocess(thrift_obj)
+            return (thrift_obj, filename)
+        elif self.filetype == 'stream':
             return self._next_from_stream()
         elif self.filetype == 'tar':
             return self._next_from_tar()
         elif self.filetype == 'zip':
             return self._next_from_zip()
         elif self.filetype == 'dir':
-            return next(self.item_stream)
+            return self._next_from_dir()
         else:
             raise ValueError('unknown filetype %s' % self.filetype)
 
@@ -433,143 +1145,707 @@ class ThriftReader(object):
         '''
         return self.__next__()
 
-    def _next_from_stream(self):
+    def close(self):
         '''
-        Return tuple containing next Thrift object (and filename)
-        from an uncompressed stream.
+        Shut down the worker pool and read-ahead thread, if any.
+        Called automatically when the reader is exhausted.
+        '''
+        if self._executor is not None:
+            for future in self._pending:
+                future.cancel()
+            self._executor.shutdown()
+        if self._prefetch_queue is not None:
+            self._prefetch_stop.set()
+            self._prefetch_thread.join()
+        if self._dir_executor is not None:
+            for future in self._dir_pending:
+                future.cancel()
+            self._dir_executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def checkpoint(self):
+        '''
+        Return token for the position in the input after the last
+        Thrift object returned by the reader, which can be passed as
+        `resume_from` to a new reader to continue from there.
+
+        The token is a dict (that can be serialized as JSON) holding
+        the byte offset into the (uncompressed) stream for streams,
+        the member count and offset of the next member header for
+        .tar files, the name of the last member for .zip files, and
+        the path of the current file (and a checkpoint within it) for
+        directories.  Resuming from a directory checkpoint relies on
+        the directory being listed in the same order.
+
+        Returns:
+            checkpoint token
 
         Raises:
-            EOFError: unexpected EOF, probably caused by deserializing an invalid Thrift object
+            ValueError: if reading with `workers` or `threads` and
+                `ordered` is False (records are then not returned in
+                input order)
+        '''
+        if self._executor is not None and not self._ordered:
+            raise ValueError('cannot checkpoint unordered reader')
+        if self._dir_executor is not None and not self._dir_ordered:
+            raise ValueError('cannot checkpoint unordered reader')
+        if self._executor is not None or self._prefetch_queue is not None:
+            # the input has been read ahead of the caller
+            return self._checkpoint
+        return self._read_position()
+
+    def _read_position(self):
+        '''
+        Return checkpoint token for the current read position in the
+        input.
+        '''
+        if self.filetype == 'stream':
+            return dict(offset=self.transport.tell())
+        elif self.filetype == 'tar':
+            if self.tar.firstmember is not None:
+                # first member has been read by tarfile but not returned
+                return dict(member=0, offset=self.tar.firstmember.offset)
+            return dict(member=self._tar_members, offset=self.tar.offset)
+        elif self.filetype == 'zip':
+            return dict(member=self._zip_member)
+        elif self.filetype == 'dir':
+            if self._dir_executor is None and self._dir_last_reader is not None:
+                return dict(file=self._dir_last_reader._source_filename,
+                            checkpoint=self._dir_last_reader._read_position())
+            return self._dir_position
+        else:
+            raise ValueError('unknown filetype %s' % self.filetype)
+
+    def _dir_resume_from(self, path):
+        '''
+        Return checkpoint token to resume reading the file at `path`
+        under a directory from, or None to read it from the start.
+        '''
+        if self._dir_position['file'] == path:
+            return self._dir_position['checkpoint']
+        return None
+
+    def _next_positioned_record(self):
+        '''
+        Return tuple containing the next record (tuple of the
+        serialized bytes of the next Thrift object and filename) and
+        the checkpoint token after it, from the read-ahead queue if
+        prefetching.
+        '''
+        if self._prefetch_queue is not None:
+            return self._next_prefetched()
+        else:
+            record = self._next_raw()
+            return (record, self._read_position())
+
+    def _next_prefetched(self):
+        '''
+        Return next record from the read-ahead queue, re-raising any
+        exception raised by the read-ahead thread.
+
+        Raises:
+            EOFError: unexpected EOF, probably caused by an invalid
+                Thrift object
             StopIteration: if there are no more Thrift objects
 
         Returns:
-            tuple containing Thrift object and its filename
+            tuple containing record (bytes and filename) and the
+            checkpoint token after it
+        '''
+        item = self._prefetch_queue.get()
+        if isinstance(item, BaseException):
+            # put item back so later calls raise it again (the
+            # read-ahead thread has finished, so there is room)
+            self._prefetch_queue.put(item)
+            self._prefetch_thread.join()
+            raise item
+        return item
+
+    def _prefetch_records(self):
         '''
-        if self.transport.fileobj and self._seek_supported:
+        Read records into the read-ahead queue until the input is
+        exhausted (or an error occurs), then enqueue the exception
+        that ended the read.  Records are raw if the reader is raw or
+        has a worker pool, and deserialized (once, without
+        post-processing) otherwise.  Run on the read-ahead thread.
+        '''
+        if self._raw or self._executor is not None:
+            next_record = self._next_raw
+        else:
+            next_record = self._next_unprocessed
+        while not self._prefetch_stop.is_set():
             try:
-                file_pos_0 = self.transport.fileobj.tell()
-            except IOError as e:
-                if e.errno == 29:  # Illegal seek
-                    self._seek_supported = False
-                else:
-                    raise e
-        try:
-            thrift_obj = self._thrift_type()
-            thrift_obj.read(self.protocol)
-            self._postprocess(thrift_obj)
-            return (thrift_obj, self._source_filename)
-        except EOFError:
-            if self.transport.fileobj and self._seek_supported:
-                # If the file position moved after the read() call, we weren't truly
-                # at the End Of File.
-                file_pos = self.transport.fileobj.tell()
-                if file_pos != file_pos_0:
-                    self.transport.close()
-                    raise EOFError(
-                        'While trying to read Thrift object of type %s starting at byte %d. ' %
-                        (type(self._thrift_type()), file_pos_0))
-            self.transport.close()
-            raise StopIteration
+                item = (next_record(), self._read_position())
+            except Exception as e:
+                item = e
+            while True:
+                try:
+                    self._prefetch_queue.put(item, timeout=0.1)
+                    break
+                except Full:
+                    if self._prefetch_stop.is_set():
+                        return
+            if isinstance(item, BaseException):
+                return
 
-    def _next_from_tar(self):
+    def _next_raw(self):
         '''
-        Return tuple containing next communication (and filename)
-        from a tar file.
+        Return tuple containing the serialized bytes of the next
+        Thrift object (and filename), without deserializing it.
 
         Raises:
-            StopIteration: if there are no more communications
+            ValueError: if self.filetype is not a known filetype name
+            EOFError: unexpected EOF, probably caused by an invalid
+                Thrift object
+            StopIteration: if there are no more Thrift objects
 
         Returns:
-            tuple containing Communication object and its filename
+            tuple containing bytes and filename
         '''
-        while True:
-            tarinfo = self.tar.next()
-            if tarinfo is None:
-                raise StopIteration
-            if not tarinfo.isfile():
-                # Ignore directories
-                continue
-            filename = os.path.split(tarinfo.name)[-1]
-            if filename[0] == '.' and filename[1] == '_':
-                # Ignore attribute files created by OS X tar
-                continue
-            comm = TSerialization.deserialize(
-                self._thrift_type(),
-                self.tar.extractfile(tarinfo).read(),
-                protocol_factory=factory.protocolFactory)
-            self._postprocess(comm)
-            # hack to keep memory usage O(1)
-            # (...but the real hack is tarfile :)
-            self.tar.members = []
-            return (comm, tarinfo.name)
+        if self.filetype == 'stream':
+            return self._next_raw_from_stream()
+        elif self.filetype == 'tar':
+            return self._next_raw_from_tar()
+        elif self.filetype == 'zip':
+            return self._next_raw_from_zip()
+        elif self.filetype == 'dir':
+            return self._next_from_dir(raw=True)
+        else:
+            raise ValueError('unknown filetype %s' % self.filetype)
 
-    def _next_from_zip(self):
+    def _next_parallel(self):
         '''
-        Return tuple containing next communication (and filename)
-        from a zip file.
+        Return tuple containing next Thrift object (and filename),
+        keeping the worker pool supplied with up to
+        `self._max_pending` batches of raw records.
 
         Raises:
-            StopIteration: if there are no more communications
+            EOFError: unexpected EOF, probably caused by deserializing an invalid Thrift object
+            StopIteration: if there are no more Thrift objects
 
         Returns:
-            tuple containing Communication object and its filename
+            tuple containing Thrift object and its filename
         '''
-        zipinfo = next(self.zip_info_stream)
-        comm = TSerialization.deserialize(
-            self._thrift_type(),
-            self.zip.open(zipinfo).read(),
-            protocol_factory=factory.protocolFactory)
-        self._postprocess(comm)
-        return (comm, zipinfo.filename)
-
+        while not self._decoded:
+            while (not self._input_exhausted and
+                   len(self._pending) < self._max_pending):
+                (batch, checkpoints) = self._next_raw_batch()
+                if batch:
+                    future = self._executor.submit(
+                        _decode_records, *(self._decode_args + (batch,)))
+                    self._batch_checkpoints[future] = checkpoints
+                    if self._ordered:
+                        self._pending.append(future)
+                    else:
+                        self._pending.add(future)
+
+            if not self._pending:
+                self.close()
+                raise StopIteration
 
-class CommunicationReader(ThriftReader):
-    """Iterator/generator class for reading one or more Communications from a
-    file or folder
+            if self._ordered:
+                future = self._pending.popleft()
+            else:
+                (done, _) = wait_futures(self._pending,
+                                         return_when=FIRST_COMPLETED)
+                future = done.pop()
+                self._pending.remove(future)
+            self._decoded.extend(zip(future.result(),
+                                     self._batch_checkpoints.pop(future)))
 
-    The iterator returns a `(Communication, filename)` tuple
+        (decoded, self._checkpoint) = self._decoded.popleft()
+        return decoded
 
-    Supported filetypes/folders are:
+    def _next_raw_batch(self):
+        '''
+        Return list of up to `PARALLEL_BATCH_SIZE` raw records,
+        totalling roughly at most `PARALLEL_BATCH_BYTES` bytes, to be
+        decoded by one worker task, and list of the checkpoint tokens
+        after each.  Sets `self._input_exhausted` when the input runs
+        out.
+        '''
+        batch = []
+        checkpoints = []
+        num_bytes = 0
+        while (len(batch) < PARALLEL_BATCH_SIZE and
+               num_bytes < PARALLEL_BATCH_BYTES):
+            try:
+                (record, checkpoint) = self._next_positioned_record()
+            except StopIteration:
+                self._input_exhausted = True
+                break
+            batch.append(record)
+            checkpoints.append(checkpoint)
+            num_bytes += len(record[0])
+        return (batch, checkpoints)
 
-    - a file with a single Communication
-    - a file with multiple Communications concatenated together
-    - a gzipped file with a single Communication
-    - a gzipped file with multiple Communications concatenated together
-    - a .tar.gz file with one or more Communications
-    - a .zip file with one or more Communications
-    - a folder containing one or more files of the preceding types
-      (requires `recursive` to be True and `filetype` to be "auto")
+    def _next_from_stream(self):
+        '''
+        Return tuple containing next Thrift object (and filename)
+        from an uncompressed stream.
+
+        Raises:
+            EOFError: unexpected EOF, probably caused by deserializing an invalid Thrift object
+            StopIteration: if there are no more Thrift objects
+
+        Returns:
+            tuple containing Thrift object and its filename
+        '''
+        thrift_obj = self._read_from_stream()
+        self._postprocess(thrift_obj)
+        return (thrift_obj, self._source_filename)
+
+    def _read_from_stream(self):
+        '''
+        Return next Thrift object from an uncompressed stream, without
+        post-processing it.
+        '''
+        file_pos_0 = self.transport.tell()
+        try:
+            return read_thrift_from_protocol(
+                self._thrift_type(), self.protocol, self._thrift_spec)
+        except EOFError:
+            self._stream_eof(file_pos_0)
+
+    def _next_unprocessed(self):
+        '''
+        Return tuple containing next Thrift object (and filename),
+        without post-processing it.  Stream records are decoded
+        directly from the stream, other records from their bytes.
+
+        Raises:
+            ValueError: if self.filetype is not a known filetype name
+            EOFError: unexpected EOF, probably caused by deserializing
+                an invalid Thrift object
+            StopIteration: if there are no more Thrift objects
+        '''
+        if self.filetype == 'stream':
+            return (self._read_from_stream(), self._source_filename)
+        (buf, filename) = self._next_raw()
+        return (read_thrift_from_buffer(self._thrift_type(), buf,
+                                        self._thrift_spec),
+                filename)
+
+    def _next_raw_from_stream(self):
+        '''
+        Return tuple containing the bytes of the next Thrift object
+        (and filename) from a stream.
+
+        Raises:
+            EOFError: unexpected EOF, probably caused by an invalid Thrift object
+            StopIteration: if there are no more Thrift objects
+
+        Returns:
+            tuple containing bytes and filename
+        '''
+        file_pos_0 = self.transport.tell()
+        self.transport.mark()
+        try:
+            _skip_struct(self.protocol)
+        except EOFError:
+            self._stream_eof(file_pos_0)
+        except TypeError:
+            # the accelerated protocol reports any failure while
+            # skipping a field as a TypeError, including EOF
+            if not self.transport.eof:
+                raise
+            self._stream_eof(file_pos_0)
+        return (self.transport.captured(), self._source_filename)
+
+    def _stream_eof(self, file_pos_0):
+        '''
+        Close stream after EOF was hit while reading a Thrift object
+        that started at byte `file_pos_0`.
+
+        Raises:
+            EOFError: if the file position moved during the read,
+                meaning we weren't truly at the End Of File
+            StopIteration: otherwise
+        '''
+        file_pos = self.transport.tell()
+        self.transport.close()
+        if file_pos != file_pos_0:
+            raise EOFError(
+                'While trying to read Thrift object of type %s starting at byte %d. ' %
+                (type(self._thrift_type()), file_pos_0))
+        raise StopIteration
+
+    def _next_from_tar(self):
+        '''
+        Return tuple containing next communication (and filename)
+        from a tar file.
+
+        Raises:
+            StopIteration: if there are no more communications
+
+        Returns:
+            tuple containing Communication object and its filename
+        '''
+        (buf, filename) = self._next_raw_from_tar()
+        comm = read_thrift_from_buffer(
+            self._thrift_type(), buf, self._thrift_spec)
+        self._postprocess(comm)
+        return (comm, filename)
+
+    def _next_raw_from_tar(self):
+        '''
+        Return tuple containing the bytes of the next communication
+        (and filename) from a tar file.
+
+        Raises:
+            StopIteration: if there are no more communications
+
+        Returns:
+            tuple containing bytes and filename
+        '''
+        while True:
+            tarinfo = self.tar.next()
+            if tarinfo is None:
+                if self._mapping is not None:
+                    self._mapping.close()
+                raise StopIteration
+            if not tarinfo.isfile():
+                # Ignore directories
+                continue
+            filename = os.path.split(tarinfo.name)[-1]
+            if filename[0] == '.' and filename[1] == '_':
+                # Ignore attribute files created by OS X tar
+                continue
+            if self._mapping is not None:
+                buf = self._mapping[tarinfo.offset_data:
+                                    tarinfo.offset_data + tarinfo.size]
+            else:
+                buf = self.tar.extractfile(tarinfo).read()
+            # hack to keep memory usage O(1)
+            # (...but the real hack is tarfile :)
+            self.tar.members = []
+            self._tar_members += 1
+            return (buf, tarinfo.name)
+
+    def _next_from_zip(self):
+        '''
+        Return tuple containing next communication (and filename)
+        from a zip file.
+
+        Raises:
+            StopIteration: if there are no more communications
+
+        Returns:
+            tuple containing Communication object and its filename
+        '''
+        (buf, filename) = self._next_raw_from_zip()
+        comm = read_thrift_from_buffer(
+            self._thrift_type(), buf, self._thrift_spec)
+        self._postprocess(comm)
+        return (comm, filename)
+
+    def _next_raw_from_zip(self):
+        '''
+        Return tuple containing the bytes of the next communication
+        (and filename) from a zip file.
+
+        Raises:
+            StopIteration: if there are no more communications
+
+        Returns:
+            tuple containing bytes and filename
+        '''
+        zipinfo = next(self.zip_info_stream)
+        buf = self.zip.open(zipinfo).read()
+        self._zip_member = zipinfo.filename
+        return (buf, zipinfo.filename)
+
+    def _next_from_dir(self, raw=False):
+        '''
+        Return tuple containing next Thrift object (or its bytes, if
+        `raw` is True) and filename from the files under a directory.
+
+        Raises:
+            StopIteration: if there are no more Thrift objects
+
+        Returns:
+            tuple containing Thrift object (or bytes) and its filename
+        '''
+        if self._dir_executor is not None:
+            (buf, filename) = self._next_raw_from_dir_pool()
+            if raw:
+                return (buf, filename)
+            thrift_obj = read_thrift_from_buffer(
+                self._thrift_type(), buf, self._thrift_spec)
+            self._postprocess(thrift_obj)
+            return (thrift_obj, filename)
+
+        while True:
+            if self.current_reader is None:
+                self.current_reader = next(self.reader_stream)
+                self._dir_last_reader = self.current_reader
+            try:
+                if raw:
+                    return self.current_reader._next_raw()
+                else:
+                    return next(self.current_reader)
+            except StopIteration:
+                self.current_reader = None
+
+    def _next_raw_from_dir_pool(self):
+        '''
+        Return tuple containing the bytes of the next Thrift object
+        (and filename) from the files under a directory, keeping the
+        thread pool supplied with up to `self._dir_max_pending` files
+        to read.
+
+        Raises:
+            StopIteration: if there are no more Thrift objects
+
+        Returns:
+            tuple containing bytes and filename
+        '''
+        while not self._dir_records:
+            while len(self._dir_pending) < self._dir_max_pending:
+                path = next(self._dir_paths, None)
+                if path is None:
+                    break
+                future = self._dir_executor.submit(
+                    _read_raw_records, self._thrift_type, path,
+                    self._dir_memory_map, self._dir_resume_from(path))
+                if self._dir_ordered:
+                    self._dir_pending.append(future)
+                else:
+                    self._dir_pending.add(future)
+
+            if not self._dir_pending:
+                self._dir_executor.shutdown()
+                raise StopIteration
+
+            if self._dir_ordered:
+                future = self._dir_pending.popleft()
+            else:
+                (done, _) = wait_futures(self._dir_pending,
+                                         return_when=FIRST_COMPLETED)
+                future = done.pop()
+                self._dir_pending.remove(future)
+            self._dir_records.extend(future.result())
+
+        (record, self._dir_position) = self._dir_records.popleft()
+        return record
+
+
+def _references_postprocess(add_references, workers):
+    if add_references == 'lazy':
+        return partial(add_references_to_communication, lazy=True)
+    elif add_references == 'weak':
+        # weak references cannot be pickled: if Communications are
+        # decoded in worker processes, add references lazily (on first
+        # use, in this process)
+        return partial(add_references_to_communication,
+                       lazy=(workers is not None), weak=True)
+    elif add_references:
+        return add_references_to_communication
+    else:
+        return None
+
+
+def _intern_and_postprocess(comm, postprocess=None):
+    # intern UUIDs first, so references are added with shared strings
+    _intern_uuids(comm)
+    if postprocess is not None:
+        postprocess(comm)
+
+
+def _communication_postprocess(add_references, intern_uuids, workers):
+    postprocess = _references_postprocess(add_references, workers)
+    if intern_uuids:
+        return partial(_intern_and_postprocess, postprocess=postprocess)
+    else:
+        return postprocess
+
+
+class CommunicationReader(ThriftReader):
+    """Iterator/generator class for reading one or more Communications from a
+    file or folder
+
+    The iterator returns a `(Communication, filename)` tuple
+
+    Supported filetypes/folders are:
+
+    - a file with a single Communication
+    - a file with multiple Communications concatenated together
+    - a gzipped file with a single Communication
+    - a gzipped file with multiple Communications concatenated together
+    - a .tar.gz file with one or more Communications
+    - a .zip file with one or more Communications
+    - a folder containing one or more files of the preceding types
+      (requires `recursive` to be True and `filetype` to be "auto")
 
     Sample usage::
 
         for (comm, filename) in CommunicationReader('multiple_comms.tar.gz'):
             do_something(comm)
+
+    To deserialize and add references in a pool of worker processes::
+
+        for (comm, filename) in CommunicationReader('multiple_comms.tar.gz',
+                                                    workers=8):
+            do_something(comm)
+
+    To filter Communications by id without deserializing them::
+
+        with CommunicationWriterTGZ('filtered.tar.gz') as writer:
+            for (buf, filename) in CommunicationReader('multiple_comms.tar.gz',
+                                                       raw=True):
+                if read_communication_id(buf) in comm_ids:
+                    writer.write_bytes(buf, filename)
     """
 
     def __init__(self, filename, add_references=True, filetype=FileType.AUTO,
-                 recursive=False, followlinks=False):
+                 recursive=False, followlinks=False, workers=None,
+                 ordered=True, memory_map=False, fields=None, raw=False,
+                 prefetch=None, threads=None, resume_from=None,
+                 slots=False, intern_uuids=False):
         """
         Args:
             filename (str): path of file or folder to read from
             add_references (bool): If True, calls
                :func:`concrete.util.references.add_references_to_communication`
                on all :class:`.Communication` objects read from file
+               (if `'lazy'`, adds the references on first use; if `'weak'`,
+                makes backpointers weak references)
             filetype (FileType): Expected type of file.  Default value is
                 `FileType.AUTO`, where function will try to automatically
                 determine file type.
             recursive (bool): If True, reader will recurse into directories
             followlinks (bool): If True, also follow symlinks when recursing into
                 directories
+            workers (int): If not None, deserialize Communications (and
+                add references) in a pool of this many worker processes
+            ordered (bool): If True (and `workers` or `threads` is not
+                None), return Communications in the order they appear
+                in the input; if False, return them in the order they
+                are decoded (or their files are read)
+            memory_map (bool): If True, memory-map uncompressed streams
+                and .tar files (compressed inputs are read as usual)
+            fields: If not None, collection of names of
+                :class:`.Communication` fields to deserialize (e.g.
+                `{'id', 'text'}`); all other fields are skipped and
+                left unset.  If references are added, `fields` should
+                include every field they refer to (e.g. `sectionList`
+                when reading `entityMentionSetList`).
+            raw (bool): If True, return `(bytes, filename)` tuples
+                containing serialized Communications instead of
+                deserializing them (see :func:`read_communication_id`
+                to cheaply extract the id of a serialized Communication)
+            prefetch (int): If not None, read up to this many
+                Communications ahead of the caller on a background
+                thread
+            threads (int): If not None (and reading a directory), read
+                files on a pool of this many threads
+            resume_from: If not None, checkpoint token returned by
+                :meth:`checkpoint` of a reader over the same input;
+                reading starts after the last Communication returned
+                before the checkpoint was taken
+            slots (bool): If True, return compact `__slots__`-based
+                Communications (see :mod:`concrete.util.slots`)
+            intern_uuids (bool): If True, share one :class:`.UUID`
+                object between all UUIDs with the same value in each
+                Communication (see
+                :func:`concrete.util.concrete_uuid.intern_uuids`)
         """
         super(CommunicationReader, self).__init__(
-            Communication,
+            slots_type(Communication) if slots else Communication,
             filename,
-            postprocess=(add_references_to_communication
-                         if add_references
-                         else None),
+            postprocess=_communication_postprocess(
+                add_references, intern_uuids, workers),
             filetype=filetype,
             recursive=recursive,
-            followlinks=followlinks)
+            followlinks=followlinks,
+            workers=workers,
+            ordered=ordered,
+            memory_map=memory_map,
+            fields=fields,
+            raw=raw,
+            prefetch=prefetch,
+            threads=threads,
+            resume_from=resume_from)
+
+
+STREAM_INDEX_SUFFIX = '.index'
+
+_COMMUNICATION_ID_SPEC = projected_thrift_spec(Communication, ('id',))
+
+
+def read_communication_id(buf):
+    '''
+    Return the `id` of a serialized :class:`.Communication`, skipping
+    over (and not building objects for) all other fields.
+
+    Args:
+        buf (bytes): serialized Communication
+
+    Returns:
+        str: Communication id
+    '''
+    return read_thrift_from_buffer(
+        Communication(), buf, _COMMUNICATION_ID_SPEC).id
+
+
+def build_stream_index(stream_filename, index_filename=None):
+    """Write sidecar index of the Communications in a concatenated
+    (uncompressed) stream file
+
+    Each line of the index file contains the byte offset, length and
+    id of one Communication in the stream, separated by tabs.  The
+    index can be read using :func:`read_stream_index` and is used by
+    :class:`.StreamBackedCommunicationContainer` to seek to and decode
+    individual Communications.
+
+    Args:
+        stream_filename (str): path of uncompressed stream file
+        index_filename (str): path of index file to write; defaults
+            to `stream_filename` with `STREAM_INDEX_SUFFIX` appended
+
+    Returns:
+        str: path of index file that was written
+
+    Raises:
+        EOFError: unexpected EOF, probably caused by an invalid
+            Communication in the stream
+    """
+    if index_filename is None:
+        index_filename = stream_filename + STREAM_INDEX_SUFFIX
+    reader = ThriftReader(Communication, stream_filename,
+                          filetype=FileType.STREAM)
+    with open(index_filename, 'w', encoding='utf-8') as index_file:
+        while True:
+            offset = reader.transport.tell()
+            try:
+                (buf, _) = reader._next_raw()
+            except StopIteration:
+                break
+            index_file.write('%d\t%d\t%s\n' %
+                             (offset, len(buf), read_communication_id(buf)))
+    return index_filename
+
+
+def read_stream_index(index_filename):
+    """Read sidecar index written by :func:`build_stream_index`
+
+    Args:
+        index_filename (str): path of index file
+
+    Returns:
+        list of `(comm_id, offset, length)` tuples, in stream order
+    """
+    entries = []
+    with open(index_filename, encoding='utf-8') as index_file:
+        for line in index_file:
+            (offset, length, comm_id) = line.rstrip('\n').split('\t', 2)
+            entries.append((comm_id, int(offset), int(length)))
+    return entries
 
 
 class CommunicationWriter(object):
@@ -581,16 +1857,24 @@ class CommunicationWriter(object):
             writer.write(existing_comm_object)
     """
 
-    def __init__(self, filename=None, gzip=False):
+    def __init__(self, filename=None, gzip=False, compression=None):
         """
         Args:
             filename (str): if specified, open file at this path
                 during construction (a file can alternatively be opened
                 after construction using the open method)
             gzip (bool): Flag indicating if file should be
-                compressed with gzip
+                compressed with gzip (same as `compression='gz'`)
+            compression (str): Compression to apply to file, one of
+                `None`, `'gz'`, `'bz2'`, `'zst'` (requires the
+                zstandard package) or `'lz4'` (requires the lz4 package)
+
+        Raises:
+            ValueError: if `compression` is not one of these values
         """
         self.gzip = gzip
+        self.compression = 'gz' if gzip else compression
+        _check_compression(self.compression)
         if filename is not None:
             self.open(filename)
 
@@ -603,23 +1887,28 @@ class CommunicationWriter(object):
     def open(self, filename):
         """
         Open specified file for writing.  File will be compressed
-        if the gzip flag of the constructor was set to True.
+        if the gzip flag or compression of the constructor was set.
 
         Args:
             filename (str): path to file to open for writing
         """
-        if self.gzip:
-            self.file = gzip_open(filename, 'wb')
-        else:
-            self.file = open(filename, 'wb')
+        self.file = _open_compressed(filename, self.compression, 'wb')
 
     def write(self, comm):
         """
         Args:
             comm (Communication): communication to write to file
         """
-        thrift_bytes = TSerialization.serialize(
-            comm, protocol_factory=factory.protocolFactory)
+        thrift_bytes = write_thrift_to_buffer(comm)
+        self.file.write(thrift_bytes)
+
+    def write_bytes(self, thrift_bytes):
+        """
+        Args:
+            thrift_bytes (bytes): serialized communication to write
+                to file, as is (e.g. as returned by a
+                :class:`CommunicationReader` with `raw` set to True)
+        """
         self.file.write(thrift_bytes)
 
     def __enter__(self):
@@ -640,7 +1929,8 @@ class CommunicationWriterTar(object):
             writer.write(comm_object_three, 'comm_three.concrete')
     """
 
-    def __init__(self, tar_filename=None, gzip=False):
+    def __init__(self, tar_filename=None, gzip=False, compression=None,
+                 threads=None):
         # Without text on the first line of this docstring, the sphinx 3.0.3 build process
         # (invoked using 'tox run -e docs') fails with the error message:
         #
@@ -662,9 +1952,28 @@ class CommunicationWriterTar(object):
                 during construction (a file can alternatively be opened
                 after construction using the open method)
             gzip (bool): Flag indicating if .tar file should be
-                compressed with gzip
+                compressed with gzip (same as `compression='gz'`)
+            compression (str): Compression to apply to .tar file, one
+                of `None`, `'gz'`, `'bz2'`, `'zst'` (requires the
+                zstandard package) or `'lz4'` (requires the lz4 package)
+            threads (int): if not None, compress the .tar file on this
+                many threads (requires `'gz'` or `'zst'` compression),
+                and serialize the communications passed to
+                :meth:`write_many` on as many more
+
+        Raises:
+            ValueError: if `compression` is not one of these values,
+                or `threads` is set without `'gz'` or `'zst'`
+                compression
         """
         self.gzip = gzip
+        self.compression = 'gz' if gzip else compression
+        _check_compression(self.compression)
+        if threads is not None and self.compression not in ('gz', 'zst'):
+            raise ValueError('threads requires gz or zst compression')
+        self.threads = threads
+        self._compressed_file = None
+        self._executor = None
         if tar_filename is not None:
             self.open(tar_filename)
 
@@ -673,16 +1982,38 @@ class CommunicationWriterTar(object):
         Close tar file.
         '''
         self.tarfile.close()
+        if self._compressed_file is not None:
+            self._compressed_file.close()
+            self._compressed_file = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
     def open(self, tar_filename):
         """
         Open specified tar file for writing.  File will be compressed
-        if the gzip flag of the constructor was set to True.
+        if the gzip flag or compression of the constructor was set.
 
         Args:
             tar_filename (str): path to file to open for writing
         """
-        self.tarfile = tarfile.open(tar_filename, 'w:gz' if self.gzip else 'w')
+        if self.compression in _COMPRESSION_MAGIC or self.threads is not None:
+            # not supported by tarfile, compress the tar stream ourselves
+            self._compressed_file = _open_compressed(
+                tar_filename, self.compression, 'wb', threads=self.threads)
+            self.tarfile = tarfile.open(fileobj=self._compressed_file,
+                                        mode='w|')
+        elif self.compression is not None:
+            self.tarfile = tarfile.open(tar_filename,
+                                        'w:' + self.compression)
+        else:
+            self.tarfile = tarfile.open(tar_filename, 'w')
+        # looking up the user and group names is comparatively slow,
+        # so do it once per file
+        self._owner = (_get_uid(), _get_username(),
+                       _get_gid(), _get_groupname())
+        if self.threads is not None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads)
 
     def write(self, comm, comm_filename=None):
         """
@@ -698,8 +2029,23 @@ class CommunicationWriterTar(object):
         if comm_filename is None:
             comm_filename = comm.id + '.concrete'
 
-        thrift_bytes = TSerialization.serialize(
-            comm, protocol_factory=factory.protocolFactory)
+        thrift_bytes = write_thrift_to_buffer(comm)
+
+        self.write_bytes(thrift_bytes, comm_filename)
+
+    def write_bytes(self, thrift_bytes, comm_filename=None):
+        """
+        Args:
+            thrift_bytes (bytes): serialized communication to write
+                to tar file, as is (e.g. as returned by a
+                :class:`CommunicationReader` with `raw` set to True)
+            comm_filename (str): desired filename of communication
+                within tar file; by default the filename will be the
+                communication id (read from `thrift_bytes`) appended
+                with a .concrete extension
+        """
+        if comm_filename is None:
+            comm_filename = read_communication_id(thrift_bytes) + '.concrete'
 
         file_like_obj = BytesIO(thrift_bytes)
 
@@ -709,13 +2055,29 @@ class CommunicationWriterTar(object):
         comm_tarinfo.size = len(thrift_bytes)
         comm_tarinfo.mode = 0o644
         comm_tarinfo.mtime = time.time()
-        comm_tarinfo.uid = _get_uid()
-        comm_tarinfo.uname = _get_username()
-        comm_tarinfo.gid = _get_gid()
-        comm_tarinfo.gname = _get_groupname()
+        (comm_tarinfo.uid, comm_tarinfo.uname,
+         comm_tarinfo.gid, comm_tarinfo.gname) = self._owner
 
         self.tarfile.addfile(comm_tarinfo, file_like_obj)
 
+    def write_many(self, comms, comm_filenames=None):
+        """
+        Write a batch of communications to the tar file, in order,
+        serializing them on a thread pool if `threads` was set.
+
+        Args:
+            comms: iterable of communications to write to tar file
+            comm_filenames: if not None, iterable of the desired
+                filenames of the communications within the tar file
+                (see :meth:`write`)
+        """
+        comms = list(comms)
+        if comm_filenames is None:
+            comm_filenames = [comm.id + '.concrete' for comm in comms]
+        for (comm_filename, thrift_bytes) in zip(
+                comm_filenames, _serialize_many(self._executor, comms)):
+            self.write_bytes(thrift_bytes, comm_filename)
+
     def __enter__(self):
         return self
 
@@ -733,14 +2095,17 @@ class CommunicationWriterTGZ(CommunicationWriterTar):
             writer.write(comm_object_two, 'comm_two.concrete')
             writer.write(comm_object_three, 'comm_three.concrete')
     """
-    def __init__(self, tar_filename=None):
+    def __init__(self, tar_filename=None, threads=None):
         """
         Args:
             tar_filename (str): if specified, open file at this path
                 during construction (a file can alternatively be opened
                 after construction using the open method)
+            threads (int): if not None, gzip the .tar file on this
+                many threads
         """
-        super(CommunicationWriterTGZ, self).__init__(tar_filename, gzip=True)
+        super(CommunicationWriterTGZ, self).__init__(tar_filename, gzip=True,
+                                                     threads=threads)
 
 
 class CommunicationWriterZip(object):
@@ -754,13 +2119,28 @@ class CommunicationWriterZip(object):
             writer.write(comm_object_three, 'comm_three.concrete')
     '''
 
-    def __init__(self, zip_filename=None):
+    def __init__(self, zip_filename=None, deflate=False, threads=None):
         '''
         Args:
             zip_filename (str): if specified, open file at this path
                 during construction (a file can alternatively be opened
                 after construction using the open method)
+            deflate (bool): if True, compress communications with
+                deflate (by default they are stored uncompressed)
+            threads (int): if not None, serialize the communications
+                passed to :meth:`write_many` on this many threads, while
+                the calling thread deflates them (zipfile compresses
+                members itself, releasing the GIL as it does; requires
+                `deflate`)
+
+        Raises:
+            ValueError: if `threads` is set and `deflate` is not
         '''
+        if threads is not None and not deflate:
+            raise ValueError('threads requires deflate')
+        self.deflate = deflate
+        self.threads = threads
+        self._executor = None
         if zip_filename is not None:
             self.open(zip_filename)
 
@@ -771,13 +2151,20 @@ class CommunicationWriterZip(object):
         Args:
             zip_filename (str): path to file to open for writing
         '''
-        self.zip_f = zipfile.ZipFile(zip_filename, 'w')
+        self.zip_f = zipfile.ZipFile(
+            zip_filename, 'w',
+            zipfile.ZIP_DEFLATED if self.deflate else zipfile.ZIP_STORED)
+        if self.threads is not None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads)
 
     def close(self):
         '''
         Close zip file.
         '''
         self.zip_f.close()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
     def write(self, comm, comm_filename=None):
         '''
@@ -795,13 +2182,517 @@ class CommunicationWriterZip(object):
         if comm_filename is None:
             comm_filename = comm.id + '.concrete'
 
-        thrift_bytes = TSerialization.serialize(
-            comm, protocol_factory=factory.protocolFactory)
+        thrift_bytes = write_thrift_to_buffer(comm)
+
+        self.write_bytes(thrift_bytes, comm_filename)
+
+    def write_bytes(self, thrift_bytes, comm_filename=None):
+        '''
+        Write serialized communication to zip file.
+
+        Args:
+            thrift_bytes (bytes): serialized communication to write
+                to zip file, as is (e.g. as returned by a
+                :class:`CommunicationReader` with `raw` set to True)
+            comm_filename (str): desired filename of communication
+                within zip file; by default the filename will be the
+                communication id (read from `thrift_bytes`) appended
+                with a .concrete extension
+        '''
+        if comm_filename is None:
+            comm_filename = read_communication_id(thrift_bytes) + '.concrete'
 
         self.zip_f.writestr(comm_filename, thrift_bytes)
 
+    def write_many(self, comms, comm_filenames=None):
+        '''
+        Write a batch of communications to the zip file, in order,
+        serializing them on a thread pool if `threads` was set.
+
+        Args:
+            comms: iterable of communications to write to zip file
+            comm_filenames: if not None, iterable of the desired
+                filenames of the communications within the zip file
+                (see :meth:`write`)
+        '''
+        comms = list(comms)
+        if comm_filenames is None:
+            comm_filenames = [comm.id + '.concrete' for comm in comms]
+        for (comm_filename, thrift_bytes) in zip(
+                comm_filenames, _serialize_many(self._executor, comms)):
+            self.write_bytes(thrift_bytes, comm_filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+BLOCK_GZIP_INDEX_SUFFIX = '.blocks'
+
+BLOCK_GZIP_BLOCK_SIZE = 1 << 16
+
+BLOCK_GZIP_PENDING_BLOCKS_PER_THREAD = 4
+
+
+class BlockGzipCommunicationWriter(CommunicationWriter):
+    """Class for writing Communications to a block-compressed gzip
+    stream
+
+    Communications are buffered into blocks of roughly `block_size`
+    (uncompressed) bytes, always ending on a Communication boundary,
+    and each block is written as an independent gzip member.  The
+    output is an ordinary multi-member gzip file of concatenated
+    Communications (readable by :class:`CommunicationReader`), but
+    because blocks can be decompressed independently it can also be
+    read in parallel and seeked into by
+    :class:`BlockGzipCommunicationReader`, using the sidecar block
+    index written alongside it.
+
+    Each line of the block index contains the byte offset and length
+    of a compressed block, the offset and length of one Communication
+    within the decompressed block, and the id of that Communication,
+    separated by tabs.
+
+    Sample usage::
+
+        with BlockGzipCommunicationWriter('foo.concrete.gz') as writer:
+            for comm in comms:
+                writer.write(comm)
+    """
+
+    def __init__(self, filename=None, block_size=BLOCK_GZIP_BLOCK_SIZE,
+                 index_filename=None):
+        """
+        Args:
+            filename (str): if specified, open file at this path
+                during construction (a file can alternatively be opened
+                after construction using the open method)
+            block_size (int): number of uncompressed bytes after which
+                to end the current block (a Communication larger than
+                this is written as a block by itself)
+            index_filename (str): path of block index to write;
+                defaults to the path of the file with
+                `BLOCK_GZIP_INDEX_SUFFIX` appended
+        """
+        self.block_size = block_size
+        self.index_filename = index_filename
+        super(BlockGzipCommunicationWriter, self).__init__(filename)
+
+    def open(self, filename):
+        """
+        Open specified file (and its block index) for writing.
+
+        Args:
+            filename (str): path to file to open for writing
+        """
+        index_filename = self.index_filename
+        if index_filename is None:
+            index_filename = filename + BLOCK_GZIP_INDEX_SUFFIX
+        self.file = open(filename, 'wb')
+        self.index_file = open(index_filename, 'w', encoding='utf-8')
+        self._block = []
+        self._block_bytes = 0
+
+    def close(self):
+        '''
+        Write buffered Communications and close file and block index.
+        '''
+        self._flush_block()
+        self.file.close()
+        self.index_file.close()
+
+    def write(self, comm):
+        """
+        Args:
+            comm (Communication): communication to write to file
+        """
+        self.write_bytes(write_thrift_to_buffer(comm))
+
+    def write_bytes(self, thrift_bytes):
+        """
+        Args:
+            thrift_bytes (bytes): serialized communication to write
+                to file, as is (e.g. as returned by a
+                :class:`CommunicationReader` with `raw` set to True)
+        """
+        self._block.append(thrift_bytes)
+        self._block_bytes += len(thrift_bytes)
+        if self._block_bytes >= self.block_size:
+            self._flush_block()
+
+    def _flush_block(self):
+        '''
+        Compress buffered Communications as one gzip member, write it
+        to file and add its Communications to the block index.
+        '''
+        if not self._block:
+            return
+        block_offset = self.file.tell()
+        block = gzip_compress(b''.join(self._block), mtime=0)
+        self.file.write(block)
+        record_offset = 0
+        for thrift_bytes in self._block:
+            self.index_file.write('%d\t%d\t%d\t%d\t%s\n' % (
+                block_offset, len(block), record_offset, len(thrift_bytes),
+                read_communication_id(thrift_bytes)))
+            record_offset += len(thrift_bytes)
+        self._block = []
+        self._block_bytes = 0
+
+
+def read_block_gzip_index(index_filename):
+    """Read block index written by :class:`BlockGzipCommunicationWriter`
+
+    Args:
+        index_filename (str): path of block index file
+
+    Returns:
+        list of `(comm_id, block_offset, block_length, record_offset,
+        record_length)` tuples, in stream order
+    """
+    entries = []
+    with open(index_filename, encoding='utf-8') as index_file:
+        for line in index_file:
+            fields = line.rstrip('\n').split('\t', 4)
+            entries.append((fields[4],) + tuple(int(f) for f in fields[:4]))
+    return entries
+
+
+def _decompress_block(buf):
+    '''
+    Decompress a single gzip member.  Releases the GIL, so blocks
+    can be decompressed in parallel on a thread pool.
+    '''
+    return zlib.decompress(buf, 16 + zlib.MAX_WBITS)
+
+
+class BlockGzipCommunicationReader(object):
+    """Class for reading Communications from a block-compressed gzip
+    stream written by :class:`BlockGzipCommunicationWriter`
+
+    Iterating over the reader returns `(Communication, filename)`
+    tuples, in stream order, while blocks are read and decompressed
+    ahead of the caller on a pool of `threads` threads.  Individual
+    Communications can be read by id with :meth:`read`, which seeks
+    to and decompresses only the block containing the Communication.
+
+    Sample usage::
+
+        with BlockGzipCommunicationReader('foo.concrete.gz') as reader:
+            for (comm, filename) in reader:
+                do_something(comm)
+            comm = reader.read('some-comm-id')
+    """
+
+    def __init__(self, filename, index_filename=None, add_references=True,
+                 threads=None, fields=None, raw=False):
+        """
+        Args:
+            filename (str): path of block-compressed gzip file
+            index_filename (str): path of block index; defaults to
+                `filename` with `BLOCK_GZIP_INDEX_SUFFIX` appended
+            add_references (bool): If True, calls
+               :func:`concrete.util.references.add_references_to_communication`
+               on all :class:`.Communication` objects read from file
+               (if `'lazy'`, adds the references on first use; if `'weak'`,
+                makes backpointers weak references)
+            threads (int): number of threads to decompress blocks
+                on when iterating; defaults to the number of CPUs
+            fields: If not None, collection of names of
+                :class:`.Communication` fields to deserialize
+            raw (bool): If True, return serialized Communications
+                instead of deserializing them
+
+        Raises:
+            ValueError: if `fields` contains a name that is not a field
+                of :class:`.Communication`
+        """
+        if index_filename is None:
+            index_filename = filename + BLOCK_GZIP_INDEX_SUFFIX
+        self.filename = filename
+        self.index = read_block_gzip_index(index_filename)
+        self.comm_id_to_entry = dict(
+            (entry[0], entry) for entry in self.index)
+        self._add_references = add_references
+        self._thrift_spec = None
+        if fields is not None:
+            self._thrift_spec = projected_thrift_spec(Communication, fields)
+        self._raw = raw
+        self._threads = threads if threads is not None else os.cpu_count()
+        self.file = open(filename, 'rb')
+        # blocks may be read from several threads (e.g. a threaded
+        # fetch server), which share the position of self.file
+        self._file_lock = threading.Lock()
+
+    def close(self):
+        '''
+        Close file (if it was opened).
+        '''
+        f = getattr(self, 'file', None)
+        if f is not None:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __iter__(self):
+        blocks = self._blocks()
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self._threads) as executor:
+            max_pending = self._threads * BLOCK_GZIP_PENDING_BLOCKS_PER_THREAD
+            while True:
+                for (block_offset, block_length, records) in blocks:
+                    pending.append((executor.submit(
+                        _decompress_block,
+                        self._read_block(block_offset, block_length)),
+                        records))
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                (future, records) = pending.popleft()
+                data = future.result()
+                for (record_offset, record_length) in records:
+                    yield (self._decode(data[record_offset:
+                                             record_offset + record_length]),
+                           self.filename)
+
+    def read(self, comm_id):
+        """
+        Return the Communication with the given id, decompressing
+        only the block that contains it.
+
+        Args:
+            comm_id (str): Communication id
+
+        Returns:
+            Communication (or bytes, if `raw` is True)
+
+        Raises:
+            KeyError: if there is no Communication with that id
+        """
+        (_, block_offset, block_length, record_offset, record_length) = \
+            self.comm_id_to_entry[comm_id]
+        data = _decompress_block(self._read_block(block_offset, block_length))
+        return self._decode(data[record_offset:record_offset + record_length])
+
+    def _blocks(self):
+        '''
+        Generate `(block_offset, block_length, records)` tuples from
+        the block index, where records is a list of
+        `(record_offset, record_length)` tuples.
+        '''
+        block = None
+        for (_, block_offset, block_length, record_offset,
+             record_length) in self.index:
+            if block is None or block[0] != block_offset:
+                if block is not None:
+                    yield block
+                block = (block_offset, block_length, [])
+            block[2].append((record_offset, record_length))
+        if block is not None:
+            yield block
+
+    def _read_block(self, block_offset, block_length):
+        with self._file_lock:
+            self.file.seek(block_offset)
+            return self.file.read(block_length)
+
+    def _decode(self, buf):
+        if self._raw:
+            return buf
+        comm = read_thrift_from_buffer(Communication(), buf, self._thrift_spec)
+        if self._add_references:
+            add_references_to_communication(
+                comm, lazy=(self._add_references == 'lazy'),
+                weak=(self._add_references == 'weak'))
+        return comm
+
+
+class ShardedCommunicationWriter(object):
+    '''Class for writing Communications to a set of shard files
+
+    Communications are either written to a sequence of shards, rolling
+    over to a new shard after `max_comms` Communications or
+    `max_bytes` (serialized) bytes, or partitioned into `num_shards`
+    shards by a stable hash of their ids.  Shard paths are formed by
+    filling the shard index into `filename_pattern` (e.g.
+    `'comms-%05d.tar.gz'`), and each shard is written by an instance
+    of `writer_class`.
+
+    Sample usage::
+
+        with ShardedCommunicationWriter('comms-%05d.tar.gz',
+                                        CommunicationWriterTGZ,
+                                        max_comms=1000,
+                                        manifest_filename='manifest.tsv') as writer:
+            for comm in comms:
+                writer.write(comm)
+
+    When the writer is closed, `manifest` contains a list of
+    `(path, num_comms, num_bytes)` tuples, one per shard, which is
+    also written as tab-separated lines to `manifest_filename` if it
+    is not None.
+    '''
+
+    def __init__(self, filename_pattern, writer_class=CommunicationWriter,
+                 max_comms=None, max_bytes=None, num_shards=None,
+                 manifest_filename=None, **writer_kwargs):
+        '''
+        Args:
+            filename_pattern (str): %-format string that yields the
+                path of a shard when formatted with the (integer)
+                shard index
+            writer_class: class used to write each shard, one of
+                :class:`CommunicationWriter`,
+                :class:`CommunicationWriterTar`,
+                :class:`CommunicationWriterTGZ` or
+                :class:`CommunicationWriterZip`
+            max_comms (int): if not None, start a new shard after this
+                many Communications
+            max_bytes (int): if not None, start a new shard once this
+                many serialized bytes have been written to the current
+                one
+            num_shards (int): if not None, partition Communications
+                into this many shards by a hash of their ids (cannot
+                be combined with `max_comms` or `max_bytes`)
+            manifest_filename (str): if not None, path of manifest
+                file to write when closing the writer
+            writer_kwargs: additional keyword arguments passed to
+                `writer_class` (e.g. `compression='zst'`)
+
+        Raises:
+            ValueError: if `num_shards` is combined with `max_comms`
+                or `max_bytes`
+        '''
+        if num_shards is not None and not (max_comms is None and
+                                           max_bytes is None):
+            raise ValueError('num_shards cannot be combined with max_comms '
+                             'or max_bytes')
+        self.filename_pattern = filename_pattern
+        self.writer_class = writer_class
+        self.max_comms = max_comms
+        self.max_bytes = max_bytes
+        self.num_shards = num_shards
+        self.manifest_filename = manifest_filename
+        self._writer_kwargs = writer_kwargs
+
+        self.manifest = []
+        self._writers = []
+        self._closed = False
+        if num_shards is not None:
+            for i in range(num_shards):
+                self._open_shard()
+
+    def _open_shard(self):
+        '''
+        Open next shard, returning its index.
+        '''
+        path = self.filename_pattern % len(self._writers)
+        self._writers.append(self.writer_class(path, **self._writer_kwargs))
+        self.manifest.append([path, 0, 0])
+        return len(self._writers) - 1
+
+    def _shard_for(self, comm_id, num_bytes):
+        '''
+        Return index of shard to write Communication to.
+        '''
+        if self.num_shards is not None:
+            return shard_for_communication_id(comm_id, self.num_shards)
+        if self._writers:
+            (_, shard_comms, shard_bytes) = self.manifest[-1]
+            if not ((self.max_comms is not None and
+                     shard_comms >= self.max_comms) or
+                    (self.max_bytes is not None and shard_comms > 0 and
+                     shard_bytes + num_bytes > self.max_bytes)):
+                return len(self._writers) - 1
+            self._writers[-1].close()
+        return self._open_shard()
+
+    def write(self, comm, comm_filename=None):
+        '''
+        Args:
+            comm (Communication): communication to write
+            comm_filename (str): desired filename of communication
+                within archive shards (ignored for
+                :class:`CommunicationWriter` shards)
+
+        Raises:
+            ValueError: if the writer has been closed
+        '''
+        thrift_bytes = write_thrift_to_buffer(comm)
+        self._write_bytes(thrift_bytes, comm.id, comm_filename)
+
+    def write_bytes(self, thrift_bytes, comm_filename=None):
+        '''
+        Args:
+            thrift_bytes (bytes): serialized communication to write
+            comm_filename (str): desired filename of communication
+                within archive shards (ignored for
+                :class:`CommunicationWriter` shards)
+
+        Raises:
+            ValueError: if the writer has been closed
+        '''
+        self._write_bytes(thrift_bytes, read_communication_id(thrift_bytes),
+                          comm_filename)
+
+    def _write_bytes(self, thrift_bytes, comm_id, comm_filename):
+        if self._closed:
+            raise ValueError('write to closed writer')
+        shard = self._shard_for(comm_id, len(thrift_bytes))
+        writer = self._writers[shard]
+        if isinstance(writer, CommunicationWriter):
+            writer.write_bytes(thrift_bytes)
+        else:
+            if comm_filename is None:
+                comm_filename = comm_id + '.concrete'
+            writer.write_bytes(thrift_bytes, comm_filename)
+        self.manifest[shard][1] += 1
+        self.manifest[shard][2] += len(thrift_bytes)
+
+    def close(self):
+        '''
+        Close open shards and write manifest file (if requested).
+        Closing a closed writer has no effect.
+        '''
+        if self._closed:
+            return
+        self._closed = True
+        if self.num_shards is not None:
+            for writer in self._writers:
+                writer.close()
+        elif self._writers:
+            self._writers[-1].close()
+        self._writers = []
+        self.manifest = [tuple(entry) for entry in self.manifest]
+        if self.manifest_filename is not None:
+            with open(self.manifest_filename, 'w', encoding='utf-8') as f:
+                for (path, num_comms, num_bytes) in self.manifest:
+                    f.write('%s\t%d\t%d\n' % (path, num_comms, num_bytes))
+
     def __enter__(self):
         return self
 
     def __exit__(self, type, value, traceback):
         self.close()
+
+
+def shard_for_communication_id(comm_id, num_shards):
+    '''
+    Return the shard index in `[0, num_shards)` for a Communication
+    id, using a hash that is stable across processes and platforms.
+
+    Args:
+        comm_id (str): Communication id
+        num_shards (int): number of shards
+
+    Returns:
+        int: shard index
+    '''
+    return int(md5(comm_id.encode('utf-8')).hexdigest()[:8], 16) % num_shards
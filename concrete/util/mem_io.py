@@ -1,12 +1,272 @@
 from __future__ import unicode_literals
-from thrift.transport.TTransport import TMemoryBuffer
+from io import BytesIO
+import threading
+
+from thrift.Thrift import TType
+from thrift.transport.TTransport import CReadableTransport, TMemoryBuffer
 
 from .thrift_factory import factory
 from .references import add_references_to_communication
 from ..communication.ttypes import Communication
 
 
-def read_communication_from_buffer(buf, add_references=True):
+def projected_thrift_spec(thrift_type, fields):
+    '''
+    Return a copy of the `thrift_spec` of a Thrift type in which every
+    field not named in `fields` is dropped.  Deserializing with the
+    returned spec skips the dropped fields at the protocol level,
+    without building Python objects for them.
+
+    Args:
+        thrift_type: Class for Thrift type, e.g. Communication
+        fields: collection of names of (top-level) fields to keep
+
+    Returns:
+        tuple: thrift spec for use with :func:`read_thrift_from_buffer`
+        or :func:`read_thrift_from_protocol`
+
+    Raises:
+        ValueError: if a name in `fields` is not a field of
+            `thrift_type`
+    '''
+    field_names = set(s[2] for s in thrift_type.thrift_spec if s is not None)
+    unknown_fields = set(fields) - field_names
+    if unknown_fields:
+        raise ValueError('%s has no fields %s' % (
+            thrift_type.__name__, ', '.join(sorted(unknown_fields))))
+    return tuple(
+        s if (s is not None and s[2] in fields) else None
+        for s in thrift_type.thrift_spec
+    )
+
+
+def read_thrift_from_protocol(thrift_obj, protocol, thrift_spec=None):
+    '''
+    Read `thrift_obj` from `protocol`, restricted to the fields in
+    `thrift_spec` (as returned by :func:`projected_thrift_spec`) if it
+    is not None.
+
+    Args:
+        thrift_obj: Thrift object to read into
+        protocol: Thrift protocol to read from
+        thrift_spec (tuple): if not None, only read the fields in this
+            spec, skipping all others
+
+    Returns:
+        The Thrift object that was passed in as an argument
+    '''
+    if thrift_spec is None:
+        thrift_obj.read(protocol)
+    elif (protocol._fast_decode is not None and
+            isinstance(protocol.trans, CReadableTransport)):
+        protocol._fast_decode(thrift_obj, protocol,
+                              [thrift_obj.__class__, thrift_spec])
+    else:
+        protocol.readStruct(thrift_obj, thrift_spec)
+    return thrift_obj
+
+
+class _ResettableMemoryBuffer(TMemoryBuffer):
+    '''
+    Memory buffer transport that can be emptied, or refilled with new
+    contents, without allocating a new transport (and protocol).
+    '''
+
+    def reset(self, value=None):
+        '''
+        Replace contents of buffer with `value` (for reading), or
+        empty it (for writing) if `value` is None.
+        '''
+        if value is None:
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        else:
+            self._buffer = BytesIO(value)
+
+
+class ThriftSerializer(object):
+    '''
+    Reusable Thrift serializer and deserializer.
+
+    Each thread using a `ThriftSerializer` gets its own memory buffer
+    transports and protocols, which are created on first use and then
+    reused for every object it serializes or deserializes, removing
+    the per-object setup cost of :mod:`thrift.TSerialization` (which
+    is significant for small objects such as tweets).
+
+    Sample usage::
+
+        serializer = ThriftSerializer()
+        bufs = serializer.serialize_many(comms)
+        comms = serializer.deserialize_many(Communication, bufs)
+    '''
+
+    def __init__(self, protocol_factory=None):
+        '''
+        Args:
+            protocol_factory: Thrift protocol factory; defaults to the
+                (accelerated) compact protocol used throughout concrete
+        '''
+        if protocol_factory is None:
+            protocol_factory = factory.protocolFactory
+        self.protocol_factory = protocol_factory
+        self._local = threading.local()
+
+    def _protocols(self):
+        '''
+        Return tuple containing this thread's write and read protocols.
+        '''
+        protocols = getattr(self._local, 'protocols', None)
+        if protocols is None:
+            protocols = (
+                self.protocol_factory.getProtocol(_ResettableMemoryBuffer()),
+                self.protocol_factory.getProtocol(_ResettableMemoryBuffer()),
+            )
+            self._local.protocols = protocols
+        return protocols
+
+    def serialize(self, thrift_obj):
+        '''
+        Serialize Thrift object and return buffer (binary string).
+
+        Args:
+            thrift_obj: Thrift object to serialize
+
+        Returns:
+            bytes: serialized Thrift object
+        '''
+        (protocol, _) = self._protocols()
+        protocol.trans.reset()
+        try:
+            thrift_obj.write(protocol)
+        except Exception:
+            # protocol may have been left in the middle of a struct
+            self._local.protocols = None
+            raise
+        return protocol.trans.getvalue()
+
+    def deserialize(self, thrift_obj, buf, thrift_spec=None):
+        '''
+        Deserialize buf (a binary string) into `thrift_obj`, restricted
+        to the fields in `thrift_spec` if it is not None.
+
+        Args:
+            thrift_obj: Thrift object to read into
+            buf (bytes): serialized Thrift object
+            thrift_spec (tuple): if not None, only read the fields in
+                this spec (as returned by :func:`projected_thrift_spec`),
+                skipping all others
+
+        Returns:
+            The Thrift object that was passed in as an argument
+        '''
+        (_, protocol) = self._protocols()
+        protocol.trans.reset(buf)
+        try:
+            read_thrift_from_protocol(thrift_obj, protocol, thrift_spec)
+        except Exception:
+            self._local.protocols = None
+            raise
+        # don't hold on to (possibly large) buf
+        protocol.trans.reset(b'')
+        return thrift_obj
+
+    def serialize_many(self, thrift_objs):
+        '''
+        Serialize Thrift objects.
+
+        Args:
+            thrift_objs: iterable of Thrift objects to serialize
+
+        Returns:
+            list of serialized Thrift objects (bytes)
+        '''
+        return [self.serialize(thrift_obj) for thrift_obj in thrift_objs]
+
+    def deserialize_many(self, thrift_type, bufs, thrift_spec=None):
+        '''
+        Deserialize buffers into new objects of type `thrift_type`.
+
+        Args:
+            thrift_type: Class for Thrift type, e.g. Communication
+            bufs: iterable of serialized Thrift objects (bytes)
+            thrift_spec (tuple): if not None, only read the fields in
+                this spec, skipping all others
+
+        Returns:
+            list of Thrift objects
+        '''
+        return [self.deserialize(thrift_type(), buf, thrift_spec)
+                for buf in bufs]
+
+
+_serializer = ThriftSerializer()
+
+
+def serialize_many(thrift_objs):
+    '''
+    Serialize Thrift objects using a shared :class:`ThriftSerializer`.
+
+    Args:
+        thrift_objs: iterable of Thrift objects to serialize
+
+    Returns:
+        list of serialized Thrift objects (bytes)
+    '''
+    return _serializer.serialize_many(thrift_objs)
+
+
+def deserialize_many(thrift_type, bufs, thrift_spec=None):
+    '''
+    Deserialize buffers into new objects of type `thrift_type` using a
+    shared :class:`ThriftSerializer`.
+
+    Args:
+        thrift_type: Class for Thrift type, e.g. Communication
+        bufs: iterable of serialized Thrift objects (bytes)
+        thrift_spec (tuple): if not None, only read the fields in this
+            spec (as returned by :func:`projected_thrift_spec`),
+            skipping all others
+
+    Returns:
+        list of Thrift objects
+    '''
+    return _serializer.deserialize_many(thrift_type, bufs, thrift_spec)
+
+
+def write_thrift_to_buffer(thrift_obj):
+    '''
+    Serialize Thrift object to buffer (binary string) and return
+    buffer.
+
+    Args:
+        thrift_obj: Thrift object to serialize
+
+    Returns:
+        bytes: serialized Thrift object
+    '''
+    return _serializer.serialize(thrift_obj)
+
+
+def read_thrift_from_buffer(thrift_obj, buf, thrift_spec=None):
+    '''
+    Deserialize buf (a binary string) into `thrift_obj`, restricted to
+    the fields in `thrift_spec` if it is not None.
+
+    Args:
+        thrift_obj: Thrift object to read into
+        buf (bytes): serialized Thrift object
+        thrift_spec (tuple): if not None, only read the fields in this
+            spec (as returned by :func:`projected_thrift_spec`),
+            skipping all others
+
+    Returns:
+        The Thrift object that was passed in as an argument
+    '''
+    return _serializer.deserialize(thrift_obj, buf, thrift_spec)
+
+
+def read_communication_from_buffer(buf, add_references=True, fields=None):
     '''
     Deserialize buf (a binary string) and return resulting
     communication.  Add references if requested.
@@ -16,16 +276,30 @@ def read_communication_from_buffer(buf, add_references=True):
         add_references (bool): If True, calls
            :func:`concrete.util.references.add_references_to_communication`
            on :class:`.Communication` read from buffer
+           (if `'lazy'`, adds the references on first use; if `'weak'`,
+            makes backpointers weak references)
+        fields: if not None, collection of names of
+           :class:`.Communication` fields to read (e.g.
+           `{'id', 'text'}`); all other fields are skipped and left
+           unset.  If references are added, `fields` should include
+           every field they refer to (e.g. `sectionList` when reading
+           `entityMentionSetList`).
 
     Returns:
         Communication: Communication read from buffer
+
+    Raises:
+        ValueError: if `fields` contains a name that is not a
+            :class:`.Communication` field
     '''
-    transport_in = TMemoryBuffer(buf)
-    protocol_in = factory.createProtocol(transport_in)
-    comm = Communication()
-    comm.read(protocol_in)
+    thrift_spec = None
+    if fields is not None:
+        thrift_spec = projected_thrift_spec(Communication, fields)
+    comm = read_thrift_from_buffer(Communication(), buf, thrift_spec)
     if add_references:
-        add_references_to_communication(comm)
+        add_references_to_communication(
+            comm, lazy=(add_references == 'lazy'),
+            weak=(add_references == 'weak'))
     return comm
 
 
@@ -40,22 +314,180 @@ def write_communication_to_buffer(comm):
     Returns:
         bytes: serialized communication
     '''
-    transport = TMemoryBuffer()
-    protocol = factory.createProtocol(transport)
-    comm.write(protocol)
-    return transport.getvalue()
+    return _serializer.serialize(comm)
+
+
+# Copy plans of Thrift types, keyed by (type, shared types): pairs of
+# a tuple of the names of fields with immutable (or shared) values,
+# and a tuple of (field name, copier) pairs for the other fields, where
+# copier is a function returning a copy of a (non-None) field value.
+_COPY_PLANS = {}
 
 
-def communication_deep_copy(comm):
+def _value_copier(ttype, type_args, shared_types):
     '''
-    Return deep copy of communication.
+    Return function that copies a value of the Thrift type described
+    by `ttype` and `type_args` (as in a `thrift_spec`), or None if
+    values of that type are immutable or shared.
+    '''
+    if ttype == TType.STRUCT:
+        if type_args[0] in shared_types:
+            return None
+        return _struct_copier(type_args[0], shared_types)
+    elif ttype == TType.LIST:
+        elem_copier = _value_copier(type_args[0], type_args[1], shared_types)
+        if elem_copier is None:
+            return list
+        return lambda value: [elem_copier(v) for v in value]
+    elif ttype == TType.SET:
+        elem_copier = _value_copier(type_args[0], type_args[1], shared_types)
+        if elem_copier is None:
+            return set
+        return lambda value: set(elem_copier(v) for v in value)
+    elif ttype == TType.MAP:
+        key_copier = _value_copier(type_args[0], type_args[1], shared_types)
+        val_copier = _value_copier(type_args[2], type_args[3], shared_types)
+        if key_copier is None and val_copier is None:
+            return dict
+        key_copier = key_copier or (lambda k: k)
+        val_copier = val_copier or (lambda v: v)
+        return lambda value: dict(
+            (key_copier(k), val_copier(v)) for (k, v) in value.items())
+    else:
+        # numbers, strings and binary strings are immutable
+        return None
+
+
+def _struct_copier(thrift_type, shared_types):
+    '''
+    Return function that copies an instance of `thrift_type`.
+    '''
+    flat = all(
+        s[1] not in (TType.STRUCT, TType.LIST, TType.SET, TType.MAP) or
+        (s[1] == TType.STRUCT and s[3][0] in shared_types)
+        for s in thrift_type.thrift_spec if s is not None
+    )
+    if not flat:
+        return lambda value: _copy_struct(value, shared_types)
+
+    # all field values are immutable or shared (e.g. UUID, TextSpan):
+    # a shallow copy of the instance dictionary suffices
+    names = frozenset(s[2] for s in thrift_type.thrift_spec if s is not None)
+
+    def copy_flat_struct(value):
+        obj_dict = getattr(value, '__dict__', None)
+        if obj_dict is None or obj_dict.keys() != names:
+            return _copy_struct(value, shared_types)
+        thrift_copy = thrift_type.__new__(thrift_type)
+        thrift_copy.__dict__ = obj_dict.copy()
+        return thrift_copy
+
+    return copy_flat_struct
+
+
+def _copy_plan(thrift_type, shared_types):
+    key = (thrift_type, shared_types)
+    plan = _COPY_PLANS.get(key)
+    if plan is None:
+        copiers = [
+            (s[2], _value_copier(s[1], s[3], shared_types))
+            for s in thrift_type.thrift_spec if s is not None
+        ]
+        plan = (
+            frozenset(name for (name, copier) in copiers),
+            tuple((name, copier) for (name, copier) in copiers
+                  if copier is not None),
+        )
+        _COPY_PLANS[key] = plan
+    return plan
+
+
+def _copy_struct(thrift_obj, shared_types, skip_fields=()):
+    thrift_type = type(thrift_obj)
+    (names, copiers) = (_COPY_PLANS.get((thrift_type, shared_types)) or
+                        _copy_plan(thrift_type, shared_types))
+    thrift_copy = thrift_type.__new__(thrift_type)
+    obj_dict = getattr(thrift_obj, '__dict__', None)
+    if obj_dict is not None:
+        # fast path: copy instance dictionary, dropping non-Thrift
+        # attributes (e.g. references) if there are any
+        if obj_dict.keys() == names:
+            copy_dict = obj_dict.copy()
+        else:
+            copy_dict = dict((name, obj_dict[name]) for name in names)
+        for name in skip_fields:
+            copy_dict[name] = None
+        for (name, copier) in copiers:
+            value = copy_dict[name]
+            if value is not None:
+                copy_dict[name] = copier(value)
+        thrift_copy.__dict__ = copy_dict
+    else:
+        for name in names:
+            setattr(thrift_copy, name, getattr(thrift_obj, name))
+        for name in skip_fields:
+            setattr(thrift_copy, name, None)
+        for (name, copier) in copiers:
+            value = getattr(thrift_copy, name)
+            if value is not None:
+                setattr(thrift_copy, name, copier(value))
+    return thrift_copy
+
+
+def thrift_deep_copy(thrift_obj, skip_fields=None, shared_types=()):
+    '''
+    Return deep copy of Thrift object, made by walking its
+    `thrift_spec` and cloning structs, lists, sets and maps directly
+    (rather than serializing and deserializing the object).  Like a
+    serialization round trip, only Thrift fields are copied (for
+    example, references added by
+    :func:`concrete.util.references.add_references_to_communication`
+    are not).  Strings and other immutable values are shared between
+    the object and the copy.
+
+    Args:
+        thrift_obj: Thrift object to copy
+        skip_fields: if not None, collection of names of (top-level)
+            fields to leave unset in the copy instead of copying
+        shared_types: collection of Thrift types (e.g.
+            :class:`.UUID`) whose instances are shared between the
+            object and the copy instead of being copied; only safe if
+            they are not modified in place
+
+    Returns:
+        deep copy of thrift_obj
+
+    Raises:
+        ValueError: if `skip_fields` contains a name that is not a
+            field of `thrift_obj`
+    '''
+    if skip_fields is None:
+        skip_fields = ()
+    else:
+        # validate field names
+        projected_thrift_spec(type(thrift_obj), skip_fields)
+    return _copy_struct(thrift_obj, frozenset(shared_types), skip_fields)
+
+
+def communication_deep_copy(comm, skip_fields=None, shared_types=()):
+    '''
+    Return deep copy of communication (see :func:`thrift_deep_copy`).
+    References are not added to the copy.
 
     Args:
         comm (Communication): communication to copy
+        skip_fields: if not None, collection of names of
+            :class:`.Communication` fields to leave unset in the copy
+            (e.g. `{'sectionList'}`)
+        shared_types: collection of Thrift types whose instances are
+            shared between comm and the copy instead of being copied
 
     Returns:
         Communication: deep copy of comm
+
+    Raises:
+        ValueError: if `skip_fields` contains a name that is not a
+            :class:`.Communication` field
     '''
-    return read_communication_from_buffer(
-        write_communication_to_buffer(comm), add_references=False
-    )
+    return thrift_deep_copy(comm, skip_fields=skip_fields,
+                            shared_types=shared_types)
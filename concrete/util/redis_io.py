@@ -40,6 +40,8 @@ def read_communication_from_redis_key(redis_db, key, add_references=True):
         add_references (bool): If True, calls
            :func:`concrete.util.references.add_references_to_communication`
            on :class:`.Communication` read from file
+           (if `'lazy'`, adds the references on first use; if `'weak'`,
+            makes backpointers weak references)
     '''
     buf = redis_db.get(key)
     if buf is None:
@@ -388,7 +390,9 @@ class RedisCommunicationReader(RedisReader):
                 communication according to UUID relationships (see
                 concrete.util.add_references), False to return
                 communication as-is (note: you may need this False
-                if you are dealing with incomplete communications)
+                if you are dealing with incomplete communications),
+                `'lazy'` to add the references on first use, or
+                `'weak'` to make backpointers weak references
 
         All other keyword arguments are passed through to RedisReader;
         see :class:`.RedisReader` for a description of those
@@ -4,15 +4,50 @@
 """
 from __future__ import unicode_literals
 
+import threading
+import weakref
+
 from .unnone import lun
 
 
-def add_references_to_communication(comm):
+# Names of the reference variables added by
+# add_references_to_communication, keyed by name of Concrete type
+REFERENCE_ATTRIBUTES = {
+    'Argument': ('entity', 'situation'),
+    'Communication': (
+        'entityForUUID',
+        'entityMentionForUUID',
+        'sectionForUUID',
+        'sentenceForUUID',
+        'situationForUUID',
+        'situationMentionForUUID',
+        'tokenizationForUUID',
+        # annotation lists whose references have been added, if they
+        # are added lazily
+        '_lazyReferences',
+    ),
+    'Entity': ('mentionList', 'entitySet'),
+    'EntityMention': (
+        'childMentionList', 'parentMention', 'entityMentionSet',
+    ),
+    'MentionArgument': ('entityMention', 'situationMention'),
+    'Situation': ('mentionList', 'situationSet'),
+    'SituationMention': ('situationMentionSet',),
+    'TokenRefSequence': ('tokenization',),
+    'Tokenization': ('sentence',),
+}
+
+
+def add_references_to_communication(comm, lazy=False, weak=False):
     """Create references for each :class:`.UUID` 'pointer'
 
     Args:
         comm (Communication): A Concrete Communication object,
             will be modified by this function
+        lazy (bool): If True, add the references on first use rather
+            than immediately (see below)
+        weak (bool): If True, make backpointers weak references (see
+            below)
 
     The Concrete schema uses :class:`.UUID` objects as internal
     pointers between Concrete objects.  This function adds member
@@ -52,114 +87,619 @@ def add_references_to_communication(comm):
     the new variable to `None` - it **DOES NOT** leave the variable
     undefined.
 
+    Adding all references walks every annotation in the
+    Communication.  If `lazy` is True, the class of `comm` is instead
+    changed to a subclass of its class (so `isinstance` checks still
+    pass) that adds the references of each annotation list on first
+    access: reading `comm.entitySetList` or `comm.entityForUUID`, for
+    example, adds the references of the entities (and of the entity
+    mentions and tokenizations they refer to, but not of situations),
+    so code that only reads `comm.text` adds no references at all.
+    Assigning a new list to `comm.entitySetList` (say) drops the
+    references of the entities, which are added again on next access.
+    Pickling and copying a lazily-referenced Communication yield a
+    lazily-referenced Communication.
+
+    The backpointers (`sentence`, `parentMention`, `entityMentionSet`,
+    `entitySet`, `situationMentionSet` and `situationSet`) make the
+    Communication a cyclic graph, which is only freed by Python's
+    cyclic garbage collector.  If `weak` is True, backpointers are
+    instead :func:`weakref.proxy` objects: they behave like the
+    objects they point to (but are not identical to them, so compare
+    them using `==` rather than `is`), they cannot be pickled, and
+    using one raises :class:`ReferenceError` once the rest of the
+    Communication has been freed.  The Communication is then freed as
+    soon as it is no longer used.
+
     """
-#    comm.dependencyParseForUUID = {}
-    comm.entityForUUID = {}
-    comm.entityMentionForUUID = {}
-#    comm.parseForUUID = {}
+    if lazy:
+        _add_lazy_references(comm, weak)
+        return
+
+    _remove_lazy_references(comm)
+    ref = _backpointer_function(weak)
+    for (field, (names, add_references, dependencies)) in _LAYERS:
+        add_references(comm, ref)
+
+
+def _strong_backpointer(obj):
+    return obj
+
+
+def _backpointer_function(weak):
+    return weakref.proxy if weak else _strong_backpointer
+
+
+def _add_section(comm, section, ref):
+    comm.sectionForUUID[section.uuid.uuidString] = section
+    if section.sentenceList:
+        for sentence in section.sentenceList:
+            comm.sentenceForUUID[sentence.uuid.uuidString] = sentence
+            if sentence.tokenization:
+                comm.tokenizationForUUID[
+                    sentence.tokenization.uuid.uuidString] = \
+                    sentence.tokenization
+                sentence.tokenization.sentence = ref(sentence)
+
+
+def _remove_section(comm, section):
+    comm.sectionForUUID.pop(section.uuid.uuidString, None)
+    if section.sentenceList:
+        for sentence in section.sentenceList:
+            comm.sentenceForUUID.pop(sentence.uuid.uuidString, None)
+            if sentence.tokenization:
+                comm.tokenizationForUUID.pop(
+                    sentence.tokenization.uuid.uuidString, None)
+
+
+def _add_entity_mention_set(comm, entityMentionSet, ref):
+    for entityMention in entityMentionSet.mentionList:
+        comm.entityMentionForUUID[entityMention.uuid.uuidString] = \
+            entityMention
+        try:
+            entityMention.tokens.tokenization = \
+                comm.tokenizationForUUID[
+                    entityMention.tokens.tokenizationId.uuidString]
+        except KeyError:
+            entityMention.tokens.tokenization = None
+        # childMentionList and parentMention are in-memory references,
+        # and not part of the Concrete schema
+        entityMention.childMentionList = []
+        entityMention.parentMention = None
+        entityMention.entityMentionSet = ref(entityMentionSet)
+    for entityMention in entityMentionSet.mentionList:
+        if entityMention.childMentionIdList:
+            for childMentionId in entityMention.childMentionIdList:
+                childMention = comm.entityMentionForUUID[
+                    childMentionId.uuidString]
+                childMention.parentMention = ref(entityMention)
+                entityMention.childMentionList.append(childMention)
+
+
+def _remove_entity_mention_set(comm, entityMentionSet):
+    for entityMention in entityMentionSet.mentionList:
+        comm.entityMentionForUUID.pop(entityMention.uuid.uuidString, None)
+
+
+def _add_entity_set(comm, entitySet, ref):
+    for entity in entitySet.entityList:
+        comm.entityForUUID[entity.uuid.uuidString] = entity
+        entity.mentionList = []
+        for mentionId in entity.mentionIdList:
+            entity.mentionList.append(
+                comm.entityMentionForUUID[mentionId.uuidString])
+        entity.entitySet = ref(entitySet)
+
+
+def _remove_entity_set(comm, entitySet):
+    for entity in entitySet.entityList:
+        comm.entityForUUID.pop(entity.uuid.uuidString, None)
+
+
+def _add_situation_mention_set(comm, situationMentionSet, ref):
+    for situationMention in situationMentionSet.mentionList:
+        comm.situationMentionForUUID[situationMention.uuid.uuidString] = \
+            situationMention
+        for argument in lun(situationMention.argumentList):
+            if argument.entityMentionId:
+                argument.entityMention = comm.entityMentionForUUID[
+                    argument.entityMentionId.uuidString]
+            else:
+                argument.entityMention = None
+            if argument.situationMentionId:
+                argument.situationMention = \
+                    comm.situationMentionForUUID[
+                        argument.situationMentionId.uuidString]
+            else:
+                argument.situationMention = None
+            if argument.tokens:
+                argument.tokens.tokenization = \
+                    comm.tokenizationForUUID[
+                        argument.tokens.tokenizationId.uuidString]
+        if situationMention.tokens:
+            try:
+                situationMention.tokens.tokenization = \
+                    comm.tokenizationForUUID[
+                        situationMention.tokens.tokenizationId.uuidString]
+            except KeyError:
+                situationMention.tokens.tokenization = None
+        situationMention.situationMentionSet = ref(situationMentionSet)
+
+
+def _remove_situation_mention_set(comm, situationMentionSet):
+    for situationMention in situationMentionSet.mentionList:
+        comm.situationMentionForUUID.pop(
+            situationMention.uuid.uuidString, None)
+
+
+def _add_situation_set(comm, situationSet, ref):
+    for situation in situationSet.situationList:
+        comm.situationForUUID[situation.uuid.uuidString] = situation
+        if situation.mentionIdList:
+            situation.mentionList = []
+            for mentionId in situation.mentionIdList:
+                situation.mentionList.append(
+                    comm.situationMentionForUUID[mentionId.uuidString])
+        else:
+            situation.mentionList = None
+        for argument in lun(situation.argumentList):
+            if argument.entityId:
+                argument.entity = comm.entityForUUID[
+                    argument.entityId.uuidString]
+            else:
+                argument.entity = None
+            if argument.situationId:
+                argument.situation = comm.situationForUUID[
+                    argument.situationId.uuidString]
+            else:
+                argument.situation = None
+        situation.situationSet = ref(situationSet)
+
+
+def _remove_situation_set(comm, situationSet):
+    for situation in situationSet.situationList:
+        comm.situationForUUID.pop(situation.uuid.uuidString, None)
+
+
+def _add_section_references(comm, ref):
     comm.sectionForUUID = {}
     comm.sentenceForUUID = {}
-    comm.situationForUUID = {}
-    comm.situationMentionForUUID = {}
     comm.tokenizationForUUID = {}
-#    comm.tokenTaggingForUUID = {}
-
-    if comm.sectionList:
-        for section in comm.sectionList:
-            comm.sectionForUUID[section.uuid.uuidString] = section
-            if section.sentenceList:
-                for sentence in section.sentenceList:
-                    comm.sentenceForUUID[sentence.uuid.uuidString] = sentence
-                    if sentence.tokenization:
-                        comm.tokenizationForUUID[
-                            sentence.tokenization.uuid.uuidString] = \
-                            sentence.tokenization
-                        sentence.tokenization.sentence = sentence
-
-    if comm.entityMentionSetList:
-        for entityMentionSet in comm.entityMentionSetList:
-            for entityMention in entityMentionSet.mentionList:
-                comm.entityMentionForUUID[entityMention.uuid.uuidString] = \
-                    entityMention
-                try:
-                    entityMention.tokens.tokenization = \
-                        comm.tokenizationForUUID[
-                            entityMention.tokens.tokenizationId.uuidString]
-                except KeyError:
-                    entityMention.tokens.tokenization = None
-                # childMentionList and parentMention are in-memory references,
-                # and not part of the Concrete schema
-                entityMention.childMentionList = []
-                entityMention.parentMention = None
-                entityMention.entityMentionSet = entityMentionSet
-            for entityMention in entityMentionSet.mentionList:
-                if entityMention.childMentionIdList:
-                    for childMentionId in entityMention.childMentionIdList:
-                        childMention = comm.entityMentionForUUID[
-                            childMentionId.uuidString]
-                        childMention.parentMention = entityMention
-                        entityMention.childMentionList.append(childMention)
-
-    if comm.entitySetList:
-        for entitySet in comm.entitySetList:
-            for entity in entitySet.entityList:
-                comm.entityForUUID[entity.uuid.uuidString] = entity
-                entity.mentionList = []
-                for mentionId in entity.mentionIdList:
-                    entity.mentionList.append(
-                        comm.entityMentionForUUID[mentionId.uuidString])
-                entity.entitySet = entitySet
-
-    if comm.situationMentionSetList:
-        for situationMentionSet in comm.situationMentionSetList:
-            for situationMention in situationMentionSet.mentionList:
-                comm.situationMentionForUUID[situationMention.uuid.uuidString]\
-                    = situationMention
-                for argument in lun(situationMention.argumentList):
-                    if argument.entityMentionId:
-                        argument.entityMention = comm.entityMentionForUUID[
-                            argument.entityMentionId.uuidString]
-                    else:
-                        argument.entityMention = None
-                    if argument.situationMentionId:
-                        argument.situationMention = \
-                            comm.situationMentionForUUID[
-                                argument.situationMentionId.uuidString]
-                    else:
-                        argument.situationMention = None
-                    if argument.tokens:
-                        argument.tokens.tokenization = \
-                            comm.tokenizationForUUID[
-                                argument.tokens.tokenizationId.uuidString]
-                if situationMention.tokens:
-                    try:
-                        situationMention.tokens.tokenization = \
-                            comm.tokenizationForUUID[
-                                situationMention.tokens.
-                                tokenizationId.uuidString
-                            ]
-                    except KeyError:
-                        situationMention.tokens.tokenization = None
-                situationMention.situationMentionSet = situationMentionSet
-
-    if comm.situationSetList:
-        for situationSet in comm.situationSetList:
-            for situation in situationSet.situationList:
-                comm.situationForUUID[situation.uuid.uuidString] = situation
-                if situation.mentionIdList:
-                    situation.mentionList = []
-                    for mentionId in situation.mentionIdList:
-                        situation.mentionList.append(
-                            comm.situationMentionForUUID[mentionId.uuidString])
-                else:
-                    situation.mentionList = None
-                for argument in lun(situation.argumentList):
-                    if argument.entityId:
-                        argument.entity = comm.entityForUUID[argument.entityId.uuidString]
-                    else:
-                        argument.entity = None
-                    if argument.situationId:
-                        argument.situation = comm.situationForUUID[argument.situationId.uuidString]
-                    else:
-                        argument.situation = None
-                situation.situationSet = situationSet
+    for section in lun(comm.sectionList):
+        _add_section(comm, section, ref)
+
+
+def _add_entity_mention_references(comm, ref):
+    comm.entityMentionForUUID = {}
+    for entityMentionSet in lun(comm.entityMentionSetList):
+        _add_entity_mention_set(comm, entityMentionSet, ref)
+
+
+def _add_entity_references(comm, ref):
+    comm.entityForUUID = {}
+    for entitySet in lun(comm.entitySetList):
+        _add_entity_set(comm, entitySet, ref)
+
+
+def _add_situation_mention_references(comm, ref):
+    comm.situationMentionForUUID = {}
+    for situationMentionSet in lun(comm.situationMentionSetList):
+        _add_situation_mention_set(comm, situationMentionSet, ref)
+
+
+def _add_situation_references(comm, ref):
+    comm.situationForUUID = {}
+    for situationSet in lun(comm.situationSetList):
+        _add_situation_set(comm, situationSet, ref)
+
+
+# References are added in layers, one per annotation list of the
+# Communication, in this order:
+# (annotation list field,
+#  (names of the Communication maps added,
+#   function adding the references,
+#   fields whose references the function uses))
+_LAYERS = (
+    ('sectionList', (
+        ('sectionForUUID', 'sentenceForUUID', 'tokenizationForUUID'),
+        _add_section_references,
+        (),
+    )),
+    ('entityMentionSetList', (
+        ('entityMentionForUUID',),
+        _add_entity_mention_references,
+        ('sectionList',),
+    )),
+    ('entitySetList', (
+        ('entityForUUID',),
+        _add_entity_references,
+        ('entityMentionSetList',),
+    )),
+    ('situationMentionSetList', (
+        ('situationMentionForUUID',),
+        _add_situation_mention_references,
+        ('sectionList', 'entityMentionSetList'),
+    )),
+    ('situationSetList', (
+        ('situationForUUID',),
+        _add_situation_references,
+        ('entitySetList', 'situationMentionSetList'),
+    )),
+)
+_LAYER_FOR_FIELD = dict(_LAYERS)
+_FIELD_FOR_MAP = dict(
+    (name, field)
+    for (field, (names, add_references, dependencies)) in _LAYERS
+    for name in names
+)
+_DEPENDENT_FIELDS = dict(
+    (field, tuple(
+        other_field
+        for (other_field, (names, add_references, dependencies)) in _LAYERS
+        if field in dependencies
+    ))
+    for (field, layer) in _LAYERS
+)
+
+# Map from Communication types (and whether backpointers are weak) to
+# their lazily-referenced subclasses
+_LAZY_TYPES = {}
+_LAZY_TYPES_LOCK = threading.Lock()
+
+
+def _resolved_fields(comm):
+    # Names of the annotation lists whose references have been added
+    try:
+        return comm._lazyReferences
+    except AttributeError:
+        # e.g. a copy made without calling __init__
+        resolved = set()
+        comm._lazyReferences = resolved
+        return resolved
+
+
+def _resolve(comm, field):
+    resolved = _resolved_fields(comm)
+    if field in resolved:
+        return
+    (names, add_references, dependencies) = _LAYER_FOR_FIELD[field]
+    for dependency in dependencies:
+        _resolve(comm, dependency)
+    # mark field first, so add_references reads the list itself
+    resolved.add(field)
+    try:
+        add_references(comm, _backpointer_function(comm._weakReferences))
+    except Exception:
+        resolved.discard(field)
+        raise
+
+
+def _invalidate(comm, field):
+    resolved = _resolved_fields(comm)
+    if field not in resolved:
+        return
+    resolved.discard(field)
+    (names, add_references, dependencies) = _LAYER_FOR_FIELD[field]
+    for name in names:
+        try:
+            delattr(comm, name)
+        except AttributeError:
+            pass
+    for dependent_field in _DEPENDENT_FIELDS[field]:
+        _invalidate(comm, dependent_field)
+
+
+def _field_accessors(comm_type, field):
+    # Return functions getting and setting the value of a field as
+    # stored by comm_type, bypassing the lazy subclass's property
+    slot = comm_type.__dict__.get(field)
+    if slot is not None:
+        return (slot.__get__, slot.__set__)
+
+    def get_value(comm):
+        try:
+            return comm.__dict__[field]
+        except KeyError:
+            raise AttributeError(field)
+
+    def set_value(comm, value):
+        comm.__dict__[field] = value
+
+    return (get_value, set_value)
+
+
+def _lazy_field(comm_type, field):
+    (get_value, set_value) = _field_accessors(comm_type, field)
+
+    def fget(comm):
+        if field not in _resolved_fields(comm):
+            _resolve(comm, field)
+        return get_value(comm)
+
+    def fset(comm, value):
+        set_value(comm, value)
+        _invalidate(comm, field)
+
+    return property(fget, fset)
+
+
+def _lazy_getattr(comm, name):
+    # Called when normal lookup fails: add the references of the
+    # annotation list a Communication map belongs to
+    field = _FIELD_FOR_MAP.get(name)
+    if field is None or field in _resolved_fields(comm):
+        raise AttributeError(
+            '%r object has no attribute %r' % (type(comm).__name__, name))
+    _resolve(comm, field)
+    return object.__getattribute__(comm, name)
+
+
+def _field_values(comm):
+    # Return dict of Thrift fields of comm, without adding references
+    field_value = type(comm)._fieldValue
+    return dict(
+        (s[2], field_value[s[2]](comm) if s[2] in field_value
+         else getattr(comm, s[2], None))
+        for s in comm.thrift_spec if s is not None)
+
+
+def _lazy_eq(comm, other):
+    if not isinstance(other, comm._eagerType):
+        return False
+    if isinstance(other, type(comm)):
+        return _field_values(comm) == _field_values(other)
+    return _field_values(comm) == dict(
+        (s[2], getattr(other, s[2], None))
+        for s in comm.thrift_spec if s is not None)
+
+
+def _lazy_ne(comm, other):
+    return not comm == other
+
+
+def _lazy_reduce_ex(comm, protocol):
+    return (_lazy_communication,
+            (comm._eagerType, _field_values(comm), comm._weakReferences))
+
+
+def _lazy_communication(comm_type, fields, weak=False):
+    comm = comm_type()
+    for (name, value) in fields.items():
+        setattr(comm, name, value)
+    add_references_to_communication(comm, lazy=True, weak=weak)
+    return comm
+
+
+def _lazy_type(comm_type, weak):
+    with _LAZY_TYPES_LOCK:
+        lazy_type = _LAZY_TYPES.get((comm_type, weak))
+        if lazy_type is None:
+            namespace = dict(
+                __slots__=(),
+                __module__=comm_type.__module__,
+                __getattr__=_lazy_getattr,
+                __eq__=_lazy_eq,
+                __ne__=_lazy_ne,
+                __reduce_ex__=_lazy_reduce_ex,
+                _eagerType=comm_type,
+                _weakReferences=weak,
+                _fieldValue=dict(
+                    (field, _field_accessors(comm_type, field)[0])
+                    for (field, layer) in _LAYERS),
+            )
+            for (field, layer) in _LAYERS:
+                namespace[field] = _lazy_field(comm_type, field)
+            lazy_type = type(comm_type.__name__, (comm_type,), namespace)
+            _LAZY_TYPES[(comm_type, weak)] = lazy_type
+    return lazy_type
+
+
+def _add_lazy_references(comm, weak):
+    comm_type = type(comm).__dict__.get('_eagerType', type(comm))
+    if type(comm) is not comm_type:
+        # drop references added so far
+        for (field, layer) in _LAYERS:
+            _invalidate(comm, field)
+    comm.__class__ = _lazy_type(comm_type, weak)
+    comm._lazyReferences = set()
+
+
+def _remove_lazy_references(comm):
+    comm_type = type(comm).__dict__.get('_eagerType')
+    if comm_type is not None:
+        comm.__class__ = comm_type
+        try:
+            del comm._lazyReferences
+        except AttributeError:
+            pass
+
+
+class ReferenceIndex(object):
+    '''
+    Keep the references of a :class:`.Communication` (see
+    :func:`add_references_to_communication`) up to date as
+    annotations are added to and removed from it, without walking the
+    whole Communication again::
+
+        index = ReferenceIndex(comm)
+        index.add_entity_mention_set(entity_mention_set)
+        index.add_entity_set(entity_set)
+        entity_set.entityList[0].mentionList  # references added
+
+    Each `add_*` method appends an annotation to the corresponding
+    list of the Communication (creating the list if it is None) and
+    adds the references of that annotation only; each `remove_*`
+    method removes an annotation from its list and its UUIDs from the
+    `*ForUUID` maps of the Communication.  An annotation's references
+    are resolved against the annotations already in the
+    Communication, so annotations should be added after those they
+    refer to (e.g. an :class:`.EntitySet` after the
+    :class:`.EntityMentionSet` of its mentions) and removed before
+    them; references to a removed annotation held by other
+    annotations are left as they are.
+
+    Attributes:
+        comm (Communication): Communication being indexed
+    '''
+
+    def __init__(self, comm, add_references=True, weak=False):
+        '''
+        Args:
+            comm (Communication): Communication to index, will be
+                modified by this object
+            add_references (bool): If True, call
+                :func:`add_references_to_communication` on `comm`;
+                set to False if references (including lazy ones) have
+                already been added
+            weak (bool): If True, make backpointers of added
+                annotations weak references (see
+                :func:`add_references_to_communication`), as should be
+                the case if references with weak backpointers have
+                already been added
+        '''
+        self.comm = comm
+        self._ref = _backpointer_function(weak)
+        if add_references:
+            add_references_to_communication(comm, weak=weak)
+
+    def _add(self, field, add_annotation, annotation):
+        annotations = getattr(self.comm, field)
+        if annotations is None:
+            setattr(self.comm, field, [annotation])
+        else:
+            annotations.append(annotation)
+        add_annotation(self.comm, annotation, self._ref)
+
+    def _remove(self, field, remove_annotation, annotation):
+        annotations = getattr(self.comm, field)
+        for (i, other_annotation) in enumerate(lun(annotations)):
+            if other_annotation is annotation:
+                del annotations[i]
+                break
+        else:
+            raise ValueError('annotation not in %s' % field)
+        remove_annotation(self.comm, annotation)
+
+    def add_section(self, section):
+        '''
+        Append section to `comm.sectionList`, adding references to
+        its sentences and tokenizations.
+
+        Args:
+            section (Section): section to add
+        '''
+        self._add('sectionList', _add_section, section)
+
+    def remove_section(self, section):
+        '''
+        Remove section from `comm.sectionList`, with its sentences
+        and tokenizations.
+
+        Args:
+            section (Section): section to remove
+
+        Raises:
+            ValueError: if `section` is not in `comm.sectionList`
+        '''
+        self._remove('sectionList', _remove_section, section)
+
+    def add_entity_mention_set(self, entity_mention_set):
+        '''
+        Append entity mention set to `comm.entityMentionSetList`,
+        adding references to and from its mentions.
+
+        Args:
+            entity_mention_set (EntityMentionSet): mention set to add
+        '''
+        self._add('entityMentionSetList', _add_entity_mention_set,
+                  entity_mention_set)
+
+    def remove_entity_mention_set(self, entity_mention_set):
+        '''
+        Remove entity mention set from `comm.entityMentionSetList`.
+
+        Args:
+            entity_mention_set (EntityMentionSet): mention set to
+                remove
+
+        Raises:
+            ValueError: if `entity_mention_set` is not in
+                `comm.entityMentionSetList`
+        '''
+        self._remove('entityMentionSetList', _remove_entity_mention_set,
+                     entity_mention_set)
+
+    def add_entity_set(self, entity_set):
+        '''
+        Append entity set to `comm.entitySetList`, adding references
+        to and from its entities.
+
+        Args:
+            entity_set (EntitySet): entity set to add
+        '''
+        self._add('entitySetList', _add_entity_set, entity_set)
+
+    def remove_entity_set(self, entity_set):
+        '''
+        Remove entity set from `comm.entitySetList`.
+
+        Args:
+            entity_set (EntitySet): entity set to remove
+
+        Raises:
+            ValueError: if `entity_set` is not in `comm.entitySetList`
+        '''
+        self._remove('entitySetList', _remove_entity_set, entity_set)
+
+    def add_situation_mention_set(self, situation_mention_set):
+        '''
+        Append situation mention set to
+        `comm.situationMentionSetList`, adding references to and from
+        its mentions.
+
+        Args:
+            situation_mention_set (SituationMentionSet): mention set
+                to add
+        '''
+        self._add('situationMentionSetList', _add_situation_mention_set,
+                  situation_mention_set)
+
+    def remove_situation_mention_set(self, situation_mention_set):
+        '''
+        Remove situation mention set from
+        `comm.situationMentionSetList`.
+
+        Args:
+            situation_mention_set (SituationMentionSet): mention set
+                to remove
+
+        Raises:
+            ValueError: if `situation_mention_set` is not in
+                `comm.situationMentionSetList`
+        '''
+        self._remove('situationMentionSetList',
+                     _remove_situation_mention_set, situation_mention_set)
+
+    def add_situation_set(self, situation_set):
+        '''
+        Append situation set to `comm.situationSetList`, adding
+        references to and from its situations.
+
+        Args:
+            situation_set (SituationSet): situation set to add
+        '''
+        self._add('situationSetList', _add_situation_set, situation_set)
+
+    def remove_situation_set(self, situation_set):
+        '''
+        Remove situation set from `comm.situationSetList`.
+
+        Args:
+            situation_set (SituationSet): situation set to remove
+
+        Raises:
+            ValueError: if `situation_set` is not in
+                `comm.situationSetList`
+        '''
+        self._remove('situationSetList', _remove_situation_set,
+                     situation_set)
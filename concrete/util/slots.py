@@ -0,0 +1,172 @@
+"""Compact `__slots__`-based variants of the generated Concrete types
+
+The classes generated by Thrift store their fields in a per-instance
+`__dict__`.  This (opt-in) module provides variants of them that
+declare `__slots__` instead, using much less memory per instance,
+which adds up when many annotated Communications are held in memory::
+
+    from concrete.util.slots import Communication
+
+    comm = read_thrift_from_file(Communication(), 'comm.concrete')
+
+Each variant has the same name, fields and methods as the generated
+type it is derived from, and struct fields of a variant are read as
+variants too.  The reference variables added by
+:func:`concrete.util.references.add_references_to_communication` have
+slots of their own (see
+:data:`concrete.util.references.REFERENCE_ATTRIBUTES`), and instances
+can be weakly referenced, but no other attributes can be added to
+instances.  Variants are not subclasses of the generated types, so
+`isinstance` checks against the generated types fail.
+
+Variants of all generated types are attributes of this module (and
+are returned by :func:`slots_type`); each one is created on first use.
+"""
+from __future__ import unicode_literals
+
+import threading
+
+import concrete
+from thrift.Thrift import TType
+from thrift.TRecursive import fix_spec
+from thrift.transport.TTransport import CReadableTransport
+
+from .references import REFERENCE_ATTRIBUTES
+
+
+# Map from generated types to their variants
+_SLOTS_TYPES = {}
+_SLOTS_TYPES_LOCK = threading.Lock()
+
+
+def _read(self, iprot):
+    if (iprot._fast_decode is not None and
+            isinstance(iprot.trans, CReadableTransport)):
+        iprot._fast_decode(self, iprot, [self.__class__, self.thrift_spec])
+    else:
+        # unlike the generated code, create nested structs from spec
+        iprot.readStruct(self, self.thrift_spec)
+
+
+def _repr(self):
+    return '%s(%s)' % (
+        self.__class__.__name__,
+        ', '.join('%s=%r' % (name, getattr(self, name, None))
+                  for name in self._thrift_field_names))
+
+
+def _eq(self, other):
+    return isinstance(other, self.__class__) and all(
+        getattr(self, name, None) == getattr(other, name, None)
+        for name in self._thrift_field_names)
+
+
+def _is_struct_type(thrift_type):
+    return (
+        isinstance(thrift_type, type) and
+        thrift_type.__bases__ == (object,) and
+        getattr(thrift_type, 'thrift_spec', None) is not None
+    )
+
+
+def _slots_type_args(ttype, type_args, new_types):
+    if ttype == TType.STRUCT:
+        if not _is_struct_type(type_args[0]):
+            # exception types are left as they are
+            return type_args
+        return [_slots_type(type_args[0], new_types), None]
+    elif ttype in (TType.LIST, TType.SET):
+        return (
+            type_args[0],
+            _slots_type_args(type_args[0], type_args[1], new_types),
+            type_args[2],
+        )
+    elif ttype == TType.MAP:
+        return (
+            type_args[0],
+            _slots_type_args(type_args[0], type_args[1], new_types),
+            type_args[2],
+            _slots_type_args(type_args[2], type_args[3], new_types),
+            type_args[4],
+        )
+    else:
+        return type_args
+
+
+def _slots_type(thrift_type, new_types):
+    slots_cls = _SLOTS_TYPES.get(thrift_type)
+    if slots_cls is not None:
+        return slots_cls
+
+    field_names = tuple(
+        s[2] for s in thrift_type.thrift_spec if s is not None)
+    namespace = dict(
+        (key, value) for (key, value) in vars(thrift_type).items()
+        if key not in ('__dict__', '__weakref__', '__module__',
+                       '__qualname__', '__slotnames__', 'thrift_spec'))
+    namespace.update(
+        __slots__=(
+            field_names +
+            REFERENCE_ATTRIBUTES.get(thrift_type.__name__, ()) +
+            ('__weakref__',)
+        ),
+        __module__=__name__,
+        _thrift_field_names=field_names,
+        read=_read,
+        __repr__=_repr,
+        __eq__=_eq,
+    )
+    slots_cls = type(thrift_type.__name__, (object,), namespace)
+
+    # register variant before converting spec, as types may be recursive
+    _SLOTS_TYPES[thrift_type] = slots_cls
+    new_types.append(slots_cls)
+
+    slots_cls.thrift_spec = tuple(
+        None if s is None else
+        (s[0], s[1], s[2], _slots_type_args(s[1], s[3], new_types), s[4])
+        for s in thrift_type.thrift_spec
+    )
+    return slots_cls
+
+
+def slots_type(thrift_type):
+    '''
+    Return `__slots__`-based variant of a generated Concrete type
+    (see module documentation), creating it (and the variants of the
+    types of its fields) if needed.
+
+    Args:
+        thrift_type: generated Thrift struct type (e.g.
+            :class:`.Communication`), or a variant returned by this
+            function (which is returned as is)
+
+    Returns:
+        `__slots__`-based variant of `thrift_type`
+
+    Raises:
+        ValueError: if `thrift_type` is not a generated Thrift struct
+            type
+    '''
+    with _SLOTS_TYPES_LOCK:
+        if thrift_type in _SLOTS_TYPES.values():
+            return thrift_type
+        if not _is_struct_type(thrift_type):
+            raise ValueError(
+                'not a Thrift struct type: %r' % (thrift_type,))
+        new_types = []
+        slots_cls = _slots_type(thrift_type, new_types)
+        # wire up nested specs, as the generated modules do
+        fix_spec(new_types)
+        for new_type in new_types:
+            globals()[new_type.__name__] = new_type
+    return slots_cls
+
+
+def __getattr__(name):
+    # Create variants on first access (including when unpickling)
+    thrift_type = getattr(concrete, name, None)
+    if thrift_type is None or not _is_struct_type(thrift_type):
+        raise AttributeError(
+            'module %r has no attribute %r' % (__name__, name))
+    return slots_type(thrift_type)
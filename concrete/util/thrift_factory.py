@@ -1,4 +1,6 @@
 from __future__ import unicode_literals
+import warnings
+
 from thrift.transport import TSocket
 from thrift.transport import TTransport
 from thrift.protocol import TCompactProtocol
@@ -74,10 +76,6 @@ class ThriftFactory(object):
         return server
 
 
-factory = ThriftFactory(TTransport.TFramedTransportFactory(),
-                        TCompactProtocol.TCompactProtocolAcceleratedFactory())
-
-
 def is_accelerated():
     '''
     Return whether this concrete-python installation has accelerated
@@ -93,3 +91,29 @@ def is_accelerated():
         return True
     except Exception:
         return False
+
+
+def _protocol_factory():
+    '''
+    Return accelerated compact protocol factory if the Thrift C
+    extension is available, or (with a warning) the specialized
+    pure-Python decoder of :mod:`concrete.util.compact_decoder` if not.
+    '''
+    if is_accelerated():
+        return TCompactProtocol.TCompactProtocolAcceleratedFactory()
+    warnings.warn(
+        'The Thrift C extension (thrift.protocol.fastbinary) is not '
+        'available, so concrete-python is NOT accelerated: Thrift '
+        'structures will be decoded by a pure-Python decoder specialized '
+        'to Concrete types and encoded by the generic pure-Python '
+        'protocol, both several times slower.  Run '
+        'examples/benchmark-decoders.py to measure.',
+        RuntimeWarning)
+    # imported here, as generating its readers is only needed (and
+    # only worth the import time) without the C extension
+    from .compact_decoder import SpecializedCompactProtocolFactory
+    return SpecializedCompactProtocolFactory()
+
+
+factory = ThriftFactory(TTransport.TFramedTransportFactory(),
+                        _protocol_factory())
@@ -5,7 +5,7 @@ from ..structure.ttypes import TokenizationKind
 from .unnone import lun
 
 from collections import deque
-from math import log, exp
+from math import log, log1p, exp
 from functools import reduce
 
 
@@ -257,60 +257,76 @@ def get_comm_tokenizations(comm, tool=None):
                 yield sentence.tokenization
 
 
-def _lattice_to_fsm(lattice):
+def _lattice_arcs(lattice):
     '''
-    Return FSM representation of token lattice.
+    Return arcs of token lattice as lists.
 
     Args:
         lattice (TokenLattice): the token lattice to process
 
     Returns:
-        tuple containing four items: 0. arcs represented as
-        a dictionary from source states to dictionaries from
-        destination states to lists of (token, weight) pairs;
-        1. arcs represented as a dictionary from destination states to
-        dictionaries from source states to lists of (token, weight)
-        pairs; 2. the set of tokens; and 3. the set of states.
-    '''
-    fsm = {}
-    bkFsm = {}
-
-    tokens = set()
-    states = set()
-    for arc in lattice.arcList:
-        if arc.src is None:
-            raise ValueError('Arc.src must be set')
-        src = arc.src
-
-        if arc.dst is None:
-            raise ValueError('Arc.dst must be set')
-        dst = arc.dst
+        tuple containing four lists with one item per arc: 0. source
+        states; 1. destination states; 2. token indices; and
+        3. weights.
 
-        if arc.token is None:
-            raise ValueError('Arc.token must be set')
-        token = arc.token.tokenIndex
+    Raises:
+        ValueError: if an arc is missing one of these fields
+    '''
+    arcs = lun(lattice.arcList)
+    srcs = [arc.src for arc in arcs]
+    if None in srcs:
+        raise ValueError('Arc.src must be set')
+    dsts = [arc.dst for arc in arcs]
+    if None in dsts:
+        raise ValueError('Arc.dst must be set')
+    try:
+        tokens = [arc.token.tokenIndex for arc in arcs]
+    except AttributeError:
+        raise ValueError('Arc.token must be set')
+    weights = [arc.weight for arc in arcs]
+    if None in weights:
+        raise ValueError('Arc.weight must be set')
+    return (srcs, dsts, tokens, weights)
 
-        if arc.weight is None:
-            raise ValueError('Arc.weight must be set')
-        wt = arc.weight
 
-        tokens.add(token)
-        states.add(src)
-        states.add(dst)
+def _topological_ranks(srcs, dsts):
+    '''
+    Return dictionary from states to their positions in a topological
+    order of the lattice with the given arcs.
 
-        if src not in fsm:
-            fsm[src] = {}
-        if dst not in fsm[src]:
-            fsm[src][dst] = []
-        fsm[src][dst].append((token, wt))
+    Raises:
+        ValueError: if the lattice contains a cycle
+    '''
+    successors = {}
+    in_degrees = {}
+    for (src, dst) in zip(srcs, dsts):
+        successors.setdefault(src, []).append(dst)
+        successors.setdefault(dst, [])
+        in_degrees[dst] = in_degrees.get(dst, 0) + 1
+    state_queue = deque(
+        state for state in successors if state not in in_degrees)
+    ranks = {}
+    while state_queue:
+        state = state_queue.popleft()
+        ranks[state] = len(ranks)
+        for dst in successors[state]:
+            in_degrees[dst] -= 1
+            if in_degrees[dst] == 0:
+                state_queue.append(dst)
+    if len(ranks) != len(successors):
+        raise ValueError('lattice contains a cycle')
+    return ranks
 
-        if dst not in bkFsm:
-            bkFsm[dst] = {}
-        if src not in bkFsm[dst]:
-            bkFsm[dst][src] = []
-        bkFsm[dst][src].append((token, wt))
 
-    return (fsm, bkFsm, tokens, states)
+def _logaddexp(x, y):
+    '''
+    Return log(exp(x) + exp(y)).
+    '''
+    if x < y:
+        (x, y) = (y, x)
+    if y == float('-inf'):
+        return x
+    return x + log1p(exp(y - x))
 
 
 def _logsumexp(a):
@@ -323,88 +339,292 @@ def _logsumexp(a):
     Returns:
         log of sum of exponentiations of elements in a.
     '''
-    try:
-        from scipy.misc import logsumexp
-        return logsumexp(a)
-    except ImportError:
-        m = max(a)
-        return m + log(sum(map(lambda x: exp(x - m), a)))
+    m = max(a)
+    if m == float('-inf'):
+        return m
+    return m + log(sum(exp(x - m) for x in a))
 
 
-def _calc_marginal_in_log_prob(fsm, states, start, end):
-    """
-    Calculate marginal in-log-probability of each state.
-    """
+def _lattice_expected_counts(lattice):
+    '''
+    Compute expected token log-probabilities of lattice (see
+    :func:`compute_lattice_expected_counts`) in pure Python.
+    '''
+    (srcs, dsts, tokens, weights) = _lattice_arcs(lattice)
+    if not srcs:
+        return []
+    ranks = _topological_ranks(srcs, dsts)
+    # arcs ordered by source state, so that the in-log-probabilities of
+    # all predecessors of a state are final before it is visited
+    arcs = sorted(zip(srcs, dsts, tokens, weights),
+                  key=lambda arc: ranks[arc[0]])
+
+    alpha = dict.fromkeys(ranks, float('-inf'))
+    beta = dict.fromkeys(ranks, float('-inf'))
+    if lattice.startState in alpha:
+        alpha[lattice.startState] = 0.
+    if lattice.endState in beta:
+        beta[lattice.endState] = 0.
+    for (src, dst, token, wt) in arcs:
+        alpha[dst] = _logaddexp(alpha[dst], alpha[src] + wt)
+    for (src, dst, token, wt) in reversed(arcs):
+        beta[src] = _logaddexp(beta[src], beta[dst] + wt)
+
+    norm = alpha.get(lattice.endState, float('-inf'))
+    if norm == float('-inf'):
+        raise ValueError('lattice has no path from startState to endState')
 
-    alpha = {}
-    alpha[start] = 0.
+    expectedCounts = {}
+    for (src, dst, token, wt) in arcs:
+        if token not in expectedCounts:
+            expectedCounts[token] = []
+        expectedCounts[token].append(alpha[src] + beta[dst] + wt - norm)
+
+    return [
+        (_logsumexp(expectedCounts[idx]) if idx in expectedCounts else None)
+        for idx in range(max(expectedCounts) + 1)
+    ]
 
-    state_queue = deque([start])
 
-    while state_queue:
-        currState = state_queue.popleft()
+def _state_key(numpy, lattice_indices, states):
+    # unique int64 key for each (lattice, state) pair (states are i32)
+    return ((lattice_indices.astype(numpy.int64) << 32) |
+            (states.astype(numpy.int64) + 2 ** 31))
+
+
+def _state_levels(numpy, num_states, src, dst):
+    '''
+    Return array of the length of the longest path ending at each
+    state of the lattice (or lattices) with arcs from states `src`
+    to states `dst` (states are integers below `num_states`).
 
-        if currState == end:
+    Raises:
+        ValueError: if the lattice contains a cycle
+    '''
+    in_degrees = numpy.bincount(dst, minlength=num_states)
+    out_degrees = numpy.bincount(src, minlength=num_states)
+    out_starts = numpy.cumsum(out_degrees) - out_degrees
+    out_dsts = dst[numpy.argsort(src, kind='stable')]
+
+    levels = numpy.zeros(num_states, dtype=numpy.int64)
+    frontier = numpy.flatnonzero(in_degrees == 0)
+    level = 0
+    num_visited = 0
+    while frontier.size:
+        levels[frontier] = level
+        num_visited += frontier.size
+        # gather arcs leaving the frontier from their (contiguous)
+        # ranges in out_dsts
+        counts = out_degrees[frontier]
+        num_arcs = counts.sum()
+        offsets = numpy.repeat(
+            out_starts[frontier] - (numpy.cumsum(counts) - counts), counts)
+        (successors, num_arcs_in) = numpy.unique(
+            out_dsts[offsets + numpy.arange(num_arcs)], return_counts=True)
+        in_degrees[successors] -= num_arcs_in
+        frontier = successors[in_degrees[successors] == 0]
+        level += 1
+    if num_visited != num_states:
+        raise ValueError('lattice contains a cycle')
+    return levels
+
+
+def _propagate_log_probs(numpy, scores, from_states, to_states, weights,
+                         levels):
+    '''
+    Add the log-probability of every path into each state to scores,
+    in place, one level of states at a time (in increasing order of
+    levels).
+    '''
+    order = numpy.lexsort((to_states, levels[to_states]))
+    from_states = from_states[order]
+    to_states = to_states[order]
+    weights = weights[order]
+    to_levels = levels[to_states]
+
+    # segments of arcs into the same state, and ranges of arcs and
+    # segments for each level
+    segments = numpy.flatnonzero(
+        numpy.r_[True, to_states[1:] != to_states[:-1]])
+    level_bounds = numpy.r_[
+        0, numpy.flatnonzero(to_levels[1:] != to_levels[:-1]) + 1,
+        len(to_states)]
+    segment_bounds = numpy.searchsorted(segments, level_bounds)
+
+    for i in range(len(level_bounds) - 1):
+        (start, end) = level_bounds[i:i + 2]
+        (segment_start, segment_end) = segment_bounds[i:i + 2]
+        level_segments = segments[segment_start:segment_end]
+        states = to_states[level_segments]
+        scores[states] = numpy.logaddexp(
+            scores[states],
+            numpy.logaddexp.reduceat(
+                scores[from_states[start:end]] + weights[start:end],
+                level_segments - start))
+
+
+def _batch_expected_counts_numpy(numpy, lattices):
+    '''
+    Compute expected token log-probabilities of each lattice (see
+    :func:`compute_lattice_expected_counts`) using NumPy, processing
+    all lattices at once.
+    '''
+    arc_lists = [_lattice_arcs(lattice) for lattice in lattices]
+    num_arcs = numpy.array([len(arcs[0]) for arcs in arc_lists],
+                           dtype=numpy.int64)
+    if not num_arcs.sum():
+        return [[] for lattice in lattices]
+    lattice_indices = numpy.repeat(numpy.arange(len(lattices)), num_arcs)
+    (src, dst, tokens) = (
+        numpy.array([x for arcs in arc_lists for x in arcs[i]],
+                    dtype=numpy.int64)
+        for i in range(3))
+    weights = numpy.array([x for arcs in arc_lists for x in arcs[3]],
+                          dtype=numpy.float64)
+
+    # number the states of all lattices consecutively
+    (state_keys, state_ids) = numpy.unique(
+        numpy.concatenate([_state_key(numpy, lattice_indices, src),
+                           _state_key(numpy, lattice_indices, dst)]),
+        return_inverse=True)
+    src = state_ids[:len(src)]
+    dst = state_ids[len(src):]
+    levels = _state_levels(numpy, len(state_keys), src, dst)
+
+    def state_ids_for(states):
+        # return ids of states, and mask of those that are in lattices
+        is_set = numpy.array([state is not None for state in states])
+        keys = _state_key(numpy, numpy.arange(len(lattices)), numpy.array(
+            [0 if state is None else state for state in states],
+            dtype=numpy.int64))
+        ids = numpy.minimum(numpy.searchsorted(state_keys, keys),
+                            len(state_keys) - 1)
+        return (ids, is_set & (state_keys[ids] == keys))
+
+    (start_ids, has_start) = state_ids_for(
+        [lattice.startState for lattice in lattices])
+    (end_ids, has_end) = state_ids_for(
+        [lattice.endState for lattice in lattices])
+
+    alpha = numpy.full(len(state_keys), -numpy.inf)
+    alpha[start_ids[has_start]] = 0.
+    _propagate_log_probs(numpy, alpha, src, dst, weights, levels)
+    beta = numpy.full(len(state_keys), -numpy.inf)
+    beta[end_ids[has_end]] = 0.
+    _propagate_log_probs(numpy, beta, dst, src, weights, -levels)
+
+    norms = numpy.where(has_end, alpha[end_ids], -numpy.inf)
+    if numpy.any((norms == -numpy.inf) & (num_arcs > 0)):
+        raise ValueError('lattice has no path from startState to endState')
+
+    # sum arc posteriors by lattice and token
+    posteriors = alpha[src] + beta[dst] + weights - norms[lattice_indices]
+    token_keys = _state_key(numpy, lattice_indices, tokens)
+    order = numpy.argsort(token_keys, kind='stable')
+    token_keys = token_keys[order]
+    segments = numpy.flatnonzero(
+        numpy.r_[True, token_keys[1:] != token_keys[:-1]])
+    counts = numpy.logaddexp.reduceat(posteriors[order], segments)
+
+    expected_counts = [[] for lattice in lattices]
+    for (key, count) in zip(token_keys[segments].tolist(), counts.tolist()):
+        token = (key & 0xffffffff) - 2 ** 31
+        if token < 0:
             continue
+        lattice_counts = expected_counts[key >> 32]
+        lattice_counts.extend([None] * (token + 1 - len(lattice_counts)))
+        lattice_counts[token] = count
+    return expected_counts
 
-        arcs = fsm[currState]
 
-        for (dst, tokenWts) in arcs.items():
-            if dst not in alpha:
-                state_queue.append(dst)
-                alpha[dst] = float('-inf')
-            for token, wt in tokenWts:
-                alpha[dst] = _logsumexp([alpha[dst], alpha[currState] + wt])
+_LATTICE_NUMPY_PURPOSE = 'compute lattice expected counts with use_numpy'
 
-    return alpha
+
+def _try_import_numpy(use_numpy):
+    if use_numpy is None:
+        try:
+            return _import_numpy(_LATTICE_NUMPY_PURPOSE)
+        except ImportError:
+            return None
+    elif use_numpy:
+        return _import_numpy(_LATTICE_NUMPY_PURPOSE)
+    else:
+        return None
 
 
-def compute_lattice_expected_counts(lattice):
+def compute_lattice_expected_counts(lattice, use_numpy=False):
     """Given a :class:`.TokenLattice` in which the dst, src, token, and
     weight fields are set in each arc, compute and return a list of
     expected token log-probabilities.
 
     Input arc weights are treated as unnormalized log-probabilities.
+    The lattice must be acyclic; its arcs are processed in topological
+    order (with NumPy, one level of states at a time).
+
+    The NumPy computation takes a step for each level of states (each
+    length of the longest path to a state), so on deep lattices, such
+    as those of speech recognition with a level per frame, it is
+    slower than pure Python; it is only faster on wide, shallow
+    lattices (see `examples/benchmark-lattice-expected-counts.py`).
+    Use :func:`batch_compute_lattice_expected_counts` to process
+    many lattices together with NumPy.
 
     Args:
         lattice (TokenLattice): lattice to compute expected counts for
+        use_numpy (bool): If True, use NumPy (which must be
+            installed); if False or None, use pure Python
 
     Returns:
         List of floats (expected log-probabilities) with the float
-        at position i corresponding to the token with tokenIndex i.
-    """
+        at position i corresponding to the token with tokenIndex i
+        (None if no arc has that token).
 
-    (fsm, bkFsm, tokens, states) = _lattice_to_fsm(lattice)
-    alpha = _calc_marginal_in_log_prob(fsm, states,
-                                       lattice.startState, lattice.endState)
-    beta = _calc_marginal_in_log_prob(bkFsm, states,
-                                      lattice.endState, lattice.startState)
-    norm = alpha[lattice.endState]
+    Raises:
+        ValueError: if an arc is incomplete, the lattice contains a
+            cycle, or it has arcs but no path from `startState` to
+            `endState`
+        ImportError: if `use_numpy` is True and numpy is not installed
+    """
+    if use_numpy:
+        return _batch_expected_counts_numpy(
+            _import_numpy(_LATTICE_NUMPY_PURPOSE), [lattice])[0]
+    else:
+        return _lattice_expected_counts(lattice)
 
-    expectedCounts = {}
 
-    for state in states:
-        currState = state
+def batch_compute_lattice_expected_counts(lattices, use_numpy=None):
+    """Compute expected token log-probabilities of each of a sequence
+    of :class:`.TokenLattice` objects (see
+    :func:`compute_lattice_expected_counts`).
 
-        if currState == lattice.endState:
-            continue
+    With NumPy, the arcs of all lattices are processed together, so
+    that each step of the computation covers a level of states of
+    every lattice; this is much faster than computing the expected
+    counts of the lattices one at a time when they are small.
 
-        arcs = fsm[currState]
+    Args:
+        lattices: iterable of lattices to compute expected counts for
+        use_numpy (bool): If True, use NumPy (which must be
+            installed); if False, use pure Python; if None, use NumPy
+            if it is installed
 
-        for dst, tokenWts in arcs.items():
-            for token, wt in tokenWts:
-                if token not in expectedCounts:
-                    expectedCounts[token] = []
-                expectedCounts[token].append(
-                    alpha[currState] + beta[dst] + wt - norm)
+    Returns:
+        List containing the list of expected log-probabilities
+        returned by :func:`compute_lattice_expected_counts` for each
+        lattice.
 
-    if expectedCounts:
-        return [
-            (_logsumexp(expectedCounts[idx]) if idx in expectedCounts else None)
-            for idx in range(max(expectedCounts) + 1)
-        ]
+    Raises:
+        ValueError: if an arc is incomplete, or a lattice contains a
+            cycle or has arcs but no path from `startState` to
+            `endState`
+        ImportError: if `use_numpy` is True and numpy is not installed
+    """
+    lattices = list(lattices)
+    numpy = _try_import_numpy(use_numpy)
+    if numpy is None:
+        return [_lattice_expected_counts(lattice) for lattice in lattices]
     else:
-        return []
+        return _batch_expected_counts_numpy(numpy, lattices)
 
 
 def get_tokenizations(comm, tool=None):
@@ -431,3 +651,253 @@ def get_tokenizations(comm, tool=None):
                                 sentence.tokenization.metadata.tool == tool):
                             tokenizations.append(sentence.tokenization)
     return tokenizations
+
+
+# Id of strings missing from a frozen Vocabulary, and of tokens that
+# are not tagged, in the arrays returned by get_corpus_token_arrays
+NO_ID = -1
+
+
+class Vocabulary(object):
+    '''
+    Mapping from strings (e.g. token texts or tags) to consecutive
+    integer ids, starting from zero, to which strings are added as
+    they are looked up (unless the vocabulary is frozen).
+
+    Attributes:
+        strings (list): the strings in the vocabulary, indexed by id
+        frozen (bool): if True, :meth:`get_id` returns `NO_ID` for
+            strings that are not in the vocabulary instead of adding
+            them
+    '''
+
+    def __init__(self, strings=(), frozen=False):
+        '''
+        Args:
+            strings: initial strings, which are given ids in order
+            frozen (bool): if True, do not add strings to the
+                vocabulary when they are looked up
+        '''
+        self.strings = []
+        self._ids = {}
+        self.frozen = False
+        for string in strings:
+            self.get_id(string)
+        self.frozen = frozen
+
+    def get_id(self, string):
+        '''
+        Return id of string, adding it to the vocabulary first if
+        it is not in the vocabulary (and the vocabulary is not
+        frozen).
+
+        Args:
+            string (str): string to look up
+
+        Returns:
+            int: id of `string`, or `NO_ID` if it is not in the
+            (frozen) vocabulary
+        '''
+        string_id = self._ids.get(string)
+        if string_id is None:
+            if self.frozen:
+                return NO_ID
+            string_id = len(self.strings)
+            self._ids[string] = string_id
+            self.strings.append(string)
+        return string_id
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, string):
+        return string in self._ids
+
+
+class TokenArrays(object):
+    '''
+    Columnar (NumPy) representation of the tokens of one or more
+    Communications, as returned by :func:`get_corpus_token_arrays`.
+
+    Tokens are numbered consecutively across sentences, sections and
+    Communications.  Boundaries are given as arrays of offsets: the
+    tokens of sentence `i` are those from `sentence_offsets[i]` up to
+    (but not including) `sentence_offsets[i + 1]`, and similarly for
+    sections and Communications.
+
+    Attributes:
+        token_ids (numpy.ndarray): `token_vocab` id of the text of
+            each token
+        starts (numpy.ndarray): `textSpan.start` of each token, or -1
+            if the token has no text span
+        endings (numpy.ndarray): `textSpan.ending` of each token, or -1
+            if the token has no text span
+        sentence_offsets (numpy.ndarray): index of the first token of
+            each sentence, followed by the number of tokens
+        section_offsets (numpy.ndarray): index of the first token of
+            each section, followed by the number of tokens
+        comm_offsets (numpy.ndarray): index of the first token of each
+            Communication, followed by the number of tokens
+        tag_ids (dict): map from tagging type to array containing
+            `tag_vocabs[tagging_type]` id of the tag of each token, or
+            `NO_ID` if the token is not tagged
+        token_vocab (Vocabulary): vocabulary of token texts
+        tag_vocabs (dict): map from tagging type to vocabulary of tags
+    '''
+
+    def __init__(self, token_ids, starts, endings, sentence_offsets,
+                 section_offsets, comm_offsets, tag_ids, token_vocab,
+                 tag_vocabs):
+        self.token_ids = token_ids
+        self.starts = starts
+        self.endings = endings
+        self.sentence_offsets = sentence_offsets
+        self.section_offsets = section_offsets
+        self.comm_offsets = comm_offsets
+        self.tag_ids = tag_ids
+        self.token_vocab = token_vocab
+        self.tag_vocabs = tag_vocabs
+
+    def __len__(self):
+        return len(self.token_ids)
+
+
+def _import_numpy(purpose):
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('the numpy package is required to %s' % purpose)
+    return numpy
+
+
+def get_corpus_token_arrays(comms, tagging_types=(), tool=None,
+                            sect_pred=None, token_vocab=None,
+                            tag_vocabs=None, suppress_warnings=False):
+    """Convert the tokens of a sequence of :class:`.Communication`
+    objects to NumPy arrays (see :class:`TokenArrays`), so that
+    features can be computed on whole corpora at once instead of
+    walking :class:`.Token` objects.
+
+    Token texts and tags are mapped to integer ids using
+    :class:`Vocabulary` objects; pass the vocabularies returned for
+    one corpus to process another one with the same ids (freezing
+    them if new strings should map to `NO_ID`).
+
+    Requires the optional `numpy` package.
+
+    Args:
+        comms: iterable of Communications (e.g. a
+            :class:`.CommunicationReader`'s Communications)
+        tagging_types: collection of tagging types (e.g. `'POS'`)
+            for which to build tag id arrays
+        tool (str): If not None, only use :class:`.TokenTagging`
+            objects whose `metadata.tool` field is equal to `tool`
+        sect_pred (function): Function that takes a :class:`.Section`
+            and returns false if the :class:`.Section` should be
+            excluded.
+        token_vocab (Vocabulary): vocabulary of token texts; a new
+            one is created if None
+        tag_vocabs (dict): map from tagging type to vocabulary of
+            tags; new vocabularies are created for missing tagging
+            types
+        suppress_warnings (bool): True to suppress warning messages
+            that `Tokenization.kind` is None
+
+    Returns:
+        TokenArrays: arrays of token and tag ids, text offsets and
+        sentence, section and Communication boundaries
+
+    Raises:
+        ImportError: if numpy is not installed
+        Exception: if a tokenization has more than one matching
+            tagging of one of `tagging_types`
+    """
+    numpy = _import_numpy('build token arrays')
+
+    if token_vocab is None:
+        token_vocab = Vocabulary()
+    tag_vocabs = dict(tag_vocabs or {})
+    for tagging_type in tagging_types:
+        if tagging_type not in tag_vocabs:
+            tag_vocabs[tagging_type] = Vocabulary()
+
+    get_token_id = token_vocab.get_id
+    token_ids = []
+    starts = []
+    endings = []
+    sentence_offsets = [0]
+    section_offsets = [0]
+    comm_offsets = [0]
+    tag_ids = dict((tagging_type, []) for tagging_type in tagging_types)
+
+    for comm in comms:
+        for section in lun(comm.sectionList):
+            if sect_pred is not None and not sect_pred(section):
+                continue
+            for sentence in lun(section.sentenceList):
+                tokenization = sentence.tokenization
+                tokens = lun(
+                    None if tokenization is None else
+                    get_tokens(tokenization, suppress_warnings))
+                first = len(token_ids)
+                for token in tokens:
+                    token_ids.append(get_token_id(token.text))
+                    if token.textSpan is None:
+                        starts.append(-1)
+                        endings.append(-1)
+                    else:
+                        starts.append(token.textSpan.start)
+                        endings.append(token.textSpan.ending)
+                if tagging_types and tokens:
+                    # map tokenIndex to array index (tokenIndex need
+                    # not be the position of the token in the list)
+                    positions = dict(
+                        (token.tokenIndex, first + i)
+                        for (i, token) in enumerate(tokens))
+                for tagging_type in tagging_types:
+                    ids = tag_ids[tagging_type]
+                    ids.extend([NO_ID] * len(tokens))
+                    if not tokens:
+                        continue
+                    try:
+                        tagged_tokens = get_tagged_tokens(
+                            tokenization, tagging_type, tool=tool)
+                    except NoSuchTokenTagging:
+                        continue
+                    get_tag_id = tag_vocabs[tagging_type].get_id
+                    for tagged_token in lun(tagged_tokens):
+                        # skip tags of tokens that are not in the list
+                        position = positions.get(tagged_token.tokenIndex)
+                        if position is not None:
+                            ids[position] = get_tag_id(tagged_token.tag)
+                sentence_offsets.append(len(token_ids))
+            section_offsets.append(len(token_ids))
+        comm_offsets.append(len(token_ids))
+
+    return TokenArrays(
+        token_ids=numpy.array(token_ids, dtype=numpy.int32),
+        starts=numpy.array(starts, dtype=numpy.int32),
+        endings=numpy.array(endings, dtype=numpy.int32),
+        sentence_offsets=numpy.array(sentence_offsets, dtype=numpy.int64),
+        section_offsets=numpy.array(section_offsets, dtype=numpy.int64),
+        comm_offsets=numpy.array(comm_offsets, dtype=numpy.int64),
+        tag_ids=dict(
+            (tagging_type, numpy.array(ids, dtype=numpy.int32))
+            for (tagging_type, ids) in tag_ids.items()),
+        token_vocab=token_vocab,
+        tag_vocabs=tag_vocabs,
+    )
+
+
+def get_comm_token_arrays(comm, **kwargs):
+    """Convert the tokens of a :class:`.Communication` to NumPy arrays.
+
+    Args:
+        comm (Communication): communication to extract tokens from
+        kwargs: keyword arguments of :func:`get_corpus_token_arrays`
+
+    Returns:
+        TokenArrays: arrays of token and tag ids, text offsets and
+        sentence and section boundaries
+    """
+    return get_corpus_token_arrays([comm], **kwargs)
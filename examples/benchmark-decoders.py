@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+'''
+Report which compact protocol decoder concrete-python uses, and
+benchmark it against the others available on this host: the Thrift C
+extension (if installed), the pure-Python decoder specialized to
+Concrete types that is used without it, and the generic pure-Python
+protocol.
+'''
+
+from __future__ import print_function
+from __future__ import unicode_literals
+from argparse import ArgumentParser
+import timeit
+
+from thrift.protocol.TCompactProtocol import (
+    TCompactProtocol, TCompactProtocolAccelerated,
+)
+from thrift.transport.TTransport import TMemoryBuffer
+
+from concrete import Communication
+from concrete.util import (
+    SpecializedCompactProtocol,
+    is_accelerated,
+    read_communication_from_file,
+    write_communication_to_buffer,
+)
+from concrete.util.thrift_factory import factory
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('comm_path', nargs='?',
+                        default='tests/testdata/serif_dog-bites-man.concrete',
+                        help='Communication file to decode')
+    parser.add_argument('--repeat', type=int, default=100,
+                        help='Number of times to decode the Communication')
+    args = parser.parse_args()
+
+    buf = write_communication_to_buffer(
+        read_communication_from_file(args.comm_path, add_references=False))
+
+    print('accelerated: %s' % is_accelerated())
+    print('active protocol factory: %s' %
+          type(factory.protocolFactory).__name__)
+    print('%d bytes per Communication' % len(buf))
+
+    protocols = [
+        ('specialized pure-Python', SpecializedCompactProtocol),
+        ('generic pure-Python', TCompactProtocol),
+    ]
+    if is_accelerated():
+        protocols.insert(0, ('accelerated', TCompactProtocolAccelerated))
+    for (name, protocol_class) in protocols:
+        def decode():
+            Communication().read(protocol_class(TMemoryBuffer(buf)))
+        seconds = min(timeit.repeat(decode, number=args.repeat, repeat=3))
+        print('%-24s %8.3f ms/Communication' %
+              (name, 1e3 * seconds / args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+'''
+Benchmark computing lattice expected counts in pure Python against
+NumPy, on single lattices shaped like those of speech recognition (a
+number of frames, each with a number of states, and arcs from each
+state to states of the next frame) and on a batch of small lattices.
+'''
+
+from __future__ import print_function
+from __future__ import unicode_literals
+from argparse import ArgumentParser
+import random
+import timeit
+
+from concrete import Arc, Token, TokenLattice
+from concrete.util import (
+    batch_compute_lattice_expected_counts,
+    compute_lattice_expected_counts,
+)
+
+
+def frame_lattice(num_frames, num_states, num_successors):
+    '''
+    Return lattice of `num_frames` frames of `num_states` states,
+    with arcs from each state to `num_successors` states of the next
+    frame (and from a start state and to an end state).
+    '''
+    def state(frame, i):
+        return 1 + frame * num_states + i
+
+    end_state = state(num_frames, 0)
+    arcs = [(0, state(0, i)) for i in range(num_states)]
+    for frame in range(num_frames - 1):
+        for i in range(num_states):
+            for j in random.sample(range(num_states),
+                                   min(num_successors, num_states)):
+                arcs.append((state(frame, i), state(frame + 1, j)))
+    arcs.extend((state(num_frames - 1, i), end_state)
+                for i in range(num_states))
+    return TokenLattice(
+        arcList=[
+            Arc(src=src, dst=dst, token=Token(tokenIndex=k % 1000),
+                weight=-random.random())
+            for (k, (src, dst)) in enumerate(arcs)
+        ],
+        startState=0, endState=end_state)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('--successors', type=int, default=4,
+                        help='Number of arcs leaving each state')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Number of lattices in the batch benchmark')
+    args = parser.parse_args()
+
+    random.seed(0)
+    for (num_frames, num_states) in [(500, 10), (2000, 5), (20000, 1),
+                                     (100, 100)]:
+        lattice = frame_lattice(num_frames, num_states, args.successors)
+        times = [
+            min(timeit.repeat(
+                lambda: compute_lattice_expected_counts(
+                    lattice, use_numpy=use_numpy),
+                number=1, repeat=3))
+            for use_numpy in (False, True)
+        ]
+        print('%5d frames x %3d states (%6d arcs): '
+              'python %7.3f s, numpy %7.3f s' %
+              ((num_frames, num_states, len(lattice.arcList)) +
+               tuple(times)))
+
+    lattices = [frame_lattice(5, 3, args.successors)
+                for i in range(args.batch_size)]
+    times = [
+        min(timeit.repeat(
+            lambda: batch_compute_lattice_expected_counts(
+                lattices, use_numpy=use_numpy),
+            number=1, repeat=3))
+        for use_numpy in (False, True)
+    ]
+    print('batch of %d small lattices: python %7.3f s, numpy %7.3f s' %
+          ((len(lattices),) + tuple(times)))
+
+
+if __name__ == '__main__':
+    main()
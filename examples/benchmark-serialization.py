@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+'''
+Benchmark per-record serialization overhead for small Communications
+(tweets), comparing thrift.TSerialization (which creates a transport
+and protocol for every record) to a reusable ThriftSerializer.
+'''
+
+from __future__ import print_function
+from __future__ import unicode_literals
+from argparse import ArgumentParser
+import io
+import timeit
+
+from thrift import TSerialization
+
+from concrete import Communication
+from concrete.util import (
+    ThriftSerializer,
+    json_tweet_string_to_Communication,
+)
+from concrete.util.thrift_factory import factory
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('tweets_path', nargs='?',
+                        default='tests/testdata/tweets.json',
+                        help='File of JSON tweets, one per line')
+    parser.add_argument('--repeat', type=int, default=5000,
+                        help='Number of passes over the tweets')
+    args = parser.parse_args()
+
+    with io.open(args.tweets_path, encoding='utf-8') as f:
+        comms = [json_tweet_string_to_Communication(line) for line in f]
+    comms = [comm for comm in comms if comm is not None]
+    bufs = [TSerialization.serialize(
+        comm, protocol_factory=factory.protocolFactory) for comm in comms]
+    serializer = ThriftSerializer()
+    num_records = len(comms) * args.repeat
+
+    def serialize_tserialization():
+        for comm in comms:
+            TSerialization.serialize(
+                comm, protocol_factory=factory.protocolFactory)
+
+    def deserialize_tserialization():
+        for buf in bufs:
+            TSerialization.deserialize(
+                Communication(), buf,
+                protocol_factory=factory.protocolFactory)
+
+    def serialize_reusable():
+        serializer.serialize_many(comms)
+
+    def deserialize_reusable():
+        serializer.deserialize_many(Communication, bufs)
+
+    print('%d tweets, mean size %d bytes' %
+          (len(comms), sum(len(buf) for buf in bufs) / len(bufs)))
+    for (name, func) in (
+            ('serialize (TSerialization)', serialize_tserialization),
+            ('serialize (ThriftSerializer)', serialize_reusable),
+            ('deserialize (TSerialization)', deserialize_tserialization),
+            ('deserialize (ThriftSerializer)', deserialize_reusable)):
+        seconds = timeit.timeit(func, number=args.repeat)
+        print('%-32s %6.2f us/record' % (name, 1e6 * seconds / num_records))
+
+
+if __name__ == '__main__':
+    main()
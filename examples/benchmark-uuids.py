@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+'''
+Benchmark generating compressible UUIDs one at a time (by calling
+next on an analytic UUID generator) against generating them in bulk
+(with its take and fill methods).
+'''
+
+from __future__ import print_function
+from __future__ import unicode_literals
+from argparse import ArgumentParser
+import timeit
+
+from concrete import EntityMention
+from concrete.util import AnalyticUUIDGeneratorFactory
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('--num-uuids', type=int, default=100000,
+                        help='Number of UUIDs to generate per run')
+    args = parser.parse_args()
+
+    n = args.num_uuids
+    aug = AnalyticUUIDGeneratorFactory().create()
+    mentions = [EntityMention() for i in range(n)]
+
+    def per_call():
+        for mention in mentions:
+            mention.uuid = next(aug)
+
+    benchmarks = [
+        ('next', lambda: [next(aug) for i in range(n)]),
+        ('take', lambda: aug.take(n)),
+        ('next (set uuid)', per_call),
+        ('fill (set uuid)', lambda: aug.fill(mentions)),
+    ]
+    for (name, f) in benchmarks:
+        seconds = min(timeit.repeat(f, number=1, repeat=3))
+        print('%-16s %8.3f us/UUID' % (name, 1e6 * seconds / n))
+
+
+if __name__ == '__main__':
+    main()
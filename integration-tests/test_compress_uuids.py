@@ -2,7 +2,11 @@ from __future__ import unicode_literals
 from pytest import fixture, mark, param
 from concrete.util import CommunicationReader
 from concrete.validate import validate_communication
-from concrete.util import compress_uuids
+from concrete.util import (
+    compress_uuids, communication_deep_copy, intern_uuids,
+    read_communication_from_file,
+)
+from concrete.util.concrete_uuid import UUIDClustering
 import os
 import sys
 from subprocess import Popen, PIPE
@@ -18,6 +22,8 @@ def output_file(tmpdir):
     ('--verify',),
     ('--verify', '--single-analytic'),
     ('--single-analytic',),
+    ('--workers', '2'),
+    ('--verify', '--workers', '2'),
 ])
 def test_compress_uuids(output_file, args):
     input_file = 'tests/testdata/simple.tar.gz'
@@ -118,3 +124,59 @@ def test_compress_uuids_api(reader_kwargs, compress_kwargs):
         pass
     else:
         assert False
+
+
+@mark.parametrize('add_references', [False, True, 'lazy'])
+def test_compress_uuids_in_place(add_references):
+    input_file = 'tests/testdata/simple.tar.gz'
+    for (comm, _) in CommunicationReader(input_file,
+                                         add_references=add_references):
+        comm_copy = communication_deep_copy(comm)
+        (new_comm, uc) = compress_uuids(comm, in_place=True)
+        assert new_comm is comm
+        assert validate_communication(comm)
+        assert comm.uuid.uuidString == uc.uuid_map[comm_copy.uuid.uuidString]
+        tokenization = comm.sectionList[0].sentenceList[0].tokenization
+        if add_references:
+            assert tokenization is \
+                comm.tokenizationForUUID[tokenization.uuid.uuidString]
+        assert UUIDClustering(comm_copy).hashable_clusters() == \
+            UUIDClustering(comm).hashable_clusters()
+
+
+def test_compress_uuids_in_place_verify():
+    (comm, _) = next(iter(CommunicationReader('tests/testdata/simple.tar.gz',
+                                              add_references=False)))
+    (new_comm, uc) = compress_uuids(comm, in_place=True, verify=True)
+    assert new_comm is comm
+    assert validate_communication(comm)
+
+
+def test_compress_uuids_in_place_interned():
+    comm = read_communication_from_file(
+        'tests/testdata/serif_dog-bites-man.concrete')
+    comm_copy = communication_deep_copy(comm)
+    intern_uuids(comm)
+    (new_comm, uc) = compress_uuids(comm, in_place=True)
+    assert validate_communication(comm)
+    assert UUIDClustering(comm_copy).hashable_clusters() == \
+        UUIDClustering(comm).hashable_clusters()
+    tokenization = comm.sectionList[1].sentenceList[0].tokenization
+    assert tokenization is \
+        comm.tokenizationForUUID[tokenization.uuid.uuidString]
+
+
+def test_compress_uuids_in_place_shared_interned():
+    comm = read_communication_from_file(
+        'tests/testdata/serif_dog-bites-man.concrete')
+    other_comm = communication_deep_copy(comm)
+    other_comm_copy = communication_deep_copy(comm)
+    uuids = intern_uuids(comm)
+    intern_uuids(other_comm, uuids)
+    (new_comm, uc) = compress_uuids(comm, in_place=True)
+    assert validate_communication(comm)
+    assert UUIDClustering(other_comm_copy).hashable_clusters() == \
+        UUIDClustering(comm).hashable_clusters()
+    assert comm.uuid.uuidString != other_comm.uuid.uuidString
+    assert other_comm == other_comm_copy
+    assert all(u.uuidString == s for (s, u) in uuids.items())
@@ -102,6 +102,25 @@ def test_create_comm_tarball(output_file, text_l0, text_l1):
         assert False
 
 
+def test_create_comm_tarball_threads(output_file, text_l0, text_l1):
+    p = Popen([
+        sys.executable,
+        'scripts/create-comm-tarball.py',
+        '--threads', '2',
+        'tests/testdata/les-deux-chandeliers.tar.gz',
+        output_file
+    ], stdout=PIPE, stderr=PIPE)
+    (stdout, stderr) = p.communicate()
+    assert p.returncode == 0
+
+    reader = CommunicationReader(output_file)
+    comms = [c for (c, _) in reader]
+    assert ['les-deux-chandeliers/l0.txt',
+            'les-deux-chandeliers/l1.txt'] == [c.id for c in comms]
+    assert [text_l0, text_l1] == [c.text for c in comms]
+    assert all(validate_communication(c) for c in comms)
+
+
 @mark.posix
 def test_create_comm_tarball_stdin(output_file, text_l0, text_l1):
     p = Popen([
@@ -1,22 +1,37 @@
 from __future__ import unicode_literals
 import gzip
+import json
 import os
 import tarfile
 from time import time, localtime
 from calendar import timegm
 import zipfile
 
+import mock
+
 from concrete.util import (
     CommunicationReader,
     CommunicationWriter,
     CommunicationWriterTar,
     CommunicationWriterTGZ,
     CommunicationWriterZip,
+    ShardedCommunicationWriter,
+    BlockGzipCommunicationReader,
+    BlockGzipCommunicationWriter,
+    BLOCK_GZIP_INDEX_SUFFIX,
+    read_block_gzip_index,
+    shard_for_communication_id,
+    read_communication_from_buffer,
     read_communication_from_file,
+    read_communication_id,
+    write_communication_to_buffer,
+    build_stream_index,
+    read_stream_index,
+    STREAM_INDEX_SUFFIX,
     FileType
 )
 
-from pytest import fixture, raises
+from pytest import fixture, importorskip, mark, raises
 
 
 TIME_MARGIN = 60 * 60
@@ -493,6 +508,48 @@ def test_CommunicationReader_truncated_tgz_file():
         (truncated_comm, _) = reader.next()
 
 
+def test_CommunicationReader_parallel_tar_gz_file():
+    reader = CommunicationReader('tests/testdata/simple.tar.gz', workers=2)
+    [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+    for (i, comm_id) in enumerate([u'one', u'two', u'three']):
+        assert hasattr(comms[i], 'sentenceForUUID')
+        assert comm_id == comms[i].id
+        assert u'simple_%d.concrete' % (i + 1) == filenames[i]
+
+
+def test_CommunicationReader_parallel_concatenated_gz_file():
+    filename = u'tests/testdata/simple_concatenated.gz'
+    reader = CommunicationReader(filename, workers=2)
+    [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+    for (i, comm_id) in enumerate([u'one', u'two', u'three']):
+        assert hasattr(comms[i], 'sentenceForUUID')
+        assert comm_id == comms[i].id
+        assert filename == filenames[i]
+
+
+def test_CommunicationReader_parallel_nested_dir_unordered():
+    root_path = os.path.join('tests', 'testdata', 'a')
+    reader = CommunicationReader(root_path, recursive=True, workers=2,
+                                 ordered=False)
+    comm_ids = set(c.id for (c, f) in reader)
+    assert set([u'one', u'two', u'three']) == comm_ids
+
+
+def test_CommunicationReader_parallel_no_add_references():
+    reader = CommunicationReader('tests/testdata/simple.zip',
+                                 add_references=False, workers=2)
+    comms = [c for (c, f) in reader]
+    assert [u'one', u'two', u'three'] == [c.id for c in comms]
+    assert not hasattr(comms[0], 'sentenceForUUID')
+
+
+def test_CommunicationReader_parallel_truncated_file():
+    reader = CommunicationReader('tests/testdata/truncated.comm', workers=2)
+    with raises(EOFError):
+        [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+    reader.close()
+
+
 def test_CommunicationWriter_fixed_point(output_file):
     input_file = 'tests/testdata/simple_1.concrete'
     comm = read_communication_from_file(input_file)
@@ -930,3 +987,681 @@ def test_CommunicationWriterZip_single_file_default_name(output_file,
     assert os.stat('tests/testdata/simple_1.concrete').st_size == zipinfo.file_size
 
     f.close()
+
+
+def test_CommunicationReader_fields_concatenated_file():
+    filename = u'tests/testdata/serif_les-deux_concatenated.concrete'
+    reader = CommunicationReader(filename, fields={'id', 'text'})
+    comms = [c for (c, f) in reader]
+    assert [
+        u'tests/testdata/serif_dog-bites-man.xml',
+        u'tests/testdata/les-deux-chandeliers.txt',
+    ] == [c.id for c in comms]
+    for comm in comms:
+        assert comm.text is not None
+        assert comm.sectionList is None
+        assert comm.metadata is None
+
+
+def test_CommunicationReader_fields_tar_gz_file():
+    reader = CommunicationReader('tests/testdata/simple.tar.gz',
+                                 add_references=False, fields=['id'])
+    comms = [c for (c, f) in reader]
+    assert [u'one', u'two', u'three'] == [c.id for c in comms]
+    assert comms[0].text is None
+
+
+def test_CommunicationReader_fields_parallel_zip_file():
+    reader = CommunicationReader('tests/testdata/simple.zip',
+                                 fields=['id', 'sectionList'], workers=2)
+    comms = [c for (c, f) in reader]
+    assert [u'one', u'two', u'three'] == [c.id for c in comms]
+    assert comms[0].text is None
+    assert comms[0].sectionList
+    assert comms[0].sentenceForUUID
+
+
+def test_CommunicationReader_unknown_fields():
+    with raises(ValueError):
+        CommunicationReader('tests/testdata/simple.zip', fields=['idd'])
+
+
+def test_CommunicationReader_raw_concatenated_file():
+    filename = u'tests/testdata/simple_concatenated'
+    reader = CommunicationReader(filename, raw=True)
+    [bufs, filenames] = zip(*[(b, f) for (b, f) in reader])
+    with open(filename, 'rb') as f:
+        assert f.read() == b''.join(bufs)
+    assert [u'one', u'two', u'three'] == [
+        read_communication_id(b) for b in bufs]
+    assert [filename] * 3 == list(filenames)
+
+
+def test_CommunicationReader_context_manager_closes_workers():
+    with CommunicationReader('tests/testdata/simple.tar.gz',
+                             workers=2) as reader:
+        (comm, _) = next(reader)
+        assert u'one' == comm.id
+    with raises(RuntimeError):
+        reader._executor.submit(int)
+
+
+def test_CommunicationReader_raw_tar_gz_file():
+    reader = CommunicationReader('tests/testdata/simple.tar.gz', raw=True)
+    [bufs, filenames] = zip(*[(b, f) for (b, f) in reader])
+    for (i, buf) in enumerate(bufs):
+        with open('tests/testdata/simple_%d.concrete' % (i + 1), 'rb') as f:
+            assert f.read() == buf
+        assert u'simple_%d.concrete' % (i + 1) == filenames[i]
+
+
+def test_CommunicationReader_raw_memory_map_truncated_file():
+    reader = CommunicationReader('tests/testdata/truncated.comm', raw=True,
+                                 memory_map=True)
+    with raises(EOFError):
+        [bufs, filenames] = zip(*[(b, f) for (b, f) in reader])
+
+
+def test_CommunicationReader_raw_nested_dir():
+    root_path = os.path.join('tests', 'testdata', 'a')
+    reader = CommunicationReader(root_path, recursive=True, raw=True)
+    assert set([u'one', u'two', u'three']) == set(
+        read_communication_id(b) for (b, f) in reader)
+
+
+def test_CommunicationWriter_write_bytes(output_file):
+    input_file = 'tests/testdata/simple_concatenated'
+    with CommunicationWriter(output_file) as writer:
+        for (buf, _) in CommunicationReader(input_file, raw=True):
+            writer.write_bytes(buf)
+
+    with open(input_file, 'rb') as expected_f:
+        with open(output_file, 'rb') as actual_f:
+            assert expected_f.read() == actual_f.read()
+
+
+def test_CommunicationWriterTar_write_bytes(output_file):
+    with CommunicationWriterTGZ(output_file) as writer:
+        for (buf, _) in CommunicationReader('tests/testdata/simple.zip',
+                                            raw=True):
+            writer.write_bytes(buf)
+
+    reader = CommunicationReader(output_file)
+    [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+    assert [u'one', u'two', u'three'] == [c.id for c in comms]
+    assert [u'one.concrete', u'two.concrete', u'three.concrete'] == \
+        list(filenames)
+
+
+def test_CommunicationWriterZip_write_bytes(output_file):
+    with CommunicationWriterZip(output_file) as writer:
+        for (buf, filename) in CommunicationReader(
+                'tests/testdata/simple_nested.tar', raw=True):
+            writer.write_bytes(buf, filename)
+
+    reader = CommunicationReader(output_file)
+    [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+    assert [u'one', u'two', u'three'] == [c.id for c in comms]
+    assert u'a/b/simple_1.concrete' == filenames[0]
+
+
+def test_CommunicationReader_memory_map_concatenated_file():
+    filename = u'tests/testdata/simple_concatenated'
+    reader = CommunicationReader(filename, memory_map=True)
+    [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+    for (i, comm_id) in enumerate([u'one', u'two', u'three']):
+        assert hasattr(comms[i], 'sentenceForUUID')
+        assert comm_id == comms[i].id
+        assert filename == filenames[i]
+
+
+def test_CommunicationReader_memory_map_explicit_tar_file():
+    reader = CommunicationReader('tests/testdata/simple_nested.tar',
+                                 filetype=FileType.TAR, memory_map=True)
+    [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+    assert [u'one', u'two', u'three'] == [c.id for c in comms]
+    assert hasattr(comms[0], 'sentenceForUUID')
+    assert u'a/b/simple_1.concrete' == filenames[0]
+    assert u'a/c/simple_2.concrete' == filenames[1]
+    assert u'a/c/simple_3.concrete' == filenames[2]
+
+
+def test_CommunicationReader_memory_map_tar_gz_file():
+    # compressed inputs are read without memory-mapping
+    reader = CommunicationReader('tests/testdata/simple.tar.gz',
+                                 memory_map=True)
+    assert [u'one', u'two', u'three'] == [c.id for (c, f) in reader]
+
+
+def test_CommunicationReader_memory_map_parallel():
+    reader = CommunicationReader(
+        'tests/testdata/serif_les-deux_concatenated.concrete',
+        memory_map=True, workers=2)
+    assert [
+        u'tests/testdata/serif_dog-bites-man.xml',
+        u'tests/testdata/les-deux-chandeliers.txt',
+    ] == [c.id for (c, f) in reader]
+
+
+def test_CommunicationReader_memory_map_empty_file(tmpdir):
+    filename = str(tmpdir / 'empty.comm')
+    open(filename, 'wb').close()
+    assert [] == list(CommunicationReader(filename, memory_map=True))
+
+
+def test_CommunicationReader_memory_map_truncated_file():
+    reader = CommunicationReader('tests/testdata/truncated.comm',
+                                 memory_map=True)
+    with raises(EOFError):
+        [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+
+
+def test_build_stream_index(tmpdir):
+    stream_path = str(tmpdir / 'simple_concatenated')
+    with open('tests/testdata/simple_concatenated', 'rb') as f:
+        stream_data = f.read()
+    with open(stream_path, 'wb') as f:
+        f.write(stream_data)
+
+    index_path = build_stream_index(stream_path)
+    assert stream_path + STREAM_INDEX_SUFFIX == index_path
+
+    entries = read_stream_index(index_path)
+    assert [u'one', u'two', u'three'] == [e[0] for e in entries]
+    assert 0 == entries[0][1]
+    assert entries[0][1] + entries[0][2] == entries[1][1]
+    assert entries[1][1] + entries[1][2] == entries[2][1]
+    assert len(stream_data) == entries[2][1] + entries[2][2]
+    for (comm_id, offset, length) in entries:
+        comm = read_communication_from_buffer(
+            stream_data[offset:offset + length])
+        assert comm_id == comm.id
+
+
+def test_build_stream_index_explicit_path(tmpdir):
+    index_path = str(tmpdir / 'stream.idx')
+    assert index_path == build_stream_index(
+        'tests/testdata/serif_les-deux_concatenated.concrete', index_path)
+    assert [
+        u'tests/testdata/serif_dog-bites-man.xml',
+        u'tests/testdata/les-deux-chandeliers.txt',
+    ] == [e[0] for e in read_stream_index(index_path)]
+
+
+def test_build_stream_index_truncated_file(tmpdir):
+    with raises(EOFError):
+        build_stream_index('tests/testdata/truncated.comm',
+                           str(tmpdir / 'truncated.idx'))
+
+
+@mark.parametrize('compression,module_name', [
+    ('zst', 'zstandard'),
+    ('lz4', 'lz4.frame'),
+])
+def test_CommunicationWriter_compressed_round_trip(output_file, compression,
+                                                   module_name):
+    importorskip(module_name)
+    comm = read_communication_from_file('tests/testdata/simple_1.concrete')
+    with CommunicationWriter(output_file, compression=compression) as writer:
+        writer.write(comm)
+        writer.write(comm)
+
+    for filetype in (FileType.AUTO, 'stream-' + compression):
+        reader = CommunicationReader(output_file, filetype=filetype)
+        [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+        assert [u'one', u'one'] == [c.id for c in comms]
+        assert hasattr(comms[0], 'sentenceForUUID')
+        assert output_file == filenames[0]
+
+
+@mark.parametrize('compression,module_name', [
+    ('bz2', 'bz2'),
+    ('zst', 'zstandard'),
+    ('lz4', 'lz4.frame'),
+])
+def test_CommunicationWriterTar_compressed_round_trip(output_file,
+                                                      compression,
+                                                      module_name):
+    importorskip(module_name)
+    comm = read_communication_from_file('tests/testdata/simple_1.concrete')
+    with CommunicationWriterTar(output_file,
+                                compression=compression) as writer:
+        writer.write(comm, 'simple_1.concrete')
+        writer.write(comm, 'simple_1_copy.concrete')
+
+    for filetype in (FileType.AUTO, 'tar-' + compression):
+        reader = CommunicationReader(output_file, filetype=filetype)
+        [comms, filenames] = zip(*[(c, f) for (c, f) in reader])
+        assert [u'one', u'one'] == [c.id for c in comms]
+        assert hasattr(comms[0], 'sentenceForUUID')
+        assert [u'simple_1.concrete', u'simple_1_copy.concrete'] == \
+            list(filenames)
+
+
+def test_ShardedCommunicationWriter_max_comms(tmpdir):
+    comm = read_communication_from_file('tests/testdata/simple_1.concrete')
+    pattern = str(tmpdir.join('shard-%03d.concrete'))
+    manifest_path = str(tmpdir.join('manifest.tsv'))
+    with ShardedCommunicationWriter(pattern, max_comms=2,
+                                    manifest_filename=manifest_path) as writer:
+        for i in range(5):
+            writer.write(comm)
+
+    assert [pattern % i for i in range(3)] == [p for (p, _, _) in
+                                               writer.manifest]
+    assert [2, 2, 1] == [n for (_, n, _) in writer.manifest]
+    for (path, num_comms, num_bytes) in writer.manifest:
+        assert num_bytes == os.path.getsize(path)
+        assert num_comms == len(list(CommunicationReader(path)))
+    with open(manifest_path) as f:
+        assert [
+            '%s\t%d\t%d' % entry for entry in writer.manifest
+        ] == f.read().splitlines()
+
+
+def test_ShardedCommunicationWriter_max_bytes(tmpdir):
+    with open('tests/testdata/simple_1.concrete', 'rb') as f:
+        buf = f.read()
+    pattern = str(tmpdir.join('shard-%03d.tar'))
+    with ShardedCommunicationWriter(pattern, CommunicationWriterTar,
+                                    max_bytes=2 * len(buf) + 1) as writer:
+        for i in range(3):
+            writer.write_bytes(buf, 'comm-%d.concrete' % i)
+        writer.write_bytes(buf)
+
+    assert [(pattern % 0, 2), (pattern % 1, 2)] == [
+        (p, n) for (p, n, _) in writer.manifest]
+    filenames = [f for i in range(2)
+                 for (_, f) in CommunicationReader(pattern % i)]
+    assert ['comm-0.concrete', 'comm-1.concrete', 'comm-2.concrete',
+            'one.concrete'] == filenames
+
+
+def test_ShardedCommunicationWriter_max_bytes_oversized(tmpdir):
+    comm = read_communication_from_file('tests/testdata/simple_1.concrete')
+    pattern = str(tmpdir.join('shard-%03d.concrete'))
+    with ShardedCommunicationWriter(pattern, max_bytes=1) as writer:
+        writer.write(comm)
+        writer.write(comm)
+    assert [1, 1] == [n for (_, n, _) in writer.manifest]
+
+
+def test_ShardedCommunicationWriter_num_shards(tmpdir):
+    comm = read_communication_from_file('tests/testdata/simple_1.concrete')
+    pattern = str(tmpdir.join('shard-%d.concrete'))
+    ids = ['comm-%d' % i for i in range(20)]
+    with ShardedCommunicationWriter(pattern, num_shards=3) as writer:
+        for comm_id in ids:
+            comm.id = comm_id
+            writer.write(comm)
+
+    assert 3 == len(writer.manifest)
+    assert 20 == sum(n for (_, n, _) in writer.manifest)
+    for i in range(3):
+        assert sorted(
+            c for c in ids if shard_for_communication_id(c, 3) == i
+        ) == sorted(c.id for (c, _) in CommunicationReader(pattern % i))
+
+
+@mark.parametrize('options', [dict(max_comms=1), dict(num_shards=2)])
+def test_ShardedCommunicationWriter_write_after_close(tmpdir, options):
+    comm = read_communication_from_file('tests/testdata/simple_1.concrete')
+    pattern = str(tmpdir.join('shard-%d.concrete'))
+    manifest_filename = str(tmpdir.join('manifest.tsv'))
+    with ShardedCommunicationWriter(pattern,
+                                    manifest_filename=manifest_filename,
+                                    **options) as writer:
+        writer.write(comm)
+    manifest = list(writer.manifest)
+    with raises(ValueError, match='closed'):
+        writer.write(comm)
+    with raises(ValueError, match='closed'):
+        writer.write_bytes(write_communication_to_buffer(comm))
+    writer.close()
+    assert manifest == writer.manifest
+    assert ['one'] == [
+        c.id for (path, _, _) in manifest
+        for (c, _) in CommunicationReader(path)]
+
+
+def test_ShardedCommunicationWriter_num_shards_max_comms(tmpdir):
+    with raises(ValueError):
+        ShardedCommunicationWriter(str(tmpdir.join('shard-%d.concrete')),
+                                   num_shards=2, max_comms=10)
+
+
+def test_shard_for_communication_id_stable():
+    # first 32 bits of the MD5 digest of the UTF-8 encoded id, modulo
+    # the number of shards; must not change between releases
+    assert 0 == shard_for_communication_id('one', 7)
+    assert 5 == shard_for_communication_id('two', 7)
+    assert 5 == shard_for_communication_id('three', 7)
+    assert 97 == shard_for_communication_id('one', 100)
+    assert 6 == shard_for_communication_id(u'comm-\xe9', 7)
+
+
+@mark.parametrize('filename', [
+    'tests/testdata/simple_concatenated.gz',
+    'tests/testdata/simple.tar.bz2',
+    'tests/testdata/simple.zip',
+])
+def test_CommunicationReader_prefetch(filename):
+    reader = CommunicationReader(filename, prefetch=2)
+    comms = [c for (c, f) in reader]
+    assert [u'one', u'two', u'three'] == [c.id for c in comms]
+    assert hasattr(comms[0], 'sentenceForUUID')
+    assert not reader._prefetch_thread.is_alive()
+
+
+def test_CommunicationReader_prefetch_stream_decodes_once():
+    with mock.patch('concrete.util.file_io._skip_struct') as skip_struct:
+        reader = CommunicationReader('tests/testdata/simple_concatenated',
+                                     prefetch=2)
+        assert [u'one', u'two', u'three'] == [c.id for (c, f) in reader]
+    assert not skip_struct.called
+
+
+def test_CommunicationReader_prefetch_nested_dir():
+    root_path = os.path.join('tests', 'testdata', 'a')
+    reader = CommunicationReader(root_path, recursive=True, prefetch=1)
+    assert set([u'one', u'two', u'three']) == set(
+        c.id for (c, f) in reader)
+
+
+def test_CommunicationReader_prefetch_raw():
+    filename = u'tests/testdata/simple_concatenated'
+    reader = CommunicationReader(filename, raw=True, prefetch=1)
+    with open(filename, 'rb') as f:
+        assert f.read() == b''.join(b for (b, _) in reader)
+
+
+def test_CommunicationReader_prefetch_parallel():
+    reader = CommunicationReader('tests/testdata/simple.tar.gz',
+                                 prefetch=4, workers=2)
+    assert [u'one', u'two', u'three'] == [c.id for (c, f) in reader]
+
+
+def test_CommunicationReader_prefetch_truncated_file():
+    reader = CommunicationReader('tests/testdata/truncated.comm', prefetch=2)
+    with raises(EOFError):
+        [c for (c, f) in reader]
+    with raises(EOFError):
+        next(reader)
+
+
+def test_CommunicationReader_prefetch_close_early():
+    reader = CommunicationReader('tests/testdata/simple_concatenated',
+                                 prefetch=1)
+    assert u'one' == next(reader)[0].id
+    reader.close()
+    assert not reader._prefetch_thread.is_alive()
+
+
+def test_CommunicationReader_prefetch_invalid():
+    with raises(ValueError):
+        CommunicationReader('tests/testdata/simple.zip', prefetch=0)
+
+
+def test_BlockGzipCommunicationWriter(tmpdir):
+    output_file = str(tmpdir.join('comms.concrete.gz'))
+    with open('tests/testdata/simple_concatenated', 'rb') as f:
+        expected = f.read()
+    bufs = [b for (b, _) in CommunicationReader(
+        'tests/testdata/simple_concatenated', raw=True)]
+    with BlockGzipCommunicationWriter(output_file,
+                                      block_size=len(bufs[0]) + 1) as writer:
+        for buf in bufs:
+            writer.write_bytes(buf)
+
+    index = read_block_gzip_index(output_file + BLOCK_GZIP_INDEX_SUFFIX)
+    assert [u'one', u'two', u'three'] == [e[0] for e in index]
+    # first block holds the first two comms, second block the third
+    assert index[0][1:3] == index[1][1:3]
+    assert index[1][1] != index[2][1]
+    assert [0, len(bufs[0]), 0] == [e[3] for e in index]
+    assert [len(b) for b in bufs] == [e[4] for e in index]
+
+    # readable as an ordinary gzip stream
+    with gzip.open(output_file, 'rb') as f:
+        assert expected == f.read()
+    reader = CommunicationReader(output_file)
+    assert [u'one', u'two', u'three'] == [c.id for (c, f) in reader]
+
+
+def test_BlockGzipCommunicationReader(tmpdir):
+    output_file = str(tmpdir.join('comms.concrete.gz'))
+    index_file = str(tmpdir.join('comms.idx'))
+    with BlockGzipCommunicationWriter(output_file, block_size=1,
+                                      index_filename=index_file) as writer:
+        for (comm, _) in CommunicationReader(
+                'tests/testdata/simple_concatenated'):
+            writer.write(comm)
+
+    with BlockGzipCommunicationReader(output_file, index_file,
+                                      threads=2) as reader:
+        comms = [c for (c, f) in reader]
+        assert [u'one', u'two', u'three'] == [c.id for c in comms]
+        assert hasattr(comms[0], 'sentenceForUUID')
+        assert [output_file] * 3 == [f for (c, f) in reader]
+        assert u'two' == reader.read(u'two').id
+        with raises(KeyError):
+            reader.read(u'four')
+
+
+def test_BlockGzipCommunicationReader_close_unopened():
+    reader = BlockGzipCommunicationReader.__new__(BlockGzipCommunicationReader)
+    reader.close()
+
+
+def test_BlockGzipCommunicationReader_fields_raw(tmpdir):
+    output_file = str(tmpdir.join('comms.concrete.gz'))
+    with BlockGzipCommunicationWriter(output_file) as writer:
+        for (buf, _) in CommunicationReader(
+                'tests/testdata/simple_concatenated', raw=True):
+            writer.write_bytes(buf)
+
+    with BlockGzipCommunicationReader(output_file, add_references=False,
+                                      fields=['id']) as reader:
+        comm = reader.read(u'three')
+        assert u'three' == comm.id
+        assert comm.sectionList is None
+    with BlockGzipCommunicationReader(output_file, raw=True) as reader:
+        with open('tests/testdata/simple_concatenated', 'rb') as f:
+            assert f.read() == b''.join(b for (b, _) in reader)
+
+
+@mark.parametrize('ordered', [True, False])
+def test_CommunicationReader_threads_nested_dir(ordered):
+    root_path = os.path.join('tests', 'testdata', 'a')
+    expected = [(c.id, f) for (c, f) in CommunicationReader(root_path,
+                                                            recursive=True)]
+    reader = CommunicationReader(root_path, recursive=True, threads=2,
+                                 ordered=ordered)
+    records = [(c, f) for (c, f) in reader]
+    assert all(hasattr(c, 'sentenceForUUID') for (c, f) in records)
+    if ordered:
+        assert expected == [(c.id, f) for (c, f) in records]
+    else:
+        assert sorted(expected) == sorted((c.id, f) for (c, f) in records)
+    with raises(StopIteration):
+        next(reader)
+
+
+def test_CommunicationReader_threads_archives_dir(tmpdir):
+    for name in ('simple.tar.gz', 'simple.zip', 'simple_concatenated.gz'):
+        with open(os.path.join('tests', 'testdata', name), 'rb') as in_f:
+            tmpdir.join(name).write_binary(in_f.read())
+    reader = CommunicationReader(str(tmpdir), recursive=True, threads=3,
+                                 fields=['id'], add_references=False)
+    assert [u'one', u'two', u'three'] * 3 == [c.id for (c, f) in reader]
+
+
+def test_CommunicationReader_threads_raw_parallel_dir():
+    root_path = os.path.join('tests', 'testdata', 'a')
+    reader = CommunicationReader(root_path, recursive=True, threads=2,
+                                 raw=True)
+    assert set([u'one', u'two', u'three']) == set(
+        read_communication_id(b) for (b, f) in reader)
+    reader = CommunicationReader(root_path, recursive=True, threads=2,
+                                 workers=2)
+    assert set([u'one', u'two', u'three']) == set(
+        c.id for (c, f) in reader)
+
+
+@mark.posix
+def test_CommunicationReader_threads_followlinks(tmpdir):
+    os.symlink(os.path.abspath(os.path.join('tests', 'testdata', 'a')),
+               str(tmpdir.join('a')))
+    reader = CommunicationReader(str(tmpdir), recursive=True, threads=2)
+    assert [] == list(reader)
+    reader = CommunicationReader(str(tmpdir), recursive=True, threads=2,
+                                 followlinks=True)
+    assert 3 == len(list(reader))
+
+
+def test_CommunicationWriterTGZ_threads(output_file, login_info):
+    comms = [c for (c, _) in CommunicationReader(
+        'tests/testdata/serif_les-deux_concatenated.concrete')]
+    with CommunicationWriterTGZ(output_file, threads=2) as writer:
+        writer.write_many(comms * 200,
+                          ['comm-%d.concrete' % i for i in range(400)])
+
+    with gzip.open(output_file, 'rb') as f:
+        f.read()
+    f = tarfile.open(output_file)
+    tarinfos = f.getmembers()
+    assert ['comm-%d.concrete' % i for i in range(400)] == [
+        t.name for t in tarinfos]
+    assert login_info['username'] == tarinfos[-1].uname
+    assert login_info['groupname'] == tarinfos[-1].gname
+    f.close()
+    assert [c.id for c in comms] * 200 == [
+        c.id for (c, _) in CommunicationReader(output_file)]
+
+
+def test_CommunicationWriterTar_threads_zst(output_file):
+    importorskip('zstandard')
+    comm = read_communication_from_file('tests/testdata/simple_1.concrete')
+    with CommunicationWriterTar(output_file, compression='zst',
+                                threads=2) as writer:
+        writer.write_many([comm, comm])
+    assert [u'one', u'one'] == [
+        c.id for (c, _) in CommunicationReader(output_file)]
+
+
+@mark.parametrize('compression', [None, 'bz2'])
+def test_CommunicationWriterTar_threads_unsupported(output_file, compression):
+    with raises(ValueError):
+        CommunicationWriterTar(output_file, compression=compression,
+                               threads=2)
+
+
+@mark.parametrize('writer_type', [CommunicationWriter, CommunicationWriterTar])
+def test_writer_unknown_compression(output_file, writer_type):
+    with raises(ValueError):
+        writer_type(output_file, compression='xz')
+
+
+def test_CommunicationWriterTar_write_many(output_file):
+    comms = [c for (c, _) in CommunicationReader(
+        'tests/testdata/serif_les-deux_concatenated.concrete')]
+    with CommunicationWriterTar(output_file) as writer:
+        writer.write_many(comms)
+        writer.write_many(iter(comms), ['a.concrete', 'b.concrete'])
+    f = tarfile.open(output_file)
+    assert [c.id + '.concrete' for c in comms] + [
+        'a.concrete', 'b.concrete'] == f.getnames()
+    f.close()
+    assert [c.id for c in comms] * 2 == [
+        c.id for (c, _) in CommunicationReader(output_file)]
+
+
+@mark.parametrize('threads', [None, 2])
+def test_CommunicationWriterZip_deflate(output_file, threads):
+    comms = [c for (c, _) in CommunicationReader(
+        'tests/testdata/serif_les-deux_concatenated.concrete')]
+    with CommunicationWriterZip(output_file, deflate=True,
+                                threads=threads) as writer:
+        writer.write_many(comms * 20,
+                          ['comm-%d.concrete' % i for i in range(40)])
+        writer.write(comms[0])
+
+    f = zipfile.ZipFile(output_file)
+    assert f.testzip() is None
+    zipinfos = f.infolist()
+    assert ['comm-%d.concrete' % i for i in range(40)] + [
+        comms[0].id + '.concrete'] == [z.filename for z in zipinfos]
+    assert all(z.compress_type == zipfile.ZIP_DEFLATED for z in zipinfos)
+    assert zipinfos[0].compress_size < zipinfos[0].file_size
+    f.close()
+    assert [c.id for c in comms] * 20 + [comms[0].id] == [
+        c.id for (c, _) in CommunicationReader(output_file)]
+
+
+def test_CommunicationWriterZip_threads_without_deflate(output_file):
+    with raises(ValueError):
+        CommunicationWriterZip(output_file, threads=2)
+
+
+def test_CommunicationWriterZip_write_many_default_filenames(output_file):
+    comms = [c for (c, _) in CommunicationReader(
+        'tests/testdata/serif_les-deux_concatenated.concrete')]
+    with CommunicationWriterZip(output_file) as writer:
+        writer.write_many(iter(comms))
+    f = zipfile.ZipFile(output_file)
+    assert [c.id + '.concrete' for c in comms] == f.namelist()
+    f.close()
+
+
+@mark.parametrize('filename', [
+    'tests/testdata/simple_concatenated',
+    'tests/testdata/simple_concatenated.gz',
+    'tests/testdata/simple.tar',
+    'tests/testdata/simple.tar.bz2',
+    'tests/testdata/simple.zip',
+    'tests/testdata/a',
+])
+@mark.parametrize('options', [
+    {},
+    {'memory_map': True},
+    {'prefetch': 2},
+    {'workers': 2},
+    {'threads': 2},
+    {'raw': True},
+])
+def test_CommunicationReader_resume_from(filename, options):
+    options = dict(options, recursive=True)
+    expected = [f for (_, f) in CommunicationReader(filename, **options)]
+    assert 3 == len(expected)
+    for i in range(len(expected) + 1):
+        reader = CommunicationReader(filename, **options)
+        for _ in range(i):
+            next(reader)
+        checkpoint = json.loads(json.dumps(reader.checkpoint()))
+        reader.close()
+        reader = CommunicationReader(filename, resume_from=checkpoint,
+                                     **options)
+        assert expected[i:] == [f for (_, f) in reader]
+
+
+def test_CommunicationReader_checkpoint_stream_offset():
+    filename = 'tests/testdata/simple_concatenated.gz'
+    reader = CommunicationReader(filename, raw=True)
+    assert {'offset': 0} == reader.checkpoint()
+    (buf, _) = next(reader)
+    assert {'offset': len(buf)} == reader.checkpoint()
+
+
+def test_CommunicationReader_checkpoint_unordered():
+    reader = CommunicationReader('tests/testdata/simple.zip', workers=2,
+                                 ordered=False)
+    next(reader)
+    with raises(ValueError):
+        reader.checkpoint()
+    reader.close()
+
+
+def test_CommunicationReader_resume_from_missing_zip_member():
+    with raises(ValueError):
+        CommunicationReader('tests/testdata/simple.zip',
+                            resume_from={'member': 'simple_4.concrete'})
@@ -1,7 +1,10 @@
 from __future__ import unicode_literals
 import os
+import subprocess
 import sys
 
+from pytest import raises
+
 
 def import_ok(module_name):
     try:
@@ -28,3 +31,68 @@ def test_imports():
                 file_path = os.path.join(parent_path, basename)
                 module_name = file_path[:-len('.py')].replace(os.sep, '.')
                 assert import_ok(module_name)
+
+
+def run_python(statements):
+    # python -c puts the current directory on sys.path
+    return subprocess.check_output(
+        [sys.executable, '-c', statements]).decode('utf-8')
+
+
+def import_time(statement):
+    return float(run_python(
+        'import time\n'
+        'start = time.perf_counter()\n'
+        '%s\n'
+        'print(time.perf_counter() - start)\n' % statement))
+
+
+def test_lazy_imports():
+    loaded = run_python(
+        'import sys\n'
+        'import concrete\n'
+        'import concrete.util\n'
+        'print(" ".join(sorted(sys.modules)))\n').split()
+    assert 'concrete.util.file_io' not in loaded
+    assert 'concrete.communication.ttypes' not in loaded
+    assert 'humanfriendly' not in loaded
+    assert 'redis' not in loaded
+
+
+def test_lazy_compact_decoder():
+    loaded = run_python(
+        'import sys\n'
+        'from concrete.util.thrift_factory import factory, is_accelerated\n'
+        'print(is_accelerated())\n'
+        'print(" ".join(sorted(sys.modules)))\n').split()
+    if loaded[0] == 'True':
+        assert 'concrete.util.compact_decoder' not in loaded[1:]
+    else:
+        assert 'concrete.util.compact_decoder' in loaded[1:]
+
+
+def test_lazy_attributes():
+    import concrete
+    import concrete.util
+    assert 'Communication' in dir(concrete)
+    assert concrete.Communication is concrete.communication.ttypes.Communication
+    assert 'Communication' in concrete.__all__
+    assert concrete.util.CommunicationReader is \
+        concrete.util.file_io.CommunicationReader
+    assert concrete.util.Communication is concrete.Communication
+    assert 'create_comm' in concrete.util.__all__
+    with raises(AttributeError):
+        concrete.util.NoSuchAttribute
+
+
+def test_import_time():
+    # benchmark: lazy imports vs. loading everything (reported only, as
+    # timings are unreliable on loaded machines; test_lazy_imports
+    # checks that the imports are lazy)
+    for package_name in ('concrete', 'concrete.util'):
+        lazy_time = min(
+            import_time('import %s' % package_name) for _ in range(3))
+        eager_time = min(
+            import_time('from %s import *' % package_name) for _ in range(3))
+        sys.stdout.write('%s: lazy import %.1f ms, full import %.1f ms\n' % (
+            package_name, 1000 * lazy_time, 1000 * eager_time))
@@ -7,17 +7,58 @@ compressible UUID scheme
 from __future__ import unicode_literals
 
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import logging
 
 from concrete.util.file_io import CommunicationReader, CommunicationWriterTGZ
 from concrete.util.concrete_uuid import compress_uuids as _compress_uuids
+from concrete.util.mem_io import (
+    read_communication_from_buffer, write_communication_to_buffer,
+)
 from concrete.util import set_stdout_encoding
 import concrete.version
 
 
+def compress_buffer(buf, verify=False, single_analytic=False):
+    comm = read_communication_from_buffer(buf, add_references=False)
+    (comm, uc) = _compress_uuids(comm, verify=verify,
+                                 single_analytic=single_analytic,
+                                 in_place=True)
+    uuid_map_items = sorted(uc.uuid_map.items(), key=lambda p: str(p[1]))
+    return (write_communication_to_buffer(comm), comm.id, len(uc.augs),
+            uuid_map_items)
+
+
+def compress_buffers(items, workers=None, **kwargs):
+    '''
+    Generate compress_buffer(buf, **kwargs) and filename for each
+    (buf, filename) pair in items, in order, on a pool of worker
+    processes if workers is not None
+    '''
+    if workers is None:
+        for (buf, filename) in items:
+            yield (compress_buffer(buf, **kwargs), filename)
+        return
+
+    with ProcessPoolExecutor(workers) as executor:
+        # bound the number of pending Communications, so that inputs
+        # are not read into memory faster than they are compressed
+        pending = deque()
+        for (buf, filename) in items:
+            if len(pending) >= 4 * workers:
+                (future, pending_filename) = pending.popleft()
+                yield (future.result(), pending_filename)
+            pending.append(
+                (executor.submit(compress_buffer, buf, **kwargs), filename))
+        while pending:
+            (future, pending_filename) = pending.popleft()
+            yield (future.result(), pending_filename)
+
+
 def compress_uuids(input_path, output_path, verify=False, uuid_map_path=None,
-                   single_analytic=False):
-    reader = CommunicationReader(input_path, add_references=False)
+                   single_analytic=False, workers=None):
+    reader = CommunicationReader(input_path, raw=True)
     writer = CommunicationWriterTGZ(output_path)
 
     if uuid_map_path is None:
@@ -25,19 +66,23 @@ def compress_uuids(input_path, output_path, verify=False, uuid_map_path=None,
     else:
         uuid_map_file = open(uuid_map_path, 'w')
 
-    for (i, (comm, comm_filename)) in enumerate(reader):
-        (new_comm, uc) = _compress_uuids(comm, verify=verify,
-                                         single_analytic=single_analytic)
+    results = compress_buffers(reader, workers=workers, verify=verify,
+                               single_analytic=single_analytic)
+    for (i, (result, comm_filename)) in enumerate(results):
+        (buf, comm_id, num_analytics, uuid_map_items) = result
 
         logging.info('compressed %s (%d analytics, %d uuids) (%d/?)'
-                     % (comm.id, len(uc.augs), len(uc.uuid_map), i + 1))
+                     % (comm_id, num_analytics, len(uuid_map_items), i + 1))
 
         if uuid_map_file is not None:
-            for (old_uuid, new_uuid) in sorted(uc.uuid_map.items(),
-                                               key=lambda p: str(p[1])):
+            for (old_uuid, new_uuid) in uuid_map_items:
                 uuid_map_file.write('%s %s\n' % (old_uuid, new_uuid))
 
-        writer.write(new_comm, comm_filename=comm_filename)
+        writer.write_bytes(buf, comm_filename=comm_filename)
+
+    writer.close()
+    if uuid_map_file is not None:
+        uuid_map_file.close()
 
 
 def main():
@@ -67,6 +112,10 @@ def main():
                              ' communications)')
     parser.add_argument('--uuid-map-path', type=str,
                         help='Output path of UUID map')
+    parser.add_argument('--workers', type=int,
+                        help='Number of worker processes to compress'
+                             ' communications on (by default, compress'
+                             ' them in the main process)')
     concrete.version.add_argparse_argument(parser)
     args = parser.parse_args()
 
@@ -79,7 +128,8 @@ def main():
 
     compress_uuids(input_path, output_path, verify=args.verify,
                    single_analytic=args.single_analytic,
-                   uuid_map_path=args.uuid_map_path)
+                   uuid_map_path=args.uuid_map_path,
+                   workers=args.workers)
 
 
 if __name__ == "__main__":
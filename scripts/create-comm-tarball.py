@@ -68,6 +68,9 @@ def main():
                              ' each text file is a document)')
     parser.add_argument('--log-interval', type=int,
                         help='Log an info message every log-interval docs')
+    parser.add_argument('--threads', type=int,
+                        help='Number of threads to compress output on '
+                             '(default: compress on the main thread)')
     add_annotation_level_argparse_argument(parser)
     parser.add_argument('-l', '--loglevel', '--log-level',
                         help='Logging verbosity level threshold (to stderr)',
@@ -92,7 +95,8 @@ def main():
     logging.basicConfig(format='%(asctime)-15s %(levelname)s: %(message)s',
                         level=args.loglevel.upper())
 
-    with CommunicationWriterTGZ(concrete_tarball_path) as writer:
+    with CommunicationWriterTGZ(concrete_tarball_path,
+                                threads=args.threads) as writer:
         for (i, comm) in enumerate(load(text_tarball_path, per_line,
                                         annotation_level)):
             if (i + 1) % args.log_interval == 0:
@@ -16,6 +16,10 @@ communications_source is:
    with files that aren't Communications)
 - a TGZ file of Communications
 - a ZIP file of Communications
+- a file of concatenated Communications with a sidecar index (see
+   build_stream_index in concrete.util.file_io)
+- a block-compressed gzip file of Communications with a block index
+   (see BlockGzipCommunicationWriter in concrete.util.file_io)
 
 """
 from __future__ import unicode_literals
@@ -32,9 +36,12 @@ import concrete.version
 from concrete.util.access import CommunicationContainerFetchHandler
 from concrete.util.access_wrapper import FetchCommunicationServiceWrapper
 from concrete.util.comm_container import (
+    BlockGzipCommunicationContainer,
     DirectoryBackedCommunicationContainer,
     MemoryBackedCommunicationContainer,
+    StreamBackedCommunicationContainer,
     ZipFileBackedCommunicationContainer)
+from concrete.util.file_io import BLOCK_GZIP_INDEX_SUFFIX, STREAM_INDEX_SUFFIX
 from concrete.util import set_stdout_encoding
 
 
@@ -50,10 +57,15 @@ def main():
                         help="A path to {1} a (possibly nested) directory of "
                         "Communications named using the convention "
                         "'[COMMUNICATION_ID].[comm|concrete|gz], "
-                        "{2} a ZIP file of Communications, or "
-                        "{3} a file (which can be a .tgz or .tar file) containing "
+                        "{2} a ZIP file of Communications, "
+                        "{3} a file of concatenated Communications with a "
+                        "sidecar index file named '[FILE]%s', "
+                        "{4} a block-compressed gzip file of Communications "
+                        "with a block index file named '[FILE]%s', or "
+                        "{5} a file (which can be a .tgz or .tar file) containing "
                         "one or more Communications, all of which will be read "
-                        "into memory on startup")
+                        "into memory on startup" %
+                        (STREAM_INDEX_SUFFIX, BLOCK_GZIP_INDEX_SUFFIX))
     parser.add_argument("--host", default=None,
                         help="Network interface for server to listen on "
                         "(e.g. 'localhost', '0.0.0.0')")
@@ -75,6 +87,10 @@ def main():
         comm_container = DirectoryBackedCommunicationContainer(args.communications_source)
     elif zipfile.is_zipfile(args.communications_source):
         comm_container = ZipFileBackedCommunicationContainer(args.communications_source)
+    elif os.path.exists(args.communications_source + STREAM_INDEX_SUFFIX):
+        comm_container = StreamBackedCommunicationContainer(args.communications_source)
+    elif os.path.exists(args.communications_source + BLOCK_GZIP_INDEX_SUFFIX):
+        comm_container = BlockGzipCommunicationContainer(args.communications_source)
     else:
         max_file_size = humanfriendly.parse_size(args.max_file_size, binary=True)
         comm_container = MemoryBackedCommunicationContainer(args.communications_source,
@@ -77,6 +77,12 @@ if __name__ == '__main__':
             'requests',
         ],
 
+        extras_require={
+            'lz4': ['lz4'],
+            'numpy': ['numpy'],
+            'zstd': ['zstandard'],
+        },
+
         url="https://github.com/hltcoe/concrete-python",
         classifiers=[
             'Development Status :: 4 - Beta',
@@ -5,12 +5,20 @@ from concrete.util import (
     ZipFileBackedCommunicationContainer,
     RedisHashBackedCommunicationContainer,
     S3BackedCommunicationContainer,
+    StreamBackedCommunicationContainer,
+    BlockGzipCommunicationContainer,
+)
+from concrete.util.file_io import (
+    BlockGzipCommunicationWriter,
+    CommunicationReader,
 )
 from concrete.util import create_comm
 from concrete.util import write_communication_to_buffer
 
 from concrete.validate import validate_communication
 
+from concurrent.futures import ThreadPoolExecutor
+
 from pytest import raises, fixture
 from mock import Mock, sentinel, patch, call
 
@@ -53,6 +61,16 @@ def test_memory_backed_comm_container_retrieve():
         assert validate_communication(comm)
 
 
+def test_memory_backed_comm_container_slots():
+    comm_path = u'tests/testdata/simple.tar.gz'
+    cc = MemoryBackedCommunicationContainer(comm_path, slots=True)
+    assert 3 == len(cc)
+    for comm_id in cc:
+        comm = cc[comm_id]
+        assert not hasattr(comm, '__dict__')
+        assert validate_communication(comm)
+
+
 def test_zip_file_backed_comm_container_retrieve():
     zipfile_path = u'tests/testdata/simple.zip'
     cc = ZipFileBackedCommunicationContainer(zipfile_path)
@@ -63,6 +81,77 @@ def test_zip_file_backed_comm_container_retrieve():
         assert validate_communication(comm)
 
 
+def test_stream_backed_comm_container_retrieve(tmpdir):
+    stream_path = str(tmpdir / 'simple_concatenated')
+    with open(u'tests/testdata/simple_concatenated', 'rb') as in_f:
+        with open(stream_path, 'wb') as out_f:
+            out_f.write(in_f.read())
+    cc = StreamBackedCommunicationContainer(stream_path)
+    assert 3 == len(cc)
+    assert u'two' in cc
+    assert u'four' not in cc
+    for comm_id in cc:
+        comm = cc[comm_id]
+        assert comm_id == comm.id
+        assert hasattr(comm, 'sentenceForUUID')
+        assert validate_communication(comm)
+    cc.close()
+
+
+def test_stream_backed_comm_container_explicit_index(tmpdir):
+    stream_path = u'tests/testdata/simple_concatenated'
+    index_path = str(tmpdir / 'simple_concatenated.idx')
+    cc = StreamBackedCommunicationContainer(stream_path, index_path,
+                                            add_references=False)
+    assert [u'one', u'two', u'three'] == list(cc)
+    assert not hasattr(cc[u'three'], 'sentenceForUUID')
+    with raises(KeyError):
+        cc[u'four']
+    cc.close()
+
+
+def test_stream_backed_comm_container_concurrent_lookups(tmpdir):
+    cc = StreamBackedCommunicationContainer(
+        u'tests/testdata/simple_concatenated',
+        str(tmpdir / 'simple_concatenated.idx'), add_references=False)
+    comm_ids = list(cc) * 200
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        comms = list(executor.map(cc.__getitem__, comm_ids))
+    assert comm_ids == [comm.id for comm in comms]
+    cc.close()
+
+
+def test_block_gzip_comm_container(tmpdir):
+    stream_path = str(tmpdir / 'simple.concrete.gz')
+    with BlockGzipCommunicationWriter(stream_path, block_size=1) as writer:
+        for (buf, _) in CommunicationReader(
+                u'tests/testdata/simple_concatenated', raw=True):
+            writer.write_bytes(buf)
+    cc = BlockGzipCommunicationContainer(stream_path)
+    assert [u'one', u'two', u'three'] == list(cc)
+    assert u'four' not in cc
+    for comm_id in cc:
+        comm = cc[comm_id]
+        assert comm_id == comm.id
+        assert hasattr(comm, 'sentenceForUUID')
+        assert validate_communication(comm)
+    cc.close()
+
+
+def test_block_gzip_comm_container_concurrent_lookups(tmpdir):
+    stream_path = str(tmpdir / 'simple.concrete.gz')
+    with BlockGzipCommunicationWriter(stream_path, block_size=1) as writer:
+        for (buf, _) in CommunicationReader(
+                u'tests/testdata/simple_concatenated', raw=True):
+            writer.write_bytes(buf)
+    cc = BlockGzipCommunicationContainer(stream_path, add_references=False)
+    comm_ids = list(cc) * 200
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        comms = list(executor.map(cc.__getitem__, comm_ids))
+    assert comm_ids == [comm.id for comm in comms]
+    cc.close()
+
+
 def test_redis_hash_backed_comm_container_iter():
     redis_db = Mock(hkeys=Mock(side_effect=[[
         sentinel.name0, sentinel.name1, sentinel.name2
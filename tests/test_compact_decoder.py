@@ -0,0 +1,161 @@
+from __future__ import unicode_literals
+
+from io import BytesIO
+
+import mock
+from pytest import raises, warns
+from thrift.protocol.TCompactProtocol import TCompactProtocol
+from thrift.transport.TTransport import TMemoryBuffer, TTransportException
+
+from concrete import (
+    AnnotationMetadata, Communication, Dependency, DependencyParse,
+    DependencyParseStructure, Digest, LanguageIdentification,
+)
+from concrete.util import (
+    SpecializedCompactProtocol,
+    SpecializedCompactProtocolFactory,
+    create_comm,
+    projected_thrift_spec,
+    read_communication_from_file,
+    read_thrift_from_protocol,
+    reader_source,
+    write_communication_to_buffer,
+)
+from concrete.util.file_io import _StreamTransport
+from concrete.util.slots import slots_type
+from concrete.util.thrift_factory import _protocol_factory
+
+
+def decode(thrift_type, buf):
+    thrift_obj = thrift_type()
+    thrift_obj.read(SpecializedCompactProtocol(TMemoryBuffer(buf)))
+    return thrift_obj
+
+
+def exotic_comm():
+    comm = create_comm('comm-é', text='café \U0001F600 .')
+    comm.startTime = -(1 << 40)
+    comm.keyValueMap = {'a': 'b', 'é': ''}
+    comm.lidList = [LanguageIdentification(
+        metadata=AnnotationMetadata(tool='x', timestamp=0),
+        languageToProbabilityMap={'eng': 0.25, 'fra': -1.5e300},
+    )]
+    comm.metadata.digest = Digest(
+        bytesValue=b'\x00\xff', int64Value=-1, doubleValue=0.5,
+        int64List=[0, 1, -1, 1 << 62], doubleList=[], stringList=['x'])
+    tokenization = comm.sectionList[0].sentenceList[0].tokenization
+    tokenization.dependencyParseList = [DependencyParse(
+        metadata=AnnotationMetadata(tool='y', timestamp=1),
+        dependencyList=[Dependency(gov=-1, dep=0, edgeType='root')],
+        structureInformation=DependencyParseStructure(
+            isAcyclic=True, isConnected=False, isSingleHeaded=True),
+    )]
+    return comm
+
+
+def test_decode_communication():
+    comm = read_communication_from_file(
+        'tests/testdata/serif_dog-bites-man.concrete', add_references=False)
+    assert comm == decode(Communication, write_communication_to_buffer(comm))
+
+
+def test_decode_exotic_communication():
+    comm = exotic_comm()
+    buf = write_communication_to_buffer(comm)
+    generic_comm = Communication()
+    generic_comm.read(TCompactProtocol(TMemoryBuffer(buf)))
+    assert generic_comm == decode(Communication, buf)
+    assert comm == decode(Communication, buf)
+
+
+def test_decode_slots_communication():
+    comm = exotic_comm()
+    SlotsCommunication = slots_type(Communication)
+    slots_comm = decode(SlotsCommunication, write_communication_to_buffer(comm))
+    assert write_communication_to_buffer(comm) == \
+        write_communication_to_buffer(slots_comm)
+    assert SlotsCommunication is type(slots_comm)
+
+
+def test_decode_projected():
+    comm = exotic_comm()
+    comm_proj = read_thrift_from_protocol(
+        Communication(),
+        SpecializedCompactProtocol(
+            TMemoryBuffer(write_communication_to_buffer(comm))),
+        projected_thrift_spec(Communication, {'id', 'metadata'}))
+    assert comm.id == comm_proj.id
+    assert comm.metadata == comm_proj.metadata
+    assert comm_proj.text is None
+    assert comm_proj.sectionList is None
+
+
+def test_decode_stream_refill():
+    comms = [exotic_comm(), create_comm('comm-2', text='foo bar .')]
+    buf = b''.join(write_communication_to_buffer(comm) for comm in comms)
+    transport = _StreamTransport(BytesIO(buf), rbuf_size=16)
+    protocol = SpecializedCompactProtocolFactory().getProtocol(transport)
+    for comm in comms:
+        comm_read = Communication()
+        comm_read.read(protocol)
+        assert comm == comm_read
+    with raises(EOFError):
+        Communication().read(protocol)
+
+
+def test_stream_transport_captured_across_refills():
+    comms = [exotic_comm(), create_comm('comm-2', text='foo bar .')]
+    bufs = [write_communication_to_buffer(comm) for comm in comms]
+    transport = _StreamTransport(BytesIO(b''.join(bufs)), rbuf_size=16)
+    protocol = SpecializedCompactProtocolFactory().getProtocol(transport)
+    for buf in bufs:
+        transport.mark()
+        Communication().read(protocol)
+        assert buf == transport.captured()
+
+
+def test_decode_truncated():
+    buf = write_communication_to_buffer(exotic_comm())
+    with raises(EOFError):
+        decode(Communication, buf[:len(buf) // 2])
+
+
+def test_decode_length_limits():
+    # longest string is the 40-character text, longest list the 5 tokens
+    comm = create_comm('comm-1',
+                       text='aaaaaaaa bbbbbbbb cccccccc dddddddd eeee')
+    buf = write_communication_to_buffer(comm)
+    for (limits, ok) in [
+            (dict(string_length_limit=40), True),
+            (dict(string_length_limit=39), False),
+            (dict(container_length_limit=5), True),
+            (dict(container_length_limit=4), False)]:
+        protocol = SpecializedCompactProtocolFactory(**limits).getProtocol(
+            TMemoryBuffer(buf))
+        comm_read = Communication()
+        if ok:
+            comm_read.read(protocol)
+            assert comm == comm_read
+        else:
+            with raises(TTransportException) as ex:
+                comm_read.read(protocol)
+            assert TTransportException.SIZE_LIMIT == ex.value.type
+
+
+def test_protocol_factory_warning_names_benchmark():
+    with mock.patch('concrete.util.thrift_factory.is_accelerated',
+                    return_value=False):
+        with warns(RuntimeWarning, match='benchmark-decoders.py'):
+            _protocol_factory()
+
+
+def test_reader_source():
+    assert 'def _read_Communication' in reader_source(Communication)
+
+
+def test_protocol_factory_not_accelerated():
+    with mock.patch('concrete.util.thrift_factory.is_accelerated',
+                    return_value=False):
+        with warns(RuntimeWarning, match='NOT accelerated'):
+            protocol_factory = _protocol_factory()
+    assert isinstance(protocol_factory, SpecializedCompactProtocolFactory)
@@ -3,10 +3,24 @@ from __future__ import unicode_literals
 from concrete.util import (
     read_communication_from_buffer,
     write_communication_to_buffer,
-    communication_deep_copy
+    communication_deep_copy,
+    thrift_deep_copy,
+    projected_thrift_spec,
+    read_thrift_from_protocol,
+    read_thrift_from_buffer,
+    write_thrift_to_buffer,
+    serialize_many,
+    deserialize_many,
+    ThriftSerializer,
 )
-from concrete.util import create_comm
-from concrete import Token
+from concrete.util import create_comm, read_communication_from_file
+from concrete import Communication, Token, UUID
+
+from pytest import raises
+from threading import Thread
+from thrift import TSerialization
+from thrift.protocol.TCompactProtocol import TCompactProtocol
+from thrift.transport.TTransport import TMemoryBuffer
 
 
 def assert_simple_comms_equal(comm1, comm2):
@@ -68,6 +82,49 @@ def test_communication_deep_copy():
     assert_simple_comms_equal(comm2, comm3)
 
 
+def test_communication_deep_copy_matches_round_trip():
+    comm = read_communication_from_file(
+        'tests/testdata/serif_dog-bites-man.concrete')
+    comm_copy = communication_deep_copy(comm)
+    assert not hasattr(comm_copy, 'sentenceForUUID')
+    assert write_communication_to_buffer(comm) == \
+        write_communication_to_buffer(comm_copy)
+    assert comm.sectionList[0] is not comm_copy.sectionList[0]
+    assert comm.sectionList[0].uuid is not comm_copy.sectionList[0].uuid
+
+
+def test_communication_deep_copy_skip_fields():
+    comm = create_comm('a-b-c', text='foo bar baz .')
+    comm_copy = communication_deep_copy(comm, skip_fields={'sectionList'})
+    assert comm_copy.sectionList is None
+    assert comm.sectionList is not None
+    assert 'a-b-c' == comm_copy.id
+    assert comm.metadata == comm_copy.metadata
+    assert comm.metadata is not comm_copy.metadata
+
+
+def test_communication_deep_copy_skip_fields_unknown_field():
+    comm = create_comm('a-b-c', text='foo bar baz .')
+    with raises(ValueError):
+        communication_deep_copy(comm, skip_fields={'sentenceList'})
+
+
+def test_communication_deep_copy_shared_types():
+    comm = create_comm('a-b-c', text='foo bar baz .')
+    comm_copy = communication_deep_copy(comm, shared_types=[UUID])
+    assert_simple_comms_equal(comm, comm_copy)
+    assert comm.uuid is comm_copy.uuid
+    assert comm.sectionList[0].uuid is comm_copy.sectionList[0].uuid
+    assert comm.sectionList[0] is not comm_copy.sectionList[0]
+
+
+def test_thrift_deep_copy():
+    token = Token(text='bbq', tokenIndex=3)
+    token_copy = thrift_deep_copy(token)
+    assert token == token_copy
+    assert token is not token_copy
+
+
 def test_read_against_file_contents():
     filename = u'tests/testdata/simple_1.concrete'
     with open(filename, 'rb') as f:
@@ -102,3 +159,114 @@ def test_read_write_fixed_point():
         read_communication_from_buffer(buf_1)
     )
     assert buf_1 == buf_2
+
+
+def test_projected_thrift_spec():
+    thrift_spec = projected_thrift_spec(Communication, {'id', 'text'})
+    assert len(Communication.thrift_spec) == len(thrift_spec)
+    assert set(['id', 'text']) == set(
+        s[2] for s in thrift_spec if s is not None)
+
+
+def test_projected_thrift_spec_unknown_field():
+    with raises(ValueError):
+        projected_thrift_spec(Communication, {'id', 'sentenceList'})
+
+
+def test_read_fields():
+    comm = create_comm('comm-1', text='foo bar baz .')
+    buf = write_communication_to_buffer(comm)
+    comm_proj = read_communication_from_buffer(buf, fields={'id', 'text'})
+    assert 'comm-1' == comm_proj.id
+    assert 'foo bar baz .' == comm_proj.text
+    assert comm_proj.uuid is None
+    assert comm_proj.metadata is None
+    assert comm_proj.sectionList is None
+    assert {} == comm_proj.sentenceForUUID
+
+
+def test_read_fields_nested():
+    comm = create_comm('comm-1', text='foo bar baz .')
+    buf = write_communication_to_buffer(comm)
+    comm_proj = read_communication_from_buffer(
+        buf, add_references=False, fields=['sectionList'])
+    assert comm_proj.id is None
+    assert not hasattr(comm_proj, 'sentenceForUUID')
+    assert (
+        comm.sectionList[0].sentenceList[0].uuid.uuidString ==
+        comm_proj.sectionList[0].sentenceList[0].uuid.uuidString
+    )
+
+
+def test_read_thrift_from_protocol_fields_unaccelerated():
+    comm = create_comm('comm-1', text='foo bar baz .')
+    buf = write_communication_to_buffer(comm)
+    comm_proj = read_thrift_from_protocol(
+        Communication(), TCompactProtocol(TMemoryBuffer(buf)),
+        projected_thrift_spec(Communication, {'id', 'metadata'}))
+    assert 'comm-1' == comm_proj.id
+    assert comm.metadata.tool == comm_proj.metadata.tool
+    assert comm_proj.text is None
+    assert comm_proj.sectionList is None
+
+
+def test_serializer_round_trip():
+    serializer = ThriftSerializer()
+    comm1 = create_comm('comm-1', text='foo bar baz .')
+    comm2 = create_comm('comm-2', text='qux .')
+    buf1 = serializer.serialize(comm1)
+    buf2 = serializer.serialize(comm2)
+    assert buf1 == TSerialization.serialize(
+        comm1, protocol_factory=serializer.protocol_factory)
+    assert buf1 == serializer.serialize(comm1)
+    assert_simple_comms_equal(
+        comm2, serializer.deserialize(Communication(), buf2))
+    assert_simple_comms_equal(
+        comm1, serializer.deserialize(Communication(), buf1))
+
+
+def test_serializer_recovers_from_error():
+    serializer = ThriftSerializer()
+    comm = create_comm('comm-1', text='foo bar baz .')
+    buf = serializer.serialize(comm)
+    with raises(EOFError):
+        serializer.deserialize(Communication(), buf[:len(buf) // 2])
+    assert 'comm-1' == serializer.deserialize(Communication(), buf).id
+
+
+def test_serializer_threads():
+    serializer = ThriftSerializer()
+    comms = [create_comm('comm-%d' % i, text='foo %d .' % i)
+             for i in range(50)]
+    expected = [write_thrift_to_buffer(comm) for comm in comms]
+    results = [None] * 4
+
+    def run(i):
+        results[i] = [serializer.serialize(comm) for comm in comms]
+
+    threads = [Thread(target=run, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [expected] * 4 == results
+
+
+def test_serialize_many_deserialize_many():
+    comms = [create_comm('comm-%d' % i, text='foo %d .' % i)
+             for i in range(3)]
+    bufs = serialize_many(comms)
+    assert [write_communication_to_buffer(comm) for comm in comms] == bufs
+    comms_read = deserialize_many(Communication, bufs)
+    for (comm, comm_read) in zip(comms, comms_read):
+        assert_simple_comms_equal(comm, comm_read)
+    comms_proj = deserialize_many(
+        Communication, bufs, projected_thrift_spec(Communication, {'id'}))
+    assert ['comm-0', 'comm-1', 'comm-2'] == [c.id for c in comms_proj]
+    assert all(c.text is None for c in comms_proj)
+
+
+def test_write_thrift_to_buffer():
+    token = Token(text='bbq', tokenIndex=3)
+    token_read = read_thrift_from_buffer(Token(), write_thrift_to_buffer(token))
+    assert token == token_read
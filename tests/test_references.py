@@ -0,0 +1,331 @@
+from __future__ import unicode_literals
+
+import gc
+import pickle
+import weakref
+
+from pytest import raises
+
+from concrete import Communication
+from concrete.util import (
+    CommunicationReader,
+    ReferenceIndex,
+    add_references_to_communication,
+    communication_deep_copy,
+    read_communication_from_file,
+    read_thrift_from_file,
+    write_communication_to_buffer,
+)
+from concrete.util.slots import slots_type
+
+
+SERIF_COMM_PATH = 'tests/testdata/serif_dog-bites-man.concrete'
+
+
+def test_add_references_to_communication():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    add_references_to_communication(comm)
+    tokenization = comm.sectionList[1].sentenceList[0].tokenization
+    assert tokenization is \
+        comm.tokenizationForUUID[tokenization.uuid.uuidString]
+    assert comm.sectionList[1].sentenceList[0] is tokenization.sentence
+    entity = comm.entitySetList[0].entityList[0]
+    assert [m.uuid for m in entity.mentionList] == entity.mentionIdList
+    assert comm.entitySetList[0] is entity.entitySet
+    mention = entity.mentionList[0]
+    assert mention.tokens.tokenizationId == \
+        mention.tokens.tokenization.uuid
+    assert sum(len(s.mentionList) for s in comm.situationMentionSetList) == \
+        len(comm.situationMentionForUUID)
+
+
+def test_add_lazy_references():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    add_references_to_communication(comm, lazy=True)
+    assert isinstance(comm, Communication)
+    assert 'Communication' == type(comm).__name__
+    assert not hasattr(comm.entitySetList[0].entityList[0], 'foo')
+
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references='lazy')
+    assert 'tokenizationForUUID' not in vars(comm)
+    assert comm.text.startswith('<DOC')
+    assert set() == comm._lazyReferences
+
+    entity = comm.entitySetList[0].entityList[0]
+    assert [m.uuid for m in entity.mentionList] == entity.mentionIdList
+    mention = entity.mentionList[0]
+    assert mention.tokens.tokenization.sentence.tokenization is \
+        mention.tokens.tokenization
+    assert {'sectionList', 'entityMentionSetList', 'entitySetList'} == \
+        comm._lazyReferences
+    assert 'situationForUUID' not in vars(comm)
+    assert comm.entityForUUID[entity.uuid.uuidString] is entity
+
+    situation_set = [s for s in comm.situationSetList if s.situationList][0]
+    situation = situation_set.situationList[0]
+    assert comm.situationForUUID[situation.uuid.uuidString] is situation
+    assert situation_set is situation.situationSet
+
+
+def test_add_lazy_references_map_first():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references='lazy')
+    assert 4 == len(comm.sectionForUUID)
+    assert {'sectionList'} == comm._lazyReferences
+    tokenization = comm.sectionList[1].sentenceList[0].tokenization
+    assert comm.sectionList[1].sentenceList[0] is tokenization.sentence
+
+
+def test_add_lazy_references_matches_eager():
+    eager_comm = read_communication_from_file(SERIF_COMM_PATH)
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references='lazy')
+    for name in ('entityForUUID', 'entityMentionForUUID', 'sectionForUUID',
+                 'sentenceForUUID', 'situationForUUID',
+                 'situationMentionForUUID', 'tokenizationForUUID'):
+        assert set(getattr(eager_comm, name)) == set(getattr(comm, name))
+    assert write_communication_to_buffer(eager_comm) == \
+        write_communication_to_buffer(comm)
+
+
+def test_add_lazy_references_assign_list():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references='lazy')
+    assert comm.entityForUUID
+    comm.situationSetList = None
+    comm.entitySetList = []
+    assert {} == comm.entityForUUID
+    assert {} == comm.situationForUUID
+
+
+def test_add_lazy_references_equality():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    lazy_comm = read_communication_from_file(
+        SERIF_COMM_PATH, add_references='lazy')
+    assert lazy_comm == comm
+    assert comm == lazy_comm
+    lazy_comm.id = 'other'
+    assert lazy_comm != comm
+
+
+def test_add_lazy_references_pickle_and_copy():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references='lazy')
+    for comm_copy in (pickle.loads(pickle.dumps(comm)),
+                      communication_deep_copy(comm)):
+        assert type(comm) is type(comm_copy)
+        assert comm_copy is not comm
+        entity = comm_copy.entitySetList[0].entityList[0]
+        assert comm_copy.entityForUUID[entity.uuid.uuidString] is entity
+        assert entity.mentionList[0] is \
+            comm_copy.entityMentionForUUID[entity.mentionIdList[0].uuidString]
+
+
+def test_add_lazy_references_slots():
+    comm = read_thrift_from_file(
+        slots_type(Communication)(), SERIF_COMM_PATH)
+    add_references_to_communication(comm, lazy=True)
+    assert isinstance(comm, slots_type(Communication))
+    assert not hasattr(comm, '__dict__')
+    tokenization = comm.sectionList[1].sentenceList[0].tokenization
+    assert comm.sectionList[1].sentenceList[0] is tokenization.sentence
+    comm_copy = pickle.loads(pickle.dumps(comm))
+    assert type(comm) is type(comm_copy)
+    assert 1 == len(comm_copy.situationForUUID)
+
+
+def test_add_eager_references_after_lazy():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references='lazy')
+    add_references_to_communication(comm)
+    assert Communication is type(comm)
+    assert 'entityForUUID' in vars(comm)
+    assert '_lazyReferences' not in vars(comm)
+
+
+def test_communication_reader_lazy_references():
+    for workers in (None, 2):
+        [(comm, filename)] = list(CommunicationReader(
+            SERIF_COMM_PATH, add_references='lazy', workers=workers))
+        assert set() == comm._lazyReferences
+        assert 4 == len(comm.sectionForUUID)
+
+
+MAP_NAMES = (
+    'entityForUUID', 'entityMentionForUUID', 'sectionForUUID',
+    'sentenceForUUID', 'situationForUUID', 'situationMentionForUUID',
+    'tokenizationForUUID',
+)
+
+
+def assert_same_references(expected_comm, comm):
+    for name in MAP_NAMES:
+        assert set(getattr(expected_comm, name)) == set(getattr(comm, name))
+    for (expected_entity_set, entity_set) in zip(expected_comm.entitySetList,
+                                                 comm.entitySetList):
+        for (expected_entity, entity) in zip(expected_entity_set.entityList,
+                                             entity_set.entityList):
+            assert entity_set is entity.entitySet
+            assert [m.uuid for m in expected_entity.mentionList] == \
+                [m.uuid for m in entity.mentionList]
+
+
+def test_reference_index_add():
+    expected_comm = read_communication_from_file(SERIF_COMM_PATH)
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    fields = ('entityMentionSetList', 'entitySetList',
+              'situationMentionSetList', 'situationSetList')
+    annotations = dict((field, getattr(comm, field)) for field in fields)
+    for field in fields:
+        setattr(comm, field, None)
+
+    index = ReferenceIndex(comm)
+    assert index.comm is comm
+    assert {} == comm.entityMentionForUUID
+    for entity_mention_set in annotations['entityMentionSetList']:
+        index.add_entity_mention_set(entity_mention_set)
+    for entity_set in annotations['entitySetList']:
+        index.add_entity_set(entity_set)
+    for situation_mention_set in annotations['situationMentionSetList']:
+        index.add_situation_mention_set(situation_mention_set)
+    for situation_set in annotations['situationSetList']:
+        index.add_situation_set(situation_set)
+
+    for field in fields:
+        assert annotations[field] == getattr(comm, field)
+    assert_same_references(expected_comm, comm)
+    mention = comm.entityMentionSetList[0].mentionList[0]
+    assert comm.entityMentionSetList[0] is mention.entityMentionSet
+    assert mention.tokens.tokenizationId == mention.tokens.tokenization.uuid
+
+
+def test_reference_index_remove():
+    comm = read_communication_from_file(SERIF_COMM_PATH)
+    index = ReferenceIndex(comm, add_references=False)
+    for situation_set in list(comm.situationSetList):
+        index.remove_situation_set(situation_set)
+    for situation_mention_set in list(comm.situationMentionSetList):
+        index.remove_situation_mention_set(situation_mention_set)
+    for entity_set in list(comm.entitySetList):
+        index.remove_entity_set(entity_set)
+    entity_mention_set = comm.entityMentionSetList[0]
+    index.remove_entity_mention_set(entity_mention_set)
+    assert entity_mention_set not in comm.entityMentionSetList
+    for name in ('entityForUUID', 'situationForUUID',
+                 'situationMentionForUUID'):
+        assert {} == getattr(comm, name)
+    assert all(
+        m.uuid.uuidString not in comm.entityMentionForUUID
+        for m in entity_mention_set.mentionList)
+
+    section = comm.sectionList[1]
+    index.remove_section(section)
+    assert 3 == len(comm.sectionList)
+    assert section.uuid.uuidString not in comm.sectionForUUID
+    assert section.sentenceList[0].tokenization.uuid.uuidString not in \
+        comm.tokenizationForUUID
+
+    with raises(ValueError):
+        index.remove_section(section)
+    with raises(ValueError):
+        index.remove_entity_set(entity_set)
+
+
+def test_reference_index_round_trip():
+    expected_comm = read_communication_from_file(SERIF_COMM_PATH)
+    comm = read_communication_from_file(SERIF_COMM_PATH)
+    index = ReferenceIndex(comm, add_references=False)
+    entity_set = comm.entitySetList[0]
+    index.remove_entity_set(entity_set)
+    assert entity_set not in comm.entitySetList
+    assert entity_set.entityList[0].uuid.uuidString not in \
+        comm.entityForUUID
+    index.add_entity_set(entity_set)
+    comm.entitySetList.insert(0, comm.entitySetList.pop())
+    assert_same_references(expected_comm, comm)
+
+
+def test_reference_index_lazy():
+    expected_comm = read_communication_from_file(SERIF_COMM_PATH)
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    entity_sets = comm.entitySetList
+    comm.entitySetList = None
+    add_references_to_communication(comm, lazy=True)
+    index = ReferenceIndex(comm, add_references=False)
+    for entity_set in entity_sets:
+        index.add_entity_set(entity_set)
+    assert_same_references(expected_comm, comm)
+
+
+def assert_freed_without_gc(read_comm):
+    gc.disable()
+    try:
+        comm = read_comm()
+        entity_set_ref = weakref.ref(comm.entitySetList[0])
+        tokenization = comm.sectionList[1].sentenceList[0].tokenization
+        assert comm.sectionList[1].sentenceList[0] == tokenization.sentence
+        comm_ref = weakref.ref(comm)
+        del comm, tokenization
+        assert comm_ref() is None
+        assert entity_set_ref() is None
+    finally:
+        gc.enable()
+
+
+def test_add_references_weak():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references='weak')
+    entity = comm.entitySetList[0].entityList[0]
+    assert comm.entitySetList[0] == entity.entitySet
+    assert comm.entitySetList[0] is not entity.entitySet
+    assert comm.entitySetList[0].uuid is entity.entitySet.uuid
+    mention = entity.mentionList[0]
+    assert mention.uuid in [
+        m.uuid for m in mention.entityMentionSet.mentionList]
+    assert mention.tokens.tokenization.sentence.uuid.uuidString in \
+        comm.sentenceForUUID
+    assert 'weakproxy' in repr(mention)
+
+    assert_freed_without_gc(lambda: read_communication_from_file(
+        SERIF_COMM_PATH, add_references='weak'))
+
+
+def read_lazy_weak_comm():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    add_references_to_communication(comm, lazy=True, weak=True)
+    return comm
+
+
+def test_add_lazy_references_weak():
+    assert_freed_without_gc(read_lazy_weak_comm)
+
+    comm = read_lazy_weak_comm()
+    comm_copy = pickle.loads(pickle.dumps(comm))
+    for c in (comm, comm_copy):
+        tokenization = c.sectionList[1].sentenceList[0].tokenization
+        assert c.sectionList[1].sentenceList[0] is not tokenization.sentence
+        assert c.sectionList[1].sentenceList[0].uuid is \
+            tokenization.sentence.uuid
+
+    add_references_to_communication(comm, lazy=True)
+    tokenization = comm.sectionList[1].sentenceList[0].tokenization
+    assert comm.sectionList[1].sentenceList[0] is tokenization.sentence
+
+
+def test_communication_reader_weak_references():
+    for workers in (None, 2):
+        [(comm, filename)] = list(CommunicationReader(
+            SERIF_COMM_PATH, add_references='weak', workers=workers))
+        entity = comm.entitySetList[0].entityList[0]
+        assert comm.entitySetList[0] is not entity.entitySet
+        assert comm.entitySetList[0].uuid is entity.entitySet.uuid
+
+
+def test_reference_index_weak():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    entity_sets = comm.entitySetList
+    comm.entitySetList = None
+    comm.situationSetList = None
+    index = ReferenceIndex(comm, weak=True)
+    for entity_set in entity_sets:
+        index.add_entity_set(entity_set)
+    entity = entity_sets[0].entityList[0]
+    assert entity_sets[0] is not entity.entitySet
+    assert entity_sets[0].uuid is entity.entitySet.uuid
+    mention = entity.mentionList[0]
+    assert mention.uuid in [
+        m.uuid for m in mention.entityMentionSet.mentionList]
@@ -0,0 +1,97 @@
+from __future__ import unicode_literals
+
+import pickle
+
+from pytest import raises
+from thrift.protocol.TCompactProtocol import TCompactProtocol
+from thrift.transport.TTransport import TMemoryBuffer
+
+import concrete
+from concrete.util import (
+    CommunicationReader,
+    communication_deep_copy,
+    read_communication_from_file,
+    read_thrift_from_buffer,
+    read_thrift_from_file,
+    write_communication_to_buffer,
+)
+from concrete.util.slots import slots_type
+
+
+SERIF_COMM_PATH = 'tests/testdata/serif_dog-bites-man.concrete'
+
+
+def test_slots_type():
+    Communication = slots_type(concrete.Communication)
+    assert 'Communication' == Communication.__name__
+    assert Communication is slots_type(concrete.Communication)
+    assert Communication is slots_type(Communication)
+    from concrete.util.slots import Communication as SlotsCommunication
+    assert Communication is SlotsCommunication
+
+
+def test_slots_type_not_struct():
+    with raises(ValueError):
+        slots_type(concrete.ServicesException)
+    with raises(ValueError):
+        slots_type(dict)
+
+
+def test_read_slots_communication():
+    comm = read_communication_from_file(SERIF_COMM_PATH)
+    slots_comm = read_thrift_from_file(
+        slots_type(concrete.Communication)(), SERIF_COMM_PATH)
+    assert not hasattr(slots_comm, '__dict__')
+    token = slots_comm.sectionList[1].sentenceList[0] \
+        .tokenization.tokenList.tokenList[0]
+    assert slots_type(concrete.Token) is type(token)
+    assert not hasattr(token, '__dict__')
+    with raises(AttributeError):
+        token.foo = 'bar'
+    assert write_communication_to_buffer(comm) == \
+        write_communication_to_buffer(slots_comm)
+
+
+def test_read_slots_communication_unaccelerated():
+    Communication = slots_type(concrete.Communication)
+    comm = read_communication_from_file(SERIF_COMM_PATH)
+    buf = write_communication_to_buffer(comm)
+    slots_comm = Communication()
+    slots_comm.read(TCompactProtocol(TMemoryBuffer(buf)))
+    assert slots_type(concrete.Section) is type(slots_comm.sectionList[0])
+    assert read_thrift_from_buffer(Communication(), buf) == slots_comm
+
+
+def test_slots_communication_references():
+    (comm, _) = next(iter(CommunicationReader(SERIF_COMM_PATH, slots=True)))
+    assert slots_type(concrete.Communication) is type(comm)
+    for sentence in comm.sentenceForUUID.values():
+        assert sentence.tokenization.sentence is sentence
+    for entity_set in comm.entitySetList:
+        for entity in entity_set.entityList:
+            assert entity.entitySet is entity_set
+            assert len(entity.mentionIdList) == len(entity.mentionList)
+
+
+def test_slots_communication_repr_eq():
+    Token = slots_type(concrete.Token)
+    token = Token(tokenIndex=1, text='bbq')
+    assert ('Token(tokenIndex=1, text=%r, textSpan=None, '
+            'rawTextSpan=None, audioSpan=None)' % 'bbq') == repr(token)
+    assert Token(tokenIndex=1, text='bbq') == token
+    assert Token(tokenIndex=2, text='bbq') != token
+    assert concrete.Token(tokenIndex=1, text='bbq') != token
+
+
+def test_slots_communication_pickle_copy():
+    (comm, _) = next(iter(CommunicationReader(SERIF_COMM_PATH, slots=True)))
+    comm_pickled = pickle.loads(pickle.dumps(comm))
+    assert comm == comm_pickled
+    assert comm == communication_deep_copy(comm)
+
+
+def test_slots_type_after_pickling_generated_type():
+    uuid = concrete.UUID(uuidString='a-b-c')
+    assert uuid == pickle.loads(pickle.dumps(uuid))
+    slots_uuid = slots_type(concrete.UUID)(uuidString='a-b-c')
+    assert slots_uuid == pickle.loads(pickle.dumps(slots_uuid))
@@ -1,5 +1,5 @@
 from __future__ import unicode_literals
-from pytest import raises, fixture
+from pytest import raises, fixture, importorskip
 
 from math import exp, log
 
@@ -12,9 +12,13 @@ from concrete import (
 from concrete.util import create_comm
 from concrete.util import (
     get_tokens, get_ner, get_pos, get_lemmas, get_tagged_tokens,
-    compute_lattice_expected_counts, get_token_taggings
+    compute_lattice_expected_counts, batch_compute_lattice_expected_counts,
+    get_token_taggings,
+    Vocabulary, NO_ID, get_corpus_token_arrays, get_comm_token_arrays,
 )
 
+from concrete.util.tokenization import _batch_expected_counts_numpy
+
 import mock
 
 
@@ -388,3 +392,194 @@ def test_compute_lattice_expected_counts_incomplete_arc():
         compute_lattice_expected_counts(TokenLattice(arcList=[
             Arc(src=0, dst=1, token=Token(tokenIndex=0)),
         ], startState=0, endState=1))
+
+
+@fixture(params=[False, True], ids=['python', 'numpy'])
+def use_numpy(request):
+    if request.param:
+        importorskip('numpy')
+    return request.param
+
+
+def test_compute_lattice_expected_counts_skip_arc(use_numpy):
+    # 0 --0-> 1, -1
+    # 1 --1-> 2, -2
+    # 2 --2-> 3, -1
+    # 0 --3-> 3, -3
+    # 3 --4-> 4, -1
+    # (state 3 is reached on paths of different lengths)
+    A = log(exp(-1 + -2 + -1) + exp(-3))
+    expected = [-4 - A, -4 - A, -4 - A, -3 - A, 0.]
+    actual = compute_lattice_expected_counts(TokenLattice(arcList=[
+        Arc(src=0, dst=1, token=Token(tokenIndex=0), weight=-1.),
+        Arc(src=1, dst=2, token=Token(tokenIndex=1), weight=-2.),
+        Arc(src=2, dst=3, token=Token(tokenIndex=2), weight=-1.),
+        Arc(src=0, dst=3, token=Token(tokenIndex=3), weight=-3.),
+        Arc(src=3, dst=4, token=Token(tokenIndex=4), weight=-1.),
+    ], startState=0, endState=4), use_numpy=use_numpy)
+    assert allclose(expected, actual), '%s !~= %s' % (expected, actual)
+
+
+def test_compute_lattice_expected_counts_missing_token(use_numpy):
+    # 0 --2-> 1, -1
+    actual = compute_lattice_expected_counts(TokenLattice(arcList=[
+        Arc(src=0, dst=1, token=Token(tokenIndex=2), weight=-1.),
+    ], startState=0, endState=1), use_numpy=use_numpy)
+    assert [None, None, 0.] == actual
+
+
+def test_compute_lattice_expected_counts_cycle(use_numpy):
+    # 0 --0-> 1, -1
+    # 1 --1-> 0, -1
+    # 1 --2-> 2, -1
+    with raises(ValueError):
+        compute_lattice_expected_counts(TokenLattice(arcList=[
+            Arc(src=0, dst=1, token=Token(tokenIndex=0), weight=-1.),
+            Arc(src=1, dst=0, token=Token(tokenIndex=1), weight=-1.),
+            Arc(src=1, dst=2, token=Token(tokenIndex=2), weight=-1.),
+        ], startState=0, endState=2), use_numpy=use_numpy)
+
+
+def test_compute_lattice_expected_counts_no_path(use_numpy):
+    # 0 --0-> 1, -1
+    # 2 --1-> 3, -1
+    with raises(ValueError):
+        compute_lattice_expected_counts(TokenLattice(arcList=[
+            Arc(src=0, dst=1, token=Token(tokenIndex=0), weight=-1.),
+            Arc(src=2, dst=3, token=Token(tokenIndex=1), weight=-1.),
+        ], startState=0, endState=3), use_numpy=use_numpy)
+
+
+def test_batch_compute_lattice_expected_counts(use_numpy):
+    lattices = [
+        # triangle
+        TokenLattice(arcList=[
+            Arc(src=0, dst=1, token=Token(tokenIndex=0), weight=-1.),
+            Arc(src=1, dst=2, token=Token(tokenIndex=1), weight=-2.),
+            Arc(src=0, dst=2, token=Token(tokenIndex=1), weight=-4.),
+        ], startState=0, endState=2),
+        TokenLattice(arcList=[], startState=0, endState=0),
+        # rhombus, with the states of the triangle
+        TokenLattice(arcList=[
+            Arc(src=0, dst=1, token=Token(tokenIndex=0), weight=-1.),
+            Arc(src=1, dst=3, token=Token(tokenIndex=1), weight=-2.),
+            Arc(src=0, dst=2, token=Token(tokenIndex=0), weight=-3.),
+            Arc(src=2, dst=3, token=Token(tokenIndex=2), weight=-4.),
+        ], startState=0, endState=3),
+    ]
+    actual = batch_compute_lattice_expected_counts(
+        iter(lattices), use_numpy=use_numpy)
+    assert 3 == len(actual)
+    for (lattice, counts) in zip(lattices, actual):
+        expected = compute_lattice_expected_counts(lattice, use_numpy=False)
+        assert allclose(expected, counts), '%s !~= %s' % (expected, counts)
+
+
+def test_compute_lattice_expected_counts_deep_lattice(use_numpy):
+    # a chain of 2000 states: NumPy would take a step per state (see
+    # examples/benchmark-lattice-expected-counts.py), so it is not
+    # used by default
+    lattice = TokenLattice(arcList=[
+        Arc(src=i, dst=i + 1, token=Token(tokenIndex=i % 3), weight=-1.)
+        for i in range(2000)
+    ], startState=0, endState=2000)
+    with mock.patch(
+            'concrete.util.tokenization._batch_expected_counts_numpy',
+            wraps=_batch_expected_counts_numpy) as batch_numpy:
+        actual = compute_lattice_expected_counts(lattice)
+        assert not batch_numpy.called
+        if use_numpy:
+            assert allclose(actual, compute_lattice_expected_counts(
+                lattice, use_numpy=True))
+            assert batch_numpy.called
+    expected = [log(667.), log(667.), log(666.)]
+    assert allclose(expected, actual), '%s !~= %s' % (expected, actual)
+
+
+def test_compute_lattice_expected_counts_numpy_missing():
+    lattice = TokenLattice(arcList=[
+        Arc(src=0, dst=1, token=Token(tokenIndex=0), weight=-1.),
+    ], startState=0, endState=1)
+    with mock.patch.dict('sys.modules', {'numpy': None}):
+        with raises(ImportError, match='lattice expected counts'):
+            compute_lattice_expected_counts(lattice, use_numpy=True)
+        with raises(ImportError, match='lattice expected counts'):
+            batch_compute_lattice_expected_counts([lattice], use_numpy=True)
+        assert [0.] == compute_lattice_expected_counts(lattice)
+        with raises(ImportError, match='token arrays'):
+            get_corpus_token_arrays([create_comm('comm-1', text='foo')])
+
+
+def test_vocabulary():
+    vocab = Vocabulary(['a', 'b'])
+    assert 2 == len(vocab)
+    assert 1 == vocab.get_id('b')
+    assert 2 == vocab.get_id('c')
+    assert ['a', 'b', 'c'] == vocab.strings
+    assert 'c' in vocab
+    vocab.frozen = True
+    assert NO_ID == vocab.get_id('d')
+    assert 'd' not in vocab
+
+
+def test_get_corpus_token_arrays():
+    np = importorskip('numpy')
+    comm1 = create_comm('comm-1', text='foo bar\nbaz\n\nfoo .')
+    tokenization = comm1.sectionList[0].sentenceList[0].tokenization
+    tokenization.tokenTaggingList = [
+        TokenTagging(
+            metadata=AnnotationMetadata(tool='x'),
+            taggingType='POS',
+            taggedTokenList=[
+                TaggedToken(tokenIndex=0, tag='N'),
+                TaggedToken(tokenIndex=1, tag='V'),
+            ],
+        ),
+    ]
+    comm2 = create_comm('comm-2', text='bar')
+    arrays = get_corpus_token_arrays([comm1, comm2], tagging_types=['POS'])
+    assert 6 == len(arrays)
+    assert ['foo', 'bar', 'baz', '.'] == arrays.token_vocab.strings
+    assert [0, 1, 2, 0, 3, 1] == arrays.token_ids.tolist()
+    assert [0, 4, 8, 13, 17, 0] == arrays.starts.tolist()
+    assert [3, 7, 11, 16, 18, 3] == arrays.endings.tolist()
+    assert [0, 2, 3, 5, 6] == arrays.sentence_offsets.tolist()
+    assert [0, 3, 5, 6] == arrays.section_offsets.tolist()
+    assert [0, 5, 6] == arrays.comm_offsets.tolist()
+    assert ['N', 'V'] == arrays.tag_vocabs['POS'].strings
+    assert [0, 1, NO_ID, NO_ID, NO_ID, NO_ID] == \
+        arrays.tag_ids['POS'].tolist()
+    assert np.int32 == arrays.token_ids.dtype
+
+
+def test_get_corpus_token_arrays_non_positional_token_indices():
+    importorskip('numpy')
+    comm = create_comm('comm-1', text='foo bar\nbaz')
+    tokenization = comm.sectionList[0].sentenceList[0].tokenization
+    for (i, token) in enumerate(tokenization.tokenList.tokenList):
+        token.tokenIndex = 10 + i
+    tokenization.tokenTaggingList = [
+        TokenTagging(
+            metadata=AnnotationMetadata(tool='x'),
+            taggingType='POS',
+            taggedTokenList=[
+                TaggedToken(tokenIndex=11, tag='V'),
+                TaggedToken(tokenIndex=0, tag='N'),
+                TaggedToken(tokenIndex=2, tag='N'),
+            ],
+        ),
+    ]
+    arrays = get_corpus_token_arrays([comm], tagging_types=['POS'])
+    assert ['V'] == arrays.tag_vocabs['POS'].strings
+    assert [NO_ID, 0, NO_ID] == arrays.tag_ids['POS'].tolist()
+
+
+def test_get_comm_token_arrays_frozen_vocab():
+    importorskip('numpy')
+    comm = create_comm('comm-1', text='foo bar\nbaz\n\nfoo .')
+    arrays = get_comm_token_arrays(
+        comm, token_vocab=Vocabulary(['foo', 'baz'], frozen=True),
+        sect_pred=lambda section: section.textSpan.start == 0)
+    assert [0, NO_ID, 1] == arrays.token_ids.tolist()
+    assert [0, 3] == arrays.section_offsets.tolist()
+    assert {} == arrays.tag_ids
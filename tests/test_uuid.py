@@ -2,16 +2,23 @@ from __future__ import unicode_literals
 from concrete.util import (
     generate_UUID, bin_to_hex, hex_to_bin, AnalyticUUIDGeneratorFactory,
     generate_uuid_unif, generate_hex_unif, split_uuid, join_uuid,
+    intern_uuids, CommunicationReader, read_communication_from_file,
+    read_thrift_from_file, write_communication_to_buffer,
 )
+from concrete.util.slots import slots_type
 
-from concrete import AnnotationMetadata, Communication
+from concrete import AnnotationMetadata, Communication, EntityMention
 from concrete.validate import validate_communication
 
+import copy
+import random
 import re
 import time
 
 from pytest import raises
 
+SERIF_COMM_PATH = 'tests/testdata/serif_dog-bites-man.concrete'
+
 UUID_RE = re.compile(
     r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
 
@@ -230,6 +237,19 @@ def test_generate_hex_unif_spread():
     assert len(s) == n
 
 
+def test_generate_hex_unif_seeded():
+    # a seeded random module yields the same hex strings (and UUIDs)
+    # across releases
+    state = random.getstate()
+    try:
+        random.seed(0)
+        assert '67b29639' == generate_hex_unif(8)
+        random.seed(0)
+        assert '67b29639-50e3-' == generate_uuid_unif()[:14]
+    finally:
+        random.setstate(state)
+
+
 def test_generate_uuid_unif_format():
     u = generate_uuid_unif()
     assert UUID_RE.match(u) is not None
@@ -345,3 +365,81 @@ def test_AnalyticUUIDGeneratorFactory_spread():
             u = next(aug).uuidString
             s.add(u)
     assert len(s) == m * n
+
+
+def test_AnalyticUUIDGenerator_take():
+    augf = AnalyticUUIDGeneratorFactory()
+    aug = augf.create()
+    aug_copy = copy.deepcopy(aug)
+    uuids = aug.take(50)
+    assert 50 == aug.n
+    assert [next(aug_copy) for i in range(50)] == uuids
+    assert all(UUID_RE.match(u.uuidString) for u in uuids)
+    assert next(aug_copy) == next(aug)
+    assert [] == aug.take(0)
+    assert 51 == aug.n
+    with raises(ValueError):
+        aug.take(-1)
+
+
+def test_AnalyticUUIDGenerator_take_wraps_around():
+    aug = AnalyticUUIDGeneratorFactory().create()
+    aug._z = 2**48 - 2
+    uuids = [u.uuidString for u in aug.take(3)]
+    assert ['ffffffffffff', '000000000000', '000000000001'] == \
+        [u[-12:] for u in uuids]
+    assert '000000000002' == next(aug).uuidString[-12:]
+
+
+def test_AnalyticUUIDGenerator_fill():
+    aug = AnalyticUUIDGeneratorFactory().create()
+    aug_copy = copy.deepcopy(aug)
+    mentions = [EntityMention() for i in range(5)]
+    aug.fill(iter(mentions))
+    assert [next(aug_copy) for i in range(5)] == [m.uuid for m in mentions]
+    assert 5 == aug.n
+
+
+def test_intern_uuids():
+    comm = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    buf = write_communication_to_buffer(comm)
+    uuids = intern_uuids(comm)
+    assert write_communication_to_buffer(comm) == buf
+    assert comm.uuid is uuids[comm.uuid.uuidString]
+    tokenization = comm.sectionList[1].sentenceList[0].tokenization
+    entity = comm.entitySetList[0].entityList[0]
+    mention = [m for ems in comm.entityMentionSetList for m in ems.mentionList
+               if m.uuid == entity.mentionIdList[0]][0]
+    assert entity.mentionIdList[0] is mention.uuid
+    assert mention.tokens.tokenizationId in (
+        s.tokenization.uuid for s in comm.sectionList[1].sentenceList)
+    assert tokenization.uuid is uuids[tokenization.uuid.uuidString]
+
+
+def test_intern_uuids_shared_map():
+    comm1 = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    comm2 = read_communication_from_file(SERIF_COMM_PATH, add_references=False)
+    uuids = intern_uuids(comm1)
+    assert intern_uuids(comm2, uuids) is uuids
+    assert comm1.uuid is comm2.uuid
+    assert comm1.sectionList[0].uuid is comm2.sectionList[0].uuid
+
+
+def test_intern_uuids_slots():
+    comm = read_thrift_from_file(slots_type(Communication)(), SERIF_COMM_PATH)
+    buf = write_communication_to_buffer(comm)
+    uuids = intern_uuids(comm)
+    assert write_communication_to_buffer(comm) == buf
+    entity = comm.entitySetList[0].entityList[0]
+    assert entity.mentionIdList[0] is uuids[entity.mentionIdList[0].uuidString]
+
+
+def test_communication_reader_intern_uuids():
+    for workers in (None, 2):
+        [(comm, filename)] = list(CommunicationReader(
+            SERIF_COMM_PATH, intern_uuids=True, workers=workers))
+        entity = comm.entitySetList[0].entityList[0]
+        assert entity.mentionIdList[0] is entity.mentionList[0].uuid
+        mention = entity.mentionList[0]
+        assert mention.tokens.tokenizationId is \
+            mention.tokens.tokenization.uuid